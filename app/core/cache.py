@@ -0,0 +1,64 @@
+import threading
+from typing import Any, Dict, Hashable
+
+from cachetools import LRUCache, TTLCache
+
+_MISSING = object()
+
+
+class StatsCache:
+    """
+    Bounded in-memory cache (LRU, or TTL when `ttl` is given) that counts
+    hits and misses. Safe to share between the event loop and worker threads.
+    """
+
+    def __init__(self, name: str, maxsize: int, ttl: float | None = None):
+        self.name = name
+        self._data = TTLCache(maxsize=maxsize, ttl=ttl) if ttl else LRUCache(maxsize=maxsize)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        register_cache(name, self)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            value = self._data.get(key, _MISSING)
+            if value is _MISSING:
+                self.misses += 1
+                return default
+            self.hits += 1
+            return value
+
+    def peek(self, key: Hashable, default: Any = None) -> Any:
+        """Lookup that does not count towards hit/miss stats."""
+        with self._lock:
+            return self._data.get(key, default)
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self._data.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+_registry: Dict[str, Any] = {}
+
+def register_cache(name: str, cache: Any) -> None:
+    """Anything with a `stats()` method can be listed under /stats/caches."""
+    _registry[name] = cache
+
+def cache_stats() -> Dict[str, Dict[str, Any]]:
+    return {name: cache.stats() for name, cache in _registry.items()}
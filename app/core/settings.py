@@ -22,6 +22,130 @@ WEAVIATE_GRPC_PORT = int(os.getenv("WEAVIATE_GRPC_PORT", "50051"))
 WEAVIATE_HTTP_SECURE = os.getenv("WEAVIATE_HTTP_SECURE", "false").lower() == "true"
 WEAVIATE_GRPC_SECURE = os.getenv("WEAVIATE_GRPC_SECURE", "false").lower() == "true"
 
+# Client pool: max open connections, seconds to wait for a free one, and how
+# often an idle connection is re-checked before it is handed out again.
+WEAVIATE_POOL_SIZE = int(os.getenv("WEAVIATE_POOL_SIZE", "4"))
+WEAVIATE_POOL_TIMEOUT = float(os.getenv("WEAVIATE_POOL_TIMEOUT", "10"))
+WEAVIATE_HEALTHCHECK_INTERVAL = float(os.getenv("WEAVIATE_HEALTHCHECK_INTERVAL", "30"))
+# Where chunks are indexed and searched: "weaviate", "pgvector" (embeddings
+# and full-text index in the context_chunks table), or "local" for an
+# in-process index (NumPy vectors + BM25 postings memory-mapped from
+# LOCAL_INDEX_DIR, which must be on a persistent volume). LOCAL_VECTOR_INDEX=hnsw
+# uses hnswlib when installed, otherwise vector search is an exact scan.
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "weaviate")
+LOCAL_INDEX_DIR = os.getenv("LOCAL_INDEX_DIR", "context/index")
+LOCAL_VECTOR_INDEX = os.getenv("LOCAL_VECTOR_INDEX", "exact")
+LOCAL_HNSW_EF = int(os.getenv("LOCAL_HNSW_EF", "64"))
+# Local index writes are appended to a log; the index files are rewritten in
+# the background once appended plus deleted rows pass LOCAL_COMPACT_RATIO of
+# the compacted rows (and at least LOCAL_COMPACT_MIN_ROWS)
+LOCAL_COMPACT_RATIO = float(os.getenv("LOCAL_COMPACT_RATIO", "0.5"))
+LOCAL_COMPACT_MIN_ROWS = int(os.getenv("LOCAL_COMPACT_MIN_ROWS", "1000"))
+# pgvector backend: EMBEDDING_DIM must match the embedding model,
+# PGVECTOR_EF_SEARCH is set on every pooled connection, and
+# PGVECTOR_MIN_TEXT_RANK is the ts_rank floor for full-text hits
+EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", "768"))
+PGVECTOR_EF_SEARCH = int(os.getenv("PGVECTOR_EF_SEARCH", "64"))
+PGVECTOR_TEXT_CONFIG = os.getenv("PGVECTOR_TEXT_CONFIG", "english")
+PGVECTOR_MIN_TEXT_RANK = float(os.getenv("PGVECTOR_MIN_TEXT_RANK", "0"))
+# Drop and recreate the Context collection on startup (otherwise it is only
+# created when missing and migrated in place)
+WEAVIATE_REBUILD = os.getenv("WEAVIATE_REBUILD", "false").lower() == "true"
+
+# Clear stored chunk rows and file manifests when the search index starts out
+# empty, so every document can be re-ingested. Off by default: an index that
+# merely failed to persist must not take Postgres state down with it.
+CHUNK_STATE_RESET = os.getenv("CHUNK_STATE_RESET", "false").lower() == "true"
+
+# Hybrid retrieval: BM25 and vector search run side by side and are merged
+# with reciprocal-rank fusion. Hits below the score / above the distance
+# cutoff are dropped before fusion.
+RETRIEVAL_LIMIT = int(os.getenv("RETRIEVAL_LIMIT", "6"))
+RETRIEVAL_CANDIDATES = int(os.getenv("RETRIEVAL_CANDIDATES", "10"))
+RETRIEVAL_RRF_K = int(os.getenv("RETRIEVAL_RRF_K", "60"))
+RETRIEVAL_BM25_WEIGHT = float(os.getenv("RETRIEVAL_BM25_WEIGHT", "1.0"))
+RETRIEVAL_VECTOR_WEIGHT = float(os.getenv("RETRIEVAL_VECTOR_WEIGHT", "1.0"))
+RETRIEVAL_MIN_BM25_SCORE = float(os.getenv("RETRIEVAL_MIN_BM25_SCORE", "0.4"))
+RETRIEVAL_MAX_DISTANCE = float(os.getenv("RETRIEVAL_MAX_DISTANCE", "0.45"))
+RETRIEVAL_EXPAND_WEAK_QUERIES = os.getenv("RETRIEVAL_EXPAND_WEAK_QUERIES", "false").lower() == "true"
+
+# Optional rerank stage: retrieval over-fetches RERANK_CANDIDATES fused hits,
+# scores them against the question and keeps the best RETRIEVAL_LIMIT.
+# RERANK_MODE is "off", "lexical" (query-term overlap, NumPy) or
+# "cross-encoder" (RERANK_MODEL via sentence-transformers on the CPU).
+# Lexical overlap only adjusts the fused order: it is blended with the
+# normalized fusion score at RERANK_LEXICAL_WEIGHT, so hits found by vector
+# search alone are not pushed out. Scoring that runs past RERANK_BUDGET_MS
+# is abandoned and the fused order is kept.
+RERANK_MODE = os.getenv("RERANK_MODE", "off")
+RERANK_LEXICAL_WEIGHT = float(os.getenv("RERANK_LEXICAL_WEIGHT", "0.3"))
+RERANK_MODEL = os.getenv("RERANK_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", "20"))
+RERANK_BUDGET_MS = float(os.getenv("RERANK_BUDGET_MS", "150"))
+RERANK_BATCH_SIZE = int(os.getenv("RERANK_BATCH_SIZE", "16"))
+
+# Chat history: turns loaded per session and how many sessions keep an
+# in-memory ring buffer of their latest turns
+CHAT_HISTORY_WINDOW = int(os.getenv("CHAT_HISTORY_WINDOW", "50"))
+CHAT_HISTORY_CACHE_SESSIONS = int(os.getenv("CHAT_HISTORY_CACHE_SESSIONS", "1024"))
+
+# Write-behind chat persistence: messages are buffered and flushed with COPY
+# every MESSAGE_FLUSH_INTERVAL seconds or once MESSAGE_FLUSH_SIZE are queued.
+# Past MESSAGE_BUFFER_MAX queued messages (e.g. while Postgres is down) new
+# messages are written directly instead of buffered.
+MESSAGE_WRITE_BEHIND = os.getenv("MESSAGE_WRITE_BEHIND", "true").lower() == "true"
+MESSAGE_FLUSH_INTERVAL = float(os.getenv("MESSAGE_FLUSH_INTERVAL", "0.2"))
+MESSAGE_FLUSH_SIZE = int(os.getenv("MESSAGE_FLUSH_SIZE", "200"))
+MESSAGE_BUFFER_MAX = int(os.getenv("MESSAGE_BUFFER_MAX", "10000"))
+
+# Token budget for the merged retrieval context in the prompt
+CONTEXT_TOKEN_BUDGET = int(os.getenv("CONTEXT_TOKEN_BUDGET", "3000"))
+
+# Whole-prompt budget and the fixed shares for system prompt, retrieved
+# context and conversation history. Unused share flows to history; older
+# turns that do not fit are dropped and noted in a short summary.
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "6000"))
+PROMPT_SYSTEM_SHARE = float(os.getenv("PROMPT_SYSTEM_SHARE", "0.15"))
+PROMPT_CONTEXT_SHARE = float(os.getenv("PROMPT_CONTEXT_SHARE", "0.5"))
+PROMPT_HISTORY_SHARE = float(os.getenv("PROMPT_HISTORY_SHARE", "0.35"))
+PROMPT_SUMMARY_TOKENS = int(os.getenv("PROMPT_SUMMARY_TOKENS", "150"))
+
+# Query expansion cache (in-memory, optionally backed by Postgres)
+EXPANSION_CACHE_SIZE = int(os.getenv("EXPANSION_CACHE_SIZE", "2048"))
+EXPANSION_CACHE_TTL = float(os.getenv("EXPANSION_CACHE_TTL", "86400"))
+EXPANSION_CACHE_PERSIST = os.getenv("EXPANSION_CACHE_PERSIST", "false").lower() == "true"
+# Postgres tier eviction: once every EXPANSION_CACHE_EVICT_EVERY writes,
+# delete up to EXPANSION_CACHE_EVICT_BATCH rows that are past the TTL or
+# beyond EXPANSION_CACHE_MAX_ROWS, oldest first
+EXPANSION_CACHE_MAX_ROWS = int(os.getenv("EXPANSION_CACHE_MAX_ROWS", "100000"))
+EXPANSION_CACHE_EVICT_EVERY = int(os.getenv("EXPANSION_CACHE_EVICT_EVERY", "200"))
+EXPANSION_CACHE_EVICT_BATCH = int(os.getenv("EXPANSION_CACHE_EVICT_BATCH", "1000"))
+
+# Embeddings are computed in the app and handed to Weaviate as vectors.
+# EMBEDDING_BACKEND is "ollama" (EMBEDDING_MODEL via OLLAMA_URL) or
+# "sentence-transformers" (EMBEDDING_LOCAL_MODEL on the CPU, optional
+# dependency). Switching backend or model needs WEAVIATE_REBUILD=true.
+OLLAMA_URL = os.getenv("OLLAMA_URL", "http://ollama:11434")
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "ollama")
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "nomic-embed-text")
+EMBEDDING_LOCAL_MODEL = os.getenv("EMBEDDING_LOCAL_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+EMBEDDING_TIMEOUT = float(os.getenv("EMBEDDING_TIMEOUT", "60"))
+EMBEDDING_QUERY_CACHE_SIZE = int(os.getenv("EMBEDDING_QUERY_CACHE_SIZE", "4096"))
+# Input limit of the embedding model in its own tokens; longer text is
+# truncated by the model. all-MiniLM-L6-v2 reads 256 word pieces and
+# nomic-embed-text runs with a 2048-token context under Ollama.
+EMBEDDING_MAX_TOKENS = int(
+    os.getenv("EMBEDDING_MAX_TOKENS", "256" if EMBEDDING_BACKEND == "sentence-transformers" else "2048")
+)
+
+# Semantic answer cache: reuse a reply when a new question embeds within
+# SEMANTIC_CACHE_MAX_DISTANCE (cosine) of a cached one over the same chunks.
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() == "true"
+SEMANTIC_CACHE_SIZE = int(os.getenv("SEMANTIC_CACHE_SIZE", "1024"))
+SEMANTIC_CACHE_TTL = float(os.getenv("SEMANTIC_CACHE_TTL", "3600"))
+SEMANTIC_CACHE_MAX_DISTANCE = float(os.getenv("SEMANTIC_CACHE_MAX_DISTANCE", "0.05"))
+
 def weaviate_client():
     return weaviate.connect_to_custom(
         http_host=WEAVIATE_HTTP_HOST,
@@ -31,4 +155,3 @@ def weaviate_client():
         grpc_port=WEAVIATE_GRPC_PORT,
         grpc_secure=WEAVIATE_GRPC_SECURE,
     )
-
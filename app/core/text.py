@@ -0,0 +1,12 @@
+import re
+from typing import List
+
+_TOKEN = re.compile(r"\w+")
+
+# lexical field weights for chunk text, matching the Weaviate BM25
+# query_properties (keywords^2); shared by the local index and the reranker
+FIELD_WEIGHTS = (("content", 1.0), ("keywords", 2.0), ("typical_questions", 1.0))
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN.findall(text.lower())
@@ -0,0 +1,17 @@
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("cl100k_base")
+except Exception:  # tiktoken missing or its BPE file cannot be fetched
+    _encoding = None
+
+
+def count_tokens(text: str) -> int:
+    """
+    Token count for budgeting. Uses tiktoken when available; otherwise a
+    ~4 characters per token estimate, which is close for English prose.
+    """
+    if not text:
+        return 0
+    if _encoding is not None:
+        return len(_encoding.encode_ordinary(text))
+    return len(text) // 4 + 1
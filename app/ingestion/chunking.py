@@ -1,10 +1,196 @@
-from typing import List
+import re
+from typing import Callable, List
 
-def chunk_text(text: str, max_chars: int = 1200, overlap: int = 200) -> List[str]:
+from app.core.tokens import count_tokens
+from app.ingestion.config import (
+    CHUNK_MAX_CHARS,
+    CHUNK_MAX_TOKENS,
+    CHUNK_OVERLAP_CHARS,
+    CHUNK_OVERLAP_TOKENS,
+    CHUNK_STRATEGY,
+)
+
+CHUNK_STRATEGIES = {"fixed", "sentence", "token", "heading"}
+
+# sentence ends, or paragraph breaks (blank lines)
+_SENTENCE_BREAK = re.compile(r"([.!?][\"')\]]*)\s+|\n[ \t]*\n\s*")
+_WORD = re.compile(r"\S+\s*")
+
+Span = tuple[int, int]
+
+
+def chunk_text(
+    text: str,
+    max_chars: int = CHUNK_MAX_CHARS,
+    overlap: int = CHUNK_OVERLAP_CHARS,
+    strategy: str = CHUNK_STRATEGY,
+    max_tokens: int = CHUNK_MAX_TOKENS,
+    overlap_tokens: int = CHUNK_OVERLAP_TOKENS,
+    heading: str | None = None,
+) -> List[str]:
+    if strategy not in CHUNK_STRATEGIES:
+        raise ValueError(f"Unknown chunk strategy: {strategy}")
+
+    if strategy == "fixed":
+        return chunk_fixed(text, max_chars, overlap)
+    if strategy == "sentence":
+        return chunk_spans(text, 0, len(text), len_size, max_chars, overlap)
+    if strategy == "token" or not heading:
+        return chunk_spans(text, 0, len(text), count_tokens, max_tokens, overlap_tokens)
+
+    # heading: split the section body, then repeat the heading on every chunk
+    # so each chunk carries its section context into retrieval
+    start = 0
+    if text.startswith(heading):
+        start = len(heading)
+        while start < len(text) and text[start].isspace():
+            start += 1
+    budget = max(1, max_tokens - count_tokens(f"{heading}\n"))
+    return [
+        f"{heading}\n{chunk}"
+        for chunk in chunk_spans(text, start, len(text), count_tokens, budget, overlap_tokens)
+    ]
+
+
+def chunk_fixed(text: str, max_chars: int = 1200, overlap: int = 200) -> List[str]:
     chunks = []
     start = 0
     while start < len(text):
         end = start + max_chars
-        chunks.append(text[start:end])
+        if text[start:end].strip():
+            chunks.append(text[start:end])
         start = max(0, end - overlap)
     return chunks
+
+
+def len_size(piece: str) -> int:
+    return len(piece)
+
+
+def chunk_spans(
+    text: str,
+    start: int,
+    end: int,
+    size: Callable[[str], int],
+    budget: int,
+    overlap: int,
+) -> List[str]:
+    """
+    Single pass over `text[start:end]`: find sentence spans by offset, split
+    any sentence over budget at word boundaries, then pack consecutive spans
+    up to `budget` (measured by `size`, including the whitespace between
+    spans). Each chunk is sliced from the source once; overlap carries
+    trailing whole sentences into the next chunk.
+    """
+    spans: List[Span] = []
+    sizes: List[int] = []
+    by_length = size is len_size
+    for s, e in sentence_spans(text, start, end):
+        # character budgets need no slice at all
+        piece_size = e - s if by_length else size(text[s:e])
+        if piece_size <= budget:
+            spans.append((s, e))
+            sizes.append(piece_size)
+            continue
+        for ws, we in word_groups(text, s, e, size, budget):
+            spans.append((ws, we))
+            sizes.append(size(text[ws:we]))
+
+    # gaps[j]: size of the text between span j - 1 and span j
+    gaps = [0] * len(spans)
+    for j in range(1, len(spans)):
+        gap_start, gap_end = spans[j - 1][1], spans[j][0]
+        gaps[j] = gap_end - gap_start if by_length else size(text[gap_start:gap_end])
+
+    chunks: List[str] = []
+    i, n = 0, len(spans)
+    while i < n:
+        j, total = i + 1, sizes[i]
+        while j < n and total + gaps[j] + sizes[j] <= budget:
+            total += gaps[j] + sizes[j]
+            j += 1
+        chunk = text[spans[i][0]:spans[j - 1][1]]
+        # token counts of the parts are an estimate of the whole; check it
+        while not by_length and j - 1 > i and size(chunk) > budget:
+            j -= 1
+            chunk = text[spans[i][0]:spans[j - 1][1]]
+        chunks.append(chunk)
+        if j >= n:
+            break
+
+        # step back over whole spans for overlap, leaving room for span j so
+        # the next chunk always reaches new text
+        k, carried = j, 0
+        while k - 1 > i:
+            step = sizes[k - 1] + (gaps[k] if k < j else 0)
+            if carried + step > overlap or carried + step + gaps[j] + sizes[j] > budget:
+                break
+            k -= 1
+            carried += step
+        i = k
+    return chunks
+
+
+def sentence_spans(text: str, start: int, end: int) -> List[Span]:
+    spans: List[Span] = []
+    prev = start
+    for match in _SENTENCE_BREAK.finditer(text, start, end):
+        # keep the terminator (and closing quotes) with its sentence
+        sentence_end = match.end(1) if match.group(1) else match.start()
+        if sentence_end > prev and text[prev:sentence_end].strip():
+            spans.append((prev, sentence_end))
+        prev = match.end()
+    if prev < end and text[prev:end].strip():
+        spans.append((prev, _rstrip_end(text, prev, end)))
+    return spans
+
+
+def word_groups(text: str, start: int, end: int, size: Callable[[str], int], budget: int) -> List[Span]:
+    """
+    Splits one oversized sentence into runs of whole words that fit the
+    budget. A single word over budget (a URL, a base64 blob) is cut into
+    pieces of its own.
+    """
+    groups: List[Span] = []
+    group_start, group_size = None, 0
+    for match in _WORD.finditer(text, start, end):
+        word_size = size(match.group())
+        if word_size > budget:
+            if group_start is not None:
+                groups.append((group_start, _rstrip_end(text, group_start, match.start())))
+                group_start, group_size = None, 0
+            word_end = _rstrip_end(text, match.start(), match.end())
+            groups.extend(split_word(text, match.start(), word_end, size, budget))
+            continue
+        if group_start is not None and group_size + word_size > budget:
+            groups.append((group_start, _rstrip_end(text, group_start, match.start())))
+            group_start, group_size = None, 0
+        if group_start is None:
+            group_start = match.start()
+        group_size += word_size
+    if group_start is not None:
+        groups.append((group_start, _rstrip_end(text, group_start, end)))
+    return groups
+
+
+def split_word(text: str, start: int, end: int, size: Callable[[str], int], budget: int) -> List[Span]:
+    """Cuts `text[start:end]` into the longest character runs that fit the budget."""
+    pieces: List[Span] = []
+    while start < end:
+        # largest cut with size(text[start:cut]) <= budget; at least one character
+        lo, hi = start + 1, end
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if size(text[start:mid]) <= budget:
+                lo = mid
+            else:
+                hi = mid - 1
+        pieces.append((start, lo))
+        start = lo
+    return pieces
+
+
+def _rstrip_end(text: str, start: int, end: int) -> int:
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return end
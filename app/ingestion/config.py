@@ -1,7 +1,68 @@
+import os
 from pathlib import Path
 
+from app.core.settings import EMBEDDING_MAX_TOKENS
+
 POPPLER_PATH = r"C:\poppler\poppler-25.12.0\Library\bin"
 TESSERACT_CMD = r"C:\Program Files\Tesseract-OCR\tesseract.exe"
 
 DOCUMENT_DIR = Path("context/documents")
 IMAGE_DIR = Path("context/images")
+
+# Keyword/question enrichment
+ENRICHMENT_CONCURRENCY = int(os.getenv("ENRICHMENT_CONCURRENCY", "4"))
+ENRICHMENT_MAX_RETRIES = int(os.getenv("ENRICHMENT_MAX_RETRIES", "3"))
+ENRICHMENT_RETRY_BACKOFF = float(os.getenv("ENRICHMENT_RETRY_BACKOFF", "1.0"))
+ENRICHMENT_TIMEOUT = float(os.getenv("ENRICHMENT_TIMEOUT", "60"))
+# Pack several pages/rows into one enrichment call up to this many prompt
+# tokens (0 disables batching) and at most this many items per call.
+ENRICHMENT_BATCH_TOKENS = int(os.getenv("ENRICHMENT_BATCH_TOKENS", "2000"))
+ENRICHMENT_BATCH_MAX_ITEMS = int(os.getenv("ENRICHMENT_BATCH_MAX_ITEMS", "40"))
+ENRICHMENT_MODEL = os.getenv("ENRICHMENT_MODEL", "llama3.2")
+# Postgres-backed cache of enrichment results, keyed on text + model + prompt
+# version; least recently used rows beyond ENRICHMENT_CACHE_MAX_ROWS are evicted
+# once every ENRICHMENT_CACHE_EVICT_EVERY written rows, at most
+# ENRICHMENT_CACHE_EVICT_BATCH rows per pass
+ENRICHMENT_CACHE_ENABLED = os.getenv("ENRICHMENT_CACHE_ENABLED", "true").lower() == "true"
+ENRICHMENT_CACHE_MAX_ROWS = int(os.getenv("ENRICHMENT_CACHE_MAX_ROWS", "200000"))
+ENRICHMENT_CACHE_EVICT_EVERY = int(os.getenv("ENRICHMENT_CACHE_EVICT_EVERY", "500"))
+ENRICHMENT_CACHE_EVICT_BATCH = int(os.getenv("ENRICHMENT_CACHE_EVICT_BATCH", "2000"))
+
+# Background ingestion workers. A process claims a job in Postgres before
+# running it and renews the claim while it holds it; a claim not renewed for
+# INGEST_JOB_LEASE seconds (the process died) can be taken by another process.
+INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "2"))
+INGEST_JOB_LEASE = float(os.getenv("INGEST_JOB_LEASE", "120"))
+
+# OCR process pool (0 = one worker per CPU core) and per-task timeout in seconds
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", "0"))
+OCR_TASK_TIMEOUT = float(os.getenv("OCR_TASK_TIMEOUT", "120"))
+
+# Streaming ingest pipeline: pages extracted ahead of enrichment, pages per
+# enrichment window, and chunks per storage flush
+INGEST_PAGE_BUFFER = int(os.getenv("INGEST_PAGE_BUFFER", "32"))
+INGEST_ENRICH_WINDOW = int(os.getenv("INGEST_ENRICH_WINDOW", "16"))
+INGEST_FLUSH_SIZE = int(os.getenv("INGEST_FLUSH_SIZE", "200"))
+PDF_PAGE_WINDOW = int(os.getenv("PDF_PAGE_WINDOW", "8"))
+
+# Chunking: "heading" (token budget + section heading on every chunk),
+# "token", "sentence" (character budget on sentence boundaries) or "fixed"
+# (legacy character windows)
+# Token budgets are counted with tiktoken cl100k (app/core/tokens.py), not
+# the embedder's tokenizer, so CHUNK_MAX_TOKENS is capped with a safety
+# margin against EMBEDDING_MAX_TOKENS: word-piece vocabularies split English
+# into up to ~1.25x as many tokens, and the embedded text also carries the
+# chunk's keywords and questions (CHUNK_ENRICHMENT_TOKENS).
+CHUNK_STRATEGY = os.getenv("CHUNK_STRATEGY", "heading")
+CHUNK_TOKEN_MARGIN = float(os.getenv("CHUNK_TOKEN_MARGIN", "0.8"))
+CHUNK_ENRICHMENT_TOKENS = int(os.getenv("CHUNK_ENRICHMENT_TOKENS", "64"))
+CHUNK_MAX_TOKENS = max(
+    32,
+    min(
+        int(os.getenv("CHUNK_MAX_TOKENS", "384")),
+        int(EMBEDDING_MAX_TOKENS * CHUNK_TOKEN_MARGIN) - CHUNK_ENRICHMENT_TOKENS,
+    ),
+)
+CHUNK_OVERLAP_TOKENS = int(os.getenv("CHUNK_OVERLAP_TOKENS", "48"))
+CHUNK_MAX_CHARS = int(os.getenv("CHUNK_MAX_CHARS", "1200"))
+CHUNK_OVERLAP_CHARS = int(os.getenv("CHUNK_OVERLAP_CHARS", "200"))
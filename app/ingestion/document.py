@@ -1,66 +1,61 @@
-from fastapi import APIRouter, UploadFile, File, HTTPException
-from uuid import uuid4
+import asyncio
+from pathlib import Path
 
-from app.ingestion.llm_helper import generate_keywords_and_questions
-from app.storage.weaviate import save_chunks
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException
+
+from app.ingestion.jobs import JobProgress, check_collection, check_document_id, ingest_jobs
+from app.ingestion.manifest import IngestManifest
 from app.ingestion.file_storage import save_uploaded_file
 from app.ingestion.config import DOCUMENT_DIR
-from app.ingestion.chunking import chunk_text
-from app.ingestion.pdf_parser import parse_pdf
+from app.ingestion.pdf_parser import iter_pdf_pages
+from app.ingestion.pipeline import iter_pages, run_ingest_pipeline
 from app.ingestion.document_extractor import extract_text_data
-from app.services.models import ContextChunk, IngestResponse
+from app.services.models import DEFAULT_COLLECTION, IngestJobResponse, IngestResponse
 
 
 router = APIRouter(prefix="/ingest", tags=["ingest"])
 
 
-@router.post("/document", response_model=IngestResponse)
-async def ingest_document(file: UploadFile = File(...)):
+@router.post("/document", response_model=IngestJobResponse, status_code=202)
+async def ingest_document(
+    file: UploadFile = File(...),
+    collection: str = Form(DEFAULT_COLLECTION),
+    document_id: str | None = Form(None),
+):
+    collection = check_collection(collection)
+    document_id = check_document_id(document_id)
     try:
-        return await process_document(file)
+        file_path = await save_uploaded_file(file, DOCUMENT_DIR)
+        job_id = await ingest_jobs.submit("document", file_path, file.filename, collection, document_id)
     except Exception as ex:
-        print("DOCUMENT INGEST FAILED:", ex)
-        raise HTTPException(status_code=500, detail="Document ingestion failed")
+        print("DOCUMENT UPLOAD FAILED:", ex)
+        raise HTTPException(status_code=500, detail="Document upload failed")
+    return IngestJobResponse(job_id=job_id, status="queued")
 
 
-async def process_document(file: UploadFile) -> IngestResponse:
+async def process_document(file_path: Path, progress: JobProgress) -> IngestResponse:
     source_type = "document"
-
-    file_path = await save_uploaded_file(file, DOCUMENT_DIR)
     ext = file_path.suffix.lower()
 
+    manifest = await IngestManifest.load(
+        source_type, progress.filename, file_path, progress.collection, progress.document_id
+    )
+    if manifest.unchanged:
+        return IngestResponse(chunks_created=0, status=f"{ext} unchanged")
+
     if ext == ".pdf":
-        data = parse_pdf(file_path)
-        data = [{"page": entry["page"], "text": entry["text"], "meta": {"unit": "pdf_page"}} for entry in data]
+        pages = iter_pdf_pages(file_path)
     else:
-        data = extract_text_data(file_path)
+        pages = iter_pages(await asyncio.to_thread(extract_text_data, file_path))
 
-    chunks: list[ContextChunk] = []
-    for idx, page in enumerate(data):
-        print('PAGE ', idx)
-        keywords, typical_questions = await generate_keywords_and_questions(page["text"])
-        print('GENERATED KEYWORDS ', keywords)
-        print('GENERATED TYPICAL QUESTIONS ', typical_questions)
-
-        for chunk in chunk_text(page["text"]):
-            chunks.append(
-                ContextChunk(
-                    source_id=uuid4().__str__(),
-                    source_type=source_type,
-                    content=chunk,
-                    page_number=idx,
-                    keywords=keywords,
-                    typical_questions=typical_questions,
-                )
-            )
-    total_saved = await save_chunks(chunks)
-    try:
-        if file_path.exists():
-            file_path.unlink(missing_ok=True) # cleanup
-    except Exception as ex:
-        print("Cleanup failed:", ex)        
+    total_saved = await run_ingest_pipeline(pages, source_type, progress, manifest=manifest)
+    removed = await manifest.commit()
+    if removed:
+        print("REMOVED STALE CHUNKS ", removed)
     return IngestResponse(
         chunks_created=total_saved,
         status=f"{ext} parsed",
     )
 
+
+ingest_jobs.register("document", process_document)
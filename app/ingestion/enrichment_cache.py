@@ -0,0 +1,106 @@
+import hashlib
+import threading
+from typing import Any, Dict, List
+
+from app.core.cache import register_cache
+from app.ingestion.config import (
+    ENRICHMENT_CACHE_ENABLED,
+    ENRICHMENT_CACHE_EVICT_BATCH,
+    ENRICHMENT_CACHE_EVICT_EVERY,
+    ENRICHMENT_CACHE_MAX_ROWS,
+)
+from app.storage.enrichment_repo import (
+    Enrichment,
+    evict_enrichments,
+    get_enrichments,
+    save_enrichments,
+)
+
+
+def enrichment_key(text: str, model: str, prompt_version: str) -> str:
+    digest = hashlib.sha256()
+    for part in (model, prompt_version, text):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class EnrichmentCache:
+    """
+    Persistent cache of keyword/question results in the `enrichment_cache`
+    table. Lookups and writes are batched per call; database errors are
+    logged and treated as misses so ingest never fails on the cache.
+    Eviction runs once every `evict_every` written rows rather than on
+    every write, deleting at most `evict_batch` rows per pass.
+    """
+
+    def __init__(self, enabled: bool, max_rows: int, evict_every: int, evict_batch: int):
+        self.enabled = enabled
+        self.max_rows = max_rows
+        self.evict_every = max(1, evict_every)
+        self.evict_batch = max(1, evict_batch)
+        self._unevicted = 0
+        self.hits = 0
+        self.misses = 0
+        self.evicted = 0
+        self._lock = threading.Lock()
+        register_cache("enrichment", self)
+
+    async def get_many(self, keys: List[str]) -> Dict[str, Enrichment]:
+        if not self.enabled or not keys:
+            return {}
+        try:
+            found = await get_enrichments(list(set(keys)))
+        except Exception as ex:
+            print("Enrichment cache read failed:", ex)
+            found = {}
+        hits = sum(1 for key in keys if key in found)
+        with self._lock:
+            self.hits += hits
+            self.misses += len(keys) - hits
+        return found
+
+    async def put_many(self, entries: Dict[str, Enrichment]) -> None:
+        # empty results are usually failed or unparsable calls; retry those next time
+        entries = {key: value for key, value in entries.items() if value[0] or value[1]}
+        if not self.enabled or not entries:
+            return
+        try:
+            await save_enrichments(entries)
+        except Exception as ex:
+            print("Enrichment cache write failed:", ex)
+            return
+
+        with self._lock:
+            self._unevicted += len(entries)
+            due = self._unevicted >= self.evict_every
+            if due:
+                self._unevicted = 0
+        if not due:
+            return
+        try:
+            evicted = await evict_enrichments(self.max_rows, self.evict_batch)
+        except Exception as ex:
+            print("Enrichment cache eviction failed:", ex)
+            return
+        with self._lock:
+            self.evicted += evicted
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "maxsize": self.max_rows,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evicted": self.evicted,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+enrichment_cache = EnrichmentCache(
+    ENRICHMENT_CACHE_ENABLED,
+    ENRICHMENT_CACHE_MAX_ROWS,
+    ENRICHMENT_CACHE_EVICT_EVERY,
+    ENRICHMENT_CACHE_EVICT_BATCH,
+)
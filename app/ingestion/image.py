@@ -1,64 +1,94 @@
 from pathlib import Path
-from fastapi import APIRouter, UploadFile, File
-from uuid import uuid4
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException
 
 from app.ingestion.chunking import chunk_text
 from app.ingestion.config import IMAGE_DIR
 from app.ingestion.file_storage import save_uploaded_file
+from app.ingestion.jobs import JobProgress, check_collection, check_document_id, ingest_jobs
+from app.ingestion.manifest import IngestManifest, chunk_id, content_hash
+from app.ingestion.ocr_executor import run_ocr
 from app.ingestion.ocr_helper import infer_ocr
-from app.storage.weaviate import save_chunks
+from app.ingestion.pipeline import drop_known_chunks
+from app.storage.chunk_store import save_chunks
 
-from app.services.models import ContextChunk, IngestResponse
+from app.services.models import DEFAULT_COLLECTION, ContextChunk, IngestJobResponse, IngestResponse
 
 router = APIRouter(prefix="/ingest", tags=["ingest"])
 
 
-@router.post("/image", response_model=IngestResponse)
-async def ingest_image(file: UploadFile = File(...)):
-    return await process_image(file)
+@router.post("/image", response_model=IngestJobResponse, status_code=202)
+async def ingest_image(
+    file: UploadFile = File(...),
+    collection: str = Form(DEFAULT_COLLECTION),
+    document_id: str | None = Form(None),
+):
+    collection = check_collection(collection)
+    document_id = check_document_id(document_id)
+    try:
+        file_path = await save_uploaded_file(file, IMAGE_DIR)
+        job_id = await ingest_jobs.submit("image", file_path, file.filename, collection, document_id)
+    except Exception as ex:
+        print("IMAGE UPLOAD FAILED:", ex)
+        raise HTTPException(status_code=500, detail="Image upload failed")
+    return IngestJobResponse(job_id=job_id, status="queued")
 
 
-async def process_image(file: UploadFile) -> IngestResponse:
+async def process_image(file_path: Path, progress: JobProgress) -> IngestResponse:
     source_type = "image"
 
-    file_path: Path | None = None
-    try:
-        # Save image
-        file_path = await save_uploaded_file(file, IMAGE_DIR)
+    manifest = await IngestManifest.load(
+        source_type, progress.filename, file_path, progress.collection, progress.document_id
+    )
+    if manifest.unchanged:
+        return IngestResponse(chunks_created=0, status="image unchanged")
 
-        # OCR image → text
-        text = infer_ocr(file_path)
+    # OCR image → text
+    await progress.stage("ocr")
+    text = await run_ocr(infer_ocr, file_path)
 
-        if not text or len(text.strip()) < 30:
-            return IngestResponse(
-                chunks_created=0,
-                status="image ignored (no meaningful text)",
-            )
+    if not text or len(text.strip()) < 30:
+        return IngestResponse(
+            chunks_created=0,
+            status="image ignored (no meaningful text)",
+        )
+    await progress.add(pages_parsed=1)
 
-        # Chunk OCR text
-        chunks: list[ContextChunk] = []
-        for chunk in chunk_text(text):
-            if len(chunk.strip()) < 30:
-                continue
-
-            chunks.append(
-                ContextChunk(
-                    content=chunk,
-                    source='image',
-                    page=None,
-                    start_time_sec=None,
-                    end_time_sec=None,
-                )
-            )
+    # same text as last time (e.g. a re-encoded image): nothing to store
+    page_hash = content_hash(text)
+    if manifest.reuse_page(0, page_hash):
+        await progress.add(pages_skipped=1)
+        await manifest.commit()
+        return IngestResponse(chunks_created=0, status="image unchanged")
 
-        saved = await save_chunks(source_type, chunks)
+    # Chunk OCR text
+    chunks: list[ContextChunk] = []
+    for chunk in chunk_text(text):
+        if len(chunk.strip()) < 30:
+            continue
 
-        return IngestResponse(
-            chunks_created=saved,
-            status="image parsed",
+        chunks.append(
+            ContextChunk(
+                source_id=chunk_id(chunk, progress.collection),
+                source_type=source_type,
+                content=chunk,
+                collection=progress.collection,
+            )
         )
 
-    finally:
-        # Cleanup
-        if file_path and file_path.exists():
-            file_path.unlink(missing_ok=True)
+    manifest.record_page(0, page_hash, [chunk.source_id for chunk in chunks])
+    new_chunks = await drop_known_chunks(chunks, set())
+    if len(new_chunks) < len(chunks):
+        await progress.add(chunks_skipped=len(chunks) - len(new_chunks))
+
+    await progress.stage("storing")
+    saved = await save_chunks(new_chunks)
+    await progress.add(chunks_stored=saved)
+    await manifest.commit()
+
+    return IngestResponse(
+        chunks_created=saved,
+        status="image parsed",
+    )
+
+
+ingest_jobs.register("image", process_image)
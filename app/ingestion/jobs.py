@@ -0,0 +1,202 @@
+import asyncio
+import os
+import re
+import socket
+from pathlib import Path
+from typing import Awaitable, Callable, Dict
+from uuid import UUID, uuid4
+
+from fastapi import APIRouter, HTTPException
+
+from app.ingestion.config import INGEST_JOB_LEASE, INGEST_WORKERS
+from app.services.models import DEFAULT_COLLECTION, IngestJobStatus, IngestResponse
+from app.storage.job_repo import (
+    claim_jobs,
+    create_job,
+    get_job,
+    increment_job,
+    release_claims,
+    renew_claims,
+    update_job,
+)
+
+router = APIRouter(prefix="/ingest", tags=["ingest"])
+
+_COLLECTION_NAME = re.compile(r"[A-Za-z0-9_.-]{1,64}")
+_DOCUMENT_ID = re.compile(r"[A-Za-z0-9_.:/-]{1,256}")
+
+
+def check_collection(name: str) -> str:
+    """Validates a collection name from an upload form; 400 if it is not a short slug."""
+    if not _COLLECTION_NAME.fullmatch(name):
+        raise HTTPException(status_code=400, detail="collection must be 1-64 letters, digits, '.', '_' or '-'")
+    return name
+
+
+def check_document_id(document_id: str | None) -> str | None:
+    """Validates the optional document ID from an upload form; blank means none."""
+    if document_id is None or not document_id.strip():
+        return None
+    document_id = document_id.strip()
+    if not _DOCUMENT_ID.fullmatch(document_id):
+        raise HTTPException(status_code=400, detail="document_id must be 1-256 letters, digits, '.', '_', ':', '/' or '-'")
+    return document_id
+
+
+class JobProgress:
+    """Handed to ingest handlers so they can report stage and counters."""
+
+    def __init__(
+        self,
+        job_id: UUID | None = None,
+        filename: str | None = None,
+        collection: str = DEFAULT_COLLECTION,
+        document_id: str | None = None,
+    ):
+        self.job_id = job_id
+        self.filename = filename
+        self.collection = collection
+        self.document_id = document_id
+
+    async def stage(self, name: str) -> None:
+        if self.job_id is not None:
+            await update_job(self.job_id, stage=name)
+
+    async def add(self, **deltas: int) -> None:
+        if self.job_id is not None:
+            await increment_job(self.job_id, **deltas)
+
+
+JobHandler = Callable[[Path, JobProgress], Awaitable[IngestResponse]]
+
+
+class IngestJobQueue:
+    """
+    Runs uploaded files through their ingest handler on a fixed pool of
+    async workers. Job state lives in Postgres, so jobs that were queued or
+    mid-flight when the app stopped are picked up again on the next start.
+    Several processes can share the table: each job is claimed atomically
+    before it runs, claims are renewed every third of `lease`, and jobs
+    whose claim lapsed (or that were left queued by a process that died)
+    are swept up by the others.
+    """
+
+    def __init__(self, workers: int, lease: float = INGEST_JOB_LEASE):
+        self.workers = workers
+        self.lease = lease
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._tasks: list[asyncio.Task] = []
+        self._handlers: Dict[str, JobHandler] = {}
+
+    def register(self, kind: str, handler: JobHandler) -> None:
+        self._handlers[kind] = handler
+
+    async def start(self) -> None:
+        self._resume(await claim_jobs(self.worker_id, self.lease))
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._keep_claims()))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        # interrupted jobs go back to 'queued' and resume on the next start
+        try:
+            await release_claims(self.worker_id)
+        except Exception as ex:
+            print("[WARN] Could not release ingest job claims:", ex)
+
+    def _resume(self, jobs) -> None:
+        for job in jobs:
+            print("Resuming ingest job", job["id"])
+            self._queue.put_nowait(
+                (job["id"], job["kind"], job["filename"], job["collection"], job["document_id"], job["file_path"])
+            )
+
+    async def _keep_claims(self) -> None:
+        while True:
+            await asyncio.sleep(self.lease / 3)
+            try:
+                await renew_claims(self.worker_id)
+                # jobs of processes that died: lapsed claims, and uploads
+                # queued for a full lease without being picked up
+                self._resume(await claim_jobs(self.worker_id, self.lease, min_queued_age=self.lease))
+            except Exception as ex:
+                print("[WARN] Ingest job claim renewal failed:", ex)
+
+    async def submit(
+        self,
+        kind: str,
+        file_path: Path,
+        filename: str | None,
+        collection: str = DEFAULT_COLLECTION,
+        document_id: str | None = None,
+    ) -> UUID:
+        if kind not in self._handlers:
+            raise ValueError(f"No ingest handler for {kind}")
+        job_id = uuid4()
+        await create_job(job_id, kind, filename, str(file_path), collection, document_id)
+        self._queue.put_nowait((job_id, kind, filename, collection, document_id, str(file_path)))
+        return job_id
+
+    async def _worker(self) -> None:
+        while True:
+            job_id, kind, filename, collection, document_id, file_path = await self._queue.get()
+            try:
+                await self._run(job_id, kind, JobProgress(job_id, filename, collection, document_id), Path(file_path))
+            except asyncio.CancelledError:
+                raise
+            except Exception as ex:
+                # keep the worker alive if bookkeeping itself fails
+                print("INGEST WORKER ERROR:", job_id, ex)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: UUID, kind: str, progress: JobProgress, file_path: Path) -> None:
+        if not await claim_jobs(self.worker_id, self.lease, job_id=job_id):
+            print("Ingest job claimed by another process:", job_id)
+            return
+        await update_job(
+            job_id,
+            status="running",
+            stage="parsing",
+            pages_parsed=0,
+            chunks_enriched=0,
+            chunks_stored=0,
+            pages_skipped=0,
+            chunks_skipped=0,
+            error=None,
+        )
+        try:
+            result = await self._handlers[kind](file_path, progress)
+        except asyncio.CancelledError:
+            raise
+        except Exception as ex:
+            print("INGEST JOB FAILED:", job_id, ex)
+            await update_job(job_id, status="failed", stage="failed", error=str(ex))
+            remove_upload(file_path)
+            return
+
+        await update_job(job_id, status="completed", stage="done", result=result.status)
+        remove_upload(file_path)
+
+
+def remove_upload(file_path: Path) -> None:
+    try:
+        if file_path.exists():
+            file_path.unlink(missing_ok=True) # cleanup
+    except Exception as ex:
+        print("Cleanup failed:", ex)
+
+
+ingest_jobs = IngestJobQueue(workers=INGEST_WORKERS)
+
+
+@router.get("/jobs/{job_id}", response_model=IngestJobStatus)
+async def get_ingest_job(job_id: UUID):
+    job = await get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return IngestJobStatus(job_id=job.pop("id"), **{k: v for k, v in job.items() if k != "file_path"})
@@ -1,8 +1,179 @@
+import asyncio
+import random
 import httpx
 from typing import Tuple, List
 import json
 import re
 
+from app.core.settings import OLLAMA_URL
+from app.core.tokens import count_tokens
+from app.ingestion.config import (
+    ENRICHMENT_BATCH_MAX_ITEMS,
+    ENRICHMENT_BATCH_TOKENS,
+    ENRICHMENT_CONCURRENCY,
+    ENRICHMENT_MAX_RETRIES,
+    ENRICHMENT_MODEL,
+    ENRICHMENT_RETRY_BACKOFF,
+    ENRICHMENT_TIMEOUT,
+)
+from app.ingestion.enrichment_cache import enrichment_cache, enrichment_key
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+# bump when the enrichment prompts change so cached results are not reused
+PROMPT_VERSION = "1"
+
+_http_client: httpx.AsyncClient | None = None
+
+def get_http_client() -> httpx.AsyncClient:
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            timeout=ENRICHMENT_TIMEOUT,
+            limits=httpx.Limits(max_connections=ENRICHMENT_CONCURRENCY * 2),
+        )
+    return _http_client
+
+async def close_http_client() -> None:
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+BATCH_RESPONSE_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "items": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "id": {"type": "integer"},
+                    "keywords": {"type": "array", "items": {"type": "string"}},
+                    "questions": {"type": "array", "items": {"type": "string"}},
+                },
+                "required": ["id", "keywords", "questions"],
+            },
+        },
+    },
+    "required": ["items"],
+}
+
+
+async def enrich_pages(texts: List[str], concurrency: int = ENRICHMENT_CONCURRENCY) -> List[Tuple[List[str], List[str]]]:
+    """
+    Runs keyword/question generation for many pages at once; results keep
+    input order. Texts already in the enrichment cache (or repeated within
+    `texts`) are not sent to the LLM.
+    """
+    keys = [enrichment_key(text, ENRICHMENT_MODEL, PROMPT_VERSION) for text in texts]
+    known = await enrichment_cache.get_many(keys)
+    # one LLM item per distinct uncached text
+    misses: List[int] = []
+    queued: set[str] = set()
+    for idx, key in enumerate(keys):
+        if key not in known and key not in queued:
+            queued.add(key)
+            misses.append(idx)
+    miss_texts = [texts[idx] for idx in misses]
+
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    batches = pack_batches(miss_texts, ENRICHMENT_BATCH_TOKENS, ENRICHMENT_BATCH_MAX_ITEMS)
+
+    async def enrich(batch: List[int]):
+        async with semaphore:
+            print('ENRICHING PAGES ', misses[batch[0]], '-', misses[batch[-1]])
+            if len(batch) == 1:
+                return [await generate_keywords_and_questions(miss_texts[batch[0]])]
+            return await generate_keywords_and_questions_batch([miss_texts[i] for i in batch])
+
+    results = await asyncio.gather(*(enrich(batch) for batch in batches))
+    fresh = {keys[misses[i]]: item for i, item in enumerate(item for batch in results for item in batch)}
+    await enrichment_cache.put_many(fresh)
+
+    known.update(fresh)
+    return [known[key] for key in keys]
+
+
+def pack_batches(texts: List[str], token_budget: int, max_items: int) -> List[List[int]]:
+    """Greedily groups consecutive text indexes so each group fits the token budget."""
+    if token_budget <= 0 or max_items <= 1:
+        return [[i] for i in range(len(texts))]
+
+    batches: List[List[int]] = []
+    current: List[int] = []
+    used = 0
+    for idx, text in enumerate(texts):
+        cost = count_tokens(text)
+        if current and (used + cost > token_budget or len(current) >= max_items):
+            batches.append(current)
+            current, used = [], 0
+        current.append(idx)
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+async def generate_keywords_and_questions_batch(texts: List[str]) -> List[Tuple[List[str], List[str]]]:
+    items = [{"id": idx, "text": text} for idx, text in enumerate(texts)]
+    prompt = f"""
+Return ONLY valid JSON.
+
+For EACH item below generate keywords and typical questions a user might ask
+that the item's text answers. Return one result per item id.
+
+Format:
+{{
+  "items": [
+    {{"id": 0, "keywords": ["string"], "questions": ["string"]}}
+  ]
+}}
+
+Rules:
+- No markdown
+- No explanation
+- No trailing text
+- Every input id must appear exactly once
+
+Items:
+{json.dumps(items, ensure_ascii=False)}
+"""
+
+    results: dict[int, Tuple[List[str], List[str]]] = {}
+    try:
+        data = await post_chat_completion({
+            "model": ENRICHMENT_MODEL,
+            "messages": [
+                {"role": "system", "content": "You are a strict JSON generator."},
+                {"role": "user", "content": prompt},
+            ],
+            "temperature": 0.2,
+            "max_tokens": 100 + 150 * len(texts),
+            "stream": False,
+            "response_format": {
+                "type": "json_schema",
+                "json_schema": {"name": "enrichment_batch", "schema": BATCH_RESPONSE_SCHEMA},
+            },
+        })
+        raw = (data.get("choices", [{}])[0].get("message", {}) or {}).get("content", "") or ""
+        parsed = extract_json_object(raw) or {}
+        for entry in parsed.get("items", []) if isinstance(parsed.get("items"), list) else []:
+            if isinstance(entry, dict) and isinstance(entry.get("id"), int) and 0 <= entry["id"] < len(texts):
+                results[entry["id"]] = validate_llm_payload(entry)
+    except httpx.HTTPError as ex:
+        print("Batched keyword generation failed:", ex)
+
+    missing = [idx for idx in range(len(texts)) if idx not in results]
+    if missing:
+        # fall back to one call per item the batch did not cover; sequential
+        # so the caller's concurrency slot still means one request in flight
+        print(f"[WARN] Batch response missing {len(missing)}/{len(texts)} items - falling back ...")
+        for idx in missing:
+            results[idx] = await generate_keywords_and_questions(texts[idx])
+
+    return [results[idx] for idx in range(len(texts))]
+
 
 async def generate_keywords_and_questions(text: str) -> Tuple[List[str], List[str]]:
     prompt = f"""
@@ -23,22 +194,20 @@ Text:
 {text}
 """
 
-    async with httpx.AsyncClient(timeout=60) as client:
-        res = await client.post(
-            "http://ollama:11434/v1/chat/completions",
-            json={
-                "model": "llama3.2",
-                "messages": [
-                    {"role": "system", "content": "You are a strict JSON generator."},
-                    {"role": "user", "content": prompt},
-                ],
-                "temperature": 0.2,
-                "max_tokens": 300,
-                "stream": False,
-            },
-        )
-        res.raise_for_status()
-        data = res.json()
+    try:
+        data = await post_chat_completion({
+            "model": ENRICHMENT_MODEL,
+            "messages": [
+                {"role": "system", "content": "You are a strict JSON generator."},
+                {"role": "user", "content": prompt},
+            ],
+            "temperature": 0.2,
+            "max_tokens": 300,
+            "stream": False,
+        })
+    except httpx.HTTPError as ex:
+        print("Keyword generation failed:", ex)
+        return [], []
 
     raw = (data.get("choices", [{}])[0].get("message", {}) or {}).get("content", "") or ""
     parsed = extract_json_object(raw)
@@ -49,6 +218,27 @@ Text:
     return validate_llm_payload(parsed)
 
 
+async def post_chat_completion(payload: dict) -> dict:
+    client = get_http_client()
+    for attempt in range(ENRICHMENT_MAX_RETRIES + 1):
+        try:
+            res = await client.post(f"{OLLAMA_URL}/v1/chat/completions", json=payload)
+            if res.status_code not in RETRYABLE_STATUS:
+                res.raise_for_status()
+                return res.json()
+            error: Exception = httpx.HTTPStatusError(
+                f"Ollama returned {res.status_code}", request=res.request, response=res
+            )
+        except httpx.TransportError as ex:
+            error = ex
+
+        if attempt == ENRICHMENT_MAX_RETRIES:
+            raise error
+        delay = ENRICHMENT_RETRY_BACKOFF * (2 ** attempt) * (0.5 + random.random())
+        print(f"[WARN] Ollama call failed ({error}) - retrying in {delay:.1f}s ...")
+        await asyncio.sleep(delay)
+
+
 def extract_json_object(text: str) -> dict | None:
     match = re.search(r"\{[\s\S]*\}", text)  # remove noise in json response
     if not match:
@@ -0,0 +1,133 @@
+import asyncio
+import hashlib
+import re
+from pathlib import Path
+from typing import List
+from uuid import UUID, uuid5
+
+from app.services.models import DEFAULT_COLLECTION
+from app.storage.chunk_store import delete_chunks
+from app.storage.manifest_repo import (
+    ManifestPages,
+    get_manifest,
+    save_manifest,
+    unreferenced_chunk_ids,
+)
+
+# fixed namespace so the same chunk text always maps to the same ID
+CHUNK_NAMESPACE = UUID("6f1c7c52-3d0e-4b8a-9a57-2f4e0c1d9b61")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_content(text: str) -> str:
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(normalize_content(text).encode("utf-8")).hexdigest()
+
+
+def chunk_id(text: str, collection: str = DEFAULT_COLLECTION) -> str:
+    """
+    Content-addressed chunk ID: a UUIDv5 of the normalized chunk text,
+    scoped to the collection so the same text can live in several.
+    """
+    name = normalize_content(text)
+    if collection != DEFAULT_COLLECTION:
+        name = f"{collection}\n{name}"
+    return str(uuid5(CHUNK_NAMESPACE, name))
+
+
+def file_sha256(file_path: Path, block_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class IngestManifest:
+    """
+    What one uploaded file produced the last time it was ingested: a hash of
+    the file bytes and, per page, a hash of the page text plus the chunk IDs
+    it was split into. Files are keyed on the client's document ID when the
+    upload names one, otherwise on the file hash, within their collection.
+    Only an upload with a document ID replaces an earlier version, so only
+    then are chunks the old version produced deleted.
+    """
+
+    def __init__(
+        self,
+        source_type: str,
+        file_key: str,
+        file_hash: str,
+        previous: tuple[str, ManifestPages] | None,
+        collection: str = DEFAULT_COLLECTION,
+        filename: str | None = None,
+        replaces: bool = False,
+    ):
+        self.source_type = source_type
+        self.file_key = file_key
+        self.file_hash = file_hash
+        self.collection = collection
+        self.filename = filename
+        self.replaces = replaces
+        self.previous_hash, self.previous_pages = previous or (None, {})
+        self.pages: ManifestPages = {}
+
+    @classmethod
+    async def load(
+        cls,
+        source_type: str,
+        filename: str | None,
+        file_path: Path,
+        collection: str = DEFAULT_COLLECTION,
+        document_id: str | None = None,
+    ) -> "IngestManifest":
+        file_hash = await asyncio.to_thread(file_sha256, file_path)
+        # filenames are not unique across uploaders, so they never key a manifest
+        file_key = document_id or file_hash
+        if collection != DEFAULT_COLLECTION:
+            file_key = f"{collection}/{file_key}"
+        previous = await get_manifest(source_type, file_key)
+        return cls(source_type, file_key, file_hash, previous, collection, filename, document_id is not None)
+
+    @property
+    def unchanged(self) -> bool:
+        return self.previous_hash == self.file_hash
+
+    def reuse_page(self, page_number: int, page_hash: str) -> bool:
+        """Keeps the previous entry for an unchanged page; False if it needs processing."""
+        previous = self.previous_pages.get(page_number)
+        if previous is None or previous[0] != page_hash:
+            return False
+        self.pages[page_number] = previous
+        return True
+
+    def record_page(self, page_number: int, page_hash: str, chunk_ids: List[str]) -> None:
+        self.pages[page_number] = (page_hash, list(dict.fromkeys(chunk_ids)))
+
+    def stale_chunk_ids(self) -> List[str]:
+        if not self.replaces:
+            return []
+        current = {cid for _, ids in self.pages.values() for cid in ids}
+        previous = {cid for _, ids in self.previous_pages.values() for cid in ids}
+        return sorted(previous - current)
+
+    async def commit(self) -> int:
+        """
+        Saves this run's pages as the new manifest, then, when it replaces a
+        document, deletes chunks the previous version produced that no
+        manifest references any more.
+        Returns the number of chunks deleted.
+        """
+        await save_manifest(
+            self.source_type,
+            self.file_key,
+            self.file_hash,
+            self.pages,
+            self.collection,
+            self.filename,
+        )
+        stale = await unreferenced_chunk_ids(self.stale_chunk_ids())
+        return await delete_chunks(stale)
@@ -0,0 +1,35 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from app.ingestion.config import OCR_TASK_TIMEOUT, OCR_WORKERS
+
+_executor: ProcessPoolExecutor | None = None
+
+def init_ocr_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        # spawn, not fork: the parent already holds gRPC channels and pool threads
+        _executor = ProcessPoolExecutor(
+            max_workers=OCR_WORKERS or os.cpu_count() or 1,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _executor
+
+def close_ocr_executor() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+async def run_ocr(fn, *args, timeout: float = OCR_TASK_TIMEOUT, **kwargs):
+    """
+    Runs CPU-bound OCR work (OpenCV + Tesseract) in the process pool so the
+    event loop stays responsive. Raises asyncio.TimeoutError past `timeout`.
+    """
+    executor = init_ocr_executor()
+    loop = asyncio.get_running_loop()
+    future = loop.run_in_executor(executor, partial(fn, *args, **kwargs))
+    return await asyncio.wait_for(future, timeout)
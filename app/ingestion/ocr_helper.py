@@ -6,19 +6,22 @@ import re
 import numpy as np
 from PIL import Image
 import pytesseract
-from app.ingestion.config import POPPLER_PATH, TESSERACT_CMD
+from app.ingestion.config import OCR_TASK_TIMEOUT, POPPLER_PATH, TESSERACT_CMD
 pytesseract.pytesseract.tesseract_cmd = TESSERACT_CMD
 
 
 def infer_ocr(file_path: Path, *, page_num: int | None = None) -> str:
+    """OCRs an image, or a single 1-based page of a PDF when `page_num` is set."""
     print("[infer_ocr]", file_path, "ext=", file_path.suffix.lower(), "page_num=", page_num)
 
     if page_num is not None:
         result = ocr_pdf_page(file_path, page_num)
-    result = ocr_image(file_path)
+    else:
+        result = ocr_image(file_path)
 
     if determine_ocr_feasibility(result):
         return result
+    return ""
 
 
 def ocr_pdf_page(file_path: Path, page_num: int) -> str:
@@ -26,8 +29,9 @@ def ocr_pdf_page(file_path: Path, page_num: int) -> str:
         str(file_path), first_page=page_num, last_page=page_num, poppler_path=POPPLER_PATH)
     if not images:
         return ""
+    # tesseract is killed past the timeout so a stuck page frees its worker
     ocr_result = pytesseract.image_to_string(
-        images[0], lang="eng", config="--psm 6")
+        images[0], lang="eng", config="--psm 6", timeout=OCR_TASK_TIMEOUT)
     print(ocr_result)
     normalised_text = normalize_ocr_text(ocr_result)    
     return normalised_text
@@ -38,7 +42,8 @@ def ocr_image(file_path: Path) -> str:
         return ""
     with Image.open(file_path) as img:
         processed = preprocess_for_ocr(img)
-        ocr_result = pytesseract.image_to_string(processed, lang="eng", config="--oem 3 --psm 4")
+        ocr_result = pytesseract.image_to_string(
+            processed, lang="eng", config="--oem 3 --psm 4", timeout=OCR_TASK_TIMEOUT)
         normalised_text = normalize_ocr_text(ocr_result)
     return normalised_text
 
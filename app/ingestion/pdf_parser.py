@@ -1,7 +1,11 @@
+import asyncio
+from collections import deque
 from pathlib import Path
-from typing import List
+from typing import AsyncIterator, List
 from pypdf import PdfReader
 
+from app.ingestion.config import PDF_PAGE_WINDOW
+from app.ingestion.ocr_executor import run_ocr
 from app.ingestion.ocr_helper import infer_ocr
 
 def needs_ocr(text: str) -> bool:
@@ -9,31 +13,61 @@ def needs_ocr(text: str) -> bool:
 
 def normalize_text(text: str) -> str:
     return text.replace("\x00", "").replace("\u200b", "").strip()
-    
-def parse_pdf(file_path: Path) -> List[dict]:
-    reader = PdfReader(str(file_path))
-    pages = []
 
-    for idx, page in enumerate(reader.pages):
-        text = page.extract_text(extraction_mode="layout") or ""
+def extract_page_text(reader: PdfReader, idx: int) -> str:
+    page = reader.pages[idx]
+    text = page.extract_text(extraction_mode="layout") or ""
 
-        if not text.strip():
-            print(f"[INFO] PAGE {idx + 1} IS BLANK - IGNORING ...")
-            continue
+    if not text.strip():
+        text = page.extract_text() or ""
+    return text
 
-        if not text.strip():
-            text = page.extract_text() or ""
+async def load_page(reader: PdfReader, lock: asyncio.Lock, file_path: Path, idx: int) -> dict | None:
+    # pypdf readers are not thread-safe, so extraction is serialised per file
+    async with lock:
+        text = await asyncio.to_thread(extract_page_text, reader, idx)
 
-        if needs_ocr(text):
-            print('[INFO] PAGE REQUIRES OCR ...')
-            text = infer_ocr(file_path, page_num=idx)
+    if needs_ocr(text):
+        print(f'[INFO] PAGE {idx + 1} REQUIRES OCR ...')
+        try:
+            ocr_text = await run_ocr(infer_ocr, file_path, page_num=idx + 1)
+        except Exception as ex:
+            print(f"[WARN] OCR FAILED FOR PAGE {idx + 1}:", repr(ex))
+            ocr_text = ""
+        # short pages (titles, one-liners) keep their extracted text when OCR finds nothing
+        if ocr_text and ocr_text.strip():
+            text = ocr_text
 
-        text = normalize_text(text)        
-        if text:
-            pages.append({
-                "page": idx + 1,
-                "text": text
-            })
+    text = normalize_text(text or "")
+    if not text:
+        print(f"[INFO] PAGE {idx + 1} IS BLANK - IGNORING ...")
+        return None
+    return {"page": idx + 1, "text": text}
 
-    return pages
+async def iter_pdf_pages(file_path: Path, window: int = PDF_PAGE_WINDOW) -> AsyncIterator[dict]:
+    """
+    Yields pages in order as soon as they are extracted. Up to `window`
+    pages are in flight at once, so scanned pages still OCR in parallel
+    while memory stays bounded regardless of document size.
+    """
+    reader = await asyncio.to_thread(PdfReader, str(file_path))
+    lock = asyncio.Lock()
+    pending: deque[asyncio.Task] = deque()
 
+    try:
+        for idx in range(len(reader.pages)):
+            pending.append(asyncio.create_task(load_page(reader, lock, file_path, idx)))
+            if len(pending) >= max(1, window):
+                page = await pending.popleft()
+                if page:
+                    yield page
+        while pending:
+            page = await pending.popleft()
+            if page:
+                yield page
+    finally:
+        for task in pending:
+            task.cancel()
+
+async def parse_pdf(file_path: Path) -> List[dict]:
+    return [page async for page in iter_pdf_pages(file_path)]
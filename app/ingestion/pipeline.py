@@ -0,0 +1,156 @@
+import asyncio
+from typing import AsyncIterator, Iterable, List
+
+from app.ingestion.chunking import chunk_text
+from app.ingestion.config import INGEST_ENRICH_WINDOW, INGEST_FLUSH_SIZE, INGEST_PAGE_BUFFER
+from app.ingestion.jobs import JobProgress
+from app.ingestion.llm_helper import enrich_pages
+from app.ingestion.manifest import IngestManifest, chunk_id, content_hash
+from app.services.models import DEFAULT_COLLECTION, ContextChunk
+from app.storage.db_helper import existing_chunk_ids
+from app.storage.chunk_store import save_chunks
+
+_DONE = object()
+
+
+async def iter_pages(pages: Iterable[dict]) -> AsyncIterator[dict]:
+    for page in pages:
+        yield page
+
+
+def build_page_chunks(
+    page: dict,
+    page_number: int,
+    source_type: str,
+    keywords: List[str],
+    typical_questions: List[str],
+    collection: str = DEFAULT_COLLECTION,
+) -> List[ContextChunk]:
+    return [
+        ContextChunk(
+            source_id=chunk_id(chunk, collection),
+            source_type=source_type,
+            content=chunk,
+            page_number=page_number,
+            keywords=keywords,
+            typical_questions=typical_questions,
+            collection=collection,
+        )
+        for chunk in chunk_text(page["text"], heading=(page.get("meta") or {}).get("heading"))
+    ]
+
+
+async def drop_known_chunks(chunks: List[ContextChunk], seen: set[str]) -> List[ContextChunk]:
+    """Drops chunks already queued in this run (`seen`) or already stored under the same content ID."""
+    fresh: List[ContextChunk] = []
+    for chunk in chunks:
+        if chunk.source_id not in seen:
+            seen.add(chunk.source_id)
+            fresh.append(chunk)
+    existing = await existing_chunk_ids([chunk.source_id for chunk in fresh])
+    return [chunk for chunk in fresh if chunk.source_id not in existing]
+
+
+async def run_ingest_pipeline(
+    pages: AsyncIterator[dict],
+    source_type: str,
+    progress: JobProgress,
+    enrich_window: int = INGEST_ENRICH_WINDOW,
+    flush_size: int = INGEST_FLUSH_SIZE,
+    manifest: IngestManifest | None = None,
+) -> int:
+    """
+    Streams pages through extract -> enrich -> store with the stages
+    overlapping: extraction runs ahead into a bounded queue, enrichment
+    works one window of pages at a time, and chunks are flushed to storage
+    in micro-batches in the background while the next window is enriched.
+    Pages whose text matches `manifest` are skipped, and chunks already
+    stored under the same content ID are not written again. Returns the
+    number of chunks stored.
+    """
+    page_queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, INGEST_PAGE_BUFFER))
+
+    async def produce():
+        # only signals while the consumer is still reading; once it stops it
+        # cancels this task, so nothing here can block on a full queue
+        try:
+            async for page in pages:
+                await progress.add(pages_parsed=1)
+                await page_queue.put(page)
+        except Exception as ex:
+            await page_queue.put(ex)
+            return
+        await page_queue.put(_DONE)
+
+    producer = asyncio.create_task(produce())
+    pending: List[ContextChunk] = []
+    flush_task: asyncio.Task | None = None
+    stored = 0
+    page_index = 0
+    seen: set[str] = set()
+
+    async def flush(chunks: List[ContextChunk]) -> int:
+        saved = await save_chunks(chunks)
+        await progress.add(chunks_stored=saved)
+        return saved
+
+    try:
+        await progress.stage("processing")
+        done = False
+        while not done:
+            window: List[dict] = []
+            while len(window) < max(1, enrich_window):
+                page = await page_queue.get()
+                if isinstance(page, Exception):
+                    raise page
+                if page is _DONE:
+                    done = True
+                    break
+                window.append(page)
+            if not window:
+                break
+
+            changed: List[tuple[dict, int, str]] = []
+            for page in window:
+                page_number = page["page"] if page.get("page") is not None else page_index
+                page_index += 1
+                page_hash = content_hash(page["text"])
+                if manifest is not None and manifest.reuse_page(page_number, page_hash):
+                    await progress.add(pages_skipped=1)
+                    continue
+                changed.append((page, page_number, page_hash))
+
+            enrichments = await enrich_pages([page["text"] for page, _, _ in changed])
+            window_chunks: List[ContextChunk] = []
+            for (page, page_number, page_hash), (keywords, typical_questions) in zip(changed, enrichments):
+                chunks = build_page_chunks(
+                    page, page_number, source_type, keywords, typical_questions, progress.collection
+                )
+                if manifest is not None:
+                    manifest.record_page(page_number, page_hash, [chunk.source_id for chunk in chunks])
+                window_chunks.extend(chunks)
+                await progress.add(chunks_enriched=len(chunks))
+
+            new_chunks = await drop_known_chunks(window_chunks, seen)
+            if len(new_chunks) < len(window_chunks):
+                await progress.add(chunks_skipped=len(window_chunks) - len(new_chunks))
+            pending.extend(new_chunks)
+
+            # at most one flush in flight; wait for it before starting the next
+            while len(pending) >= flush_size or (done and pending):
+                batch, pending = pending[:flush_size], pending[flush_size:]
+                if flush_task is not None:
+                    stored += await flush_task
+                flush_task = asyncio.create_task(flush(batch))
+
+        if flush_task is not None:
+            stored += await flush_task
+            flush_task = None
+        await producer
+    finally:
+        producer.cancel()
+        if flush_task is not None:
+            flush_task.cancel()
+        await asyncio.gather(producer, *([flush_task] if flush_task else []), return_exceptions=True)
+
+    return stored
@@ -1,16 +1,25 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.responses import HTMLResponse
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from uuid import uuid4
 
 from app.storage.db_helper import init_db
+from app.storage.chat_repo import get_session_messages_page
+from app.storage.message_sink import message_sink
 from app.core import settings
+from app.core.cache import cache_stats
 # from storage.init_db import init_db
 
-from app.storage.weaviate import init_weaviate
-from app.ws.chat import handle_chat_message
+from app.storage.manifest_repo import reset_chunk_state
+from app.storage.rerank import check_rerank_mode
+from app.storage.search_backend import close_search_backend, init_search_backend
+from app.ws.chat import handle_chat_message, parse_chat_message
 
+from app.ingestion.jobs import ingest_jobs, router as jobs_router
+from app.ingestion.llm_helper import close_http_client
+from app.services.embeddings import close_embedding_client
+from app.ingestion.ocr_executor import init_ocr_executor, close_ocr_executor
 from app.ingestion.video import router as video_router
 from app.ingestion.image import router as image_router
 from app.ingestion.document import router as document_router
@@ -19,10 +28,23 @@ from app.ingestion.document import router as document_router
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     _ = settings.settings.openai_api_key 
+    check_rerank_mode()
     await init_db()
-    with settings.weaviate_client() as client:
-        init_weaviate(client)
+    await message_sink.start()
+    index_empty = await init_search_backend()
+    if index_empty and settings.CHUNK_STATE_RESET:
+        await reset_chunk_state()
+    elif index_empty:
+        print("[WARN] Search index is empty; chunk rows and manifests kept (CHUNK_STATE_RESET=true clears them)")
+    init_ocr_executor()
+    await ingest_jobs.start()
     yield
+    await ingest_jobs.stop()
+    await message_sink.stop()
+    close_ocr_executor()
+    await close_http_client()
+    await close_embedding_client()
+    await close_search_backend()
 
 # App
 app = FastAPI(lifespan=lifespan)
@@ -36,6 +58,7 @@ app.add_middleware(
 app.include_router(video_router)
 app.include_router(image_router)
 app.include_router(document_router)
+app.include_router(jobs_router)
 
 html = """
 <!DOCTYPE html>
@@ -110,6 +133,11 @@ html = """
       Bot is typing...
     </div>
 
+    <label>
+      <input type="checkbox" id="streamReplies" checked />
+      Stream replies
+    </label>
+
     <form onsubmit="sendMessage(event)">
       <input type="text" id="messageText" autocomplete="off" style="width:80%;" />
       <button>Send</button>
@@ -151,6 +179,8 @@ html = """
       let ws = null;
       let sessionId = null;
       let renderedCount = 0;
+      let streamDiv = null;
+      let streamText = "";
 
     function wsBaseUrl() {
         // https -> wss, http -> ws
@@ -163,7 +193,8 @@ html = """
         const data = await res.json();
         sessionId = data.session_id;
 
-        ws = new WebSocket(`${wsBaseUrl()}/ws/chat/${sessionId}`);
+        const stream = document.getElementById("streamReplies").checked;
+        ws = new WebSocket(`${wsBaseUrl()}/ws/chat/${sessionId}?stream=${stream}`);
 
         ws.onopen = () => console.log("WS connected", sessionId);
         ws.onclose = e => console.log("WS closed", e.code, e.reason);
@@ -175,13 +206,41 @@ html = """
             document.getElementById("typing").style.display = data.value ? "block" : "none";
             return;
         }
+        if (data.type === "delta") {
+            renderDelta(data.value);
+            return;
+        }
         if (data.type === "message") renderChat(data.payload);
         };
     }
 
+      function renderDelta(token) {
+        const chat = document.getElementById("chat");
+
+        document.getElementById("typing").style.display = "none";
+        if (!streamDiv) {
+          // echo the pending user message before the reply starts
+          const pending = document.getElementById("messageText").dataset.pending;
+          if (pending) addMessage("user", pending);
+          streamDiv = addMessage("assistant", "");
+          streamText = "";
+        }
+        streamText += token;
+        streamDiv.innerHTML = marked.parse(streamText);
+        chat.scrollTop = chat.scrollHeight;
+      }
+
       function renderChat(payload) {
         const chat = document.getElementById("chat");
 
+        if (streamDiv) {
+          // the streamed turn is already on screen
+          streamDiv = null;
+          renderedCount = payload.previousMessages.length;
+          chat.scrollTop = chat.scrollHeight;
+          return;
+        }
+
         payload.previousMessages
           .slice(renderedCount)
           .forEach(msg => addMessage(msg.role, msg.content));
@@ -209,6 +268,7 @@ html = """
 
         row.appendChild(div);
         chat.appendChild(row);
+        return div;
       }
 
       function sendMessage(event) {
@@ -218,6 +278,7 @@ html = """
           return;
         }
         const input = document.getElementById("messageText");
+        input.dataset.pending = input.value;
         ws.send(input.value);
         input.value = "";
       }
@@ -241,6 +302,19 @@ html = """
         const data = await res.json();
         document.getElementById("uploadResult").textContent =
           JSON.stringify(data, null, 2);
+
+        if (data.job_id) pollJob(data.job_id);
+      }
+
+      async function pollJob(jobId) {
+        const res = await fetch(`/ingest/jobs/${jobId}`);
+        const job = await res.json();
+        document.getElementById("uploadResult").textContent =
+          JSON.stringify(job, null, 2);
+
+        if (job.status === "queued" || job.status === "running") {
+          setTimeout(() => pollJob(jobId), 1000);
+        }
       }
     </script>
   </body>
@@ -258,17 +332,45 @@ def set_session():
     session_id = str(uuid4())
     return {"session_id": session_id}
 
+@app.get("/sessions/{session_id}/messages")
+async def session_messages(session_id: str, before: str | None = None, limit: int = 50):
+    try:
+        messages, cursor = await get_session_messages_page(session_id, before, min(max(limit, 1), 200))
+    except ValueError as ex:
+        raise HTTPException(status_code=400, detail=str(ex))
+    return {"messages": messages, "nextCursor": cursor}
+
 @app.websocket("/ws/chat/{session_id}")
-async def websocket_chat(ws: WebSocket, session_id: str):
+async def websocket_chat(ws: WebSocket, session_id: str, stream: bool = False):
     await ws.accept()
+
+    async def send_delta(token: str) -> None:
+        await ws.send_json({
+            "type": "delta",
+            "value": token
+        })
+
     try:
         while True:
             msg = await ws.receive_text()
+            try:
+                text, filters = parse_chat_message(msg)
+            except ValueError as ex:
+                await ws.send_json({
+                    "type": "error",
+                    "value": f"Invalid filters: {ex}"
+                })
+                continue
             await ws.send_json({
                 "type": "typing",
                 "value": True
             })
-            reply = await handle_chat_message(session_id, msg)
+            reply = await handle_chat_message(
+                session_id,
+                text,
+                on_delta=send_delta if stream else None,
+                filters=filters,
+            )
             await ws.send_json({
                 "type": "typing",
                 "value": False
@@ -281,6 +383,10 @@ async def websocket_chat(ws: WebSocket, session_id: str):
     except WebSocketDisconnect:
         print("Disconnected:", session_id)
 
+@app.get("/stats/caches")
+async def get_cache_stats():
+    return cache_stats()
+
 @app.get("/")
 async def root():
     return {"message": "Chat Pipeline - host"}
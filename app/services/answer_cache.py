@@ -0,0 +1,140 @@
+import hashlib
+import json
+import threading
+import time
+from typing import Any, Dict, Iterable, List
+
+import numpy as np
+
+from app.core.cache import register_cache
+from app.core.settings import (
+    SEMANTIC_CACHE_MAX_DISTANCE,
+    SEMANTIC_CACHE_SIZE,
+    SEMANTIC_CACHE_TTL,
+)
+
+
+class SemanticAnswerCache:
+    """
+    Stores replies next to the embedding of the question that produced them.
+    A lookup hits when a stored question is within `max_distance` (cosine)
+    of the new one AND was answered from exactly the same retrieved chunks
+    after the same conversation history, so a changed corpus, a different
+    context or an earlier turn the reply built on never returns a stale
+    reply. Vectors live in a preallocated ring buffer, oldest overwritten
+    first.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, max_distance: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_distance = max_distance
+        self._vectors: np.ndarray | None = None
+        self._entries: list[Dict[str, Any] | None] = []
+        self._next = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        # bumped on every invalidation so replies generated against the old
+        # corpus are not stored after it changed
+        self.version = 0
+
+    def lookup(self, vector: np.ndarray, chunk_ids: Iterable[str], history_key: str = "") -> str | None:
+        key = frozenset(chunk_ids)
+        with self._lock:
+            if self._vectors is None or not self._entries or self._vectors.shape[1] != len(vector):
+                self.misses += 1
+                return None
+
+            now = time.monotonic()
+            distances = 1.0 - self._vectors[:len(self._entries)] @ vector
+            for idx in np.argsort(distances):
+                if distances[idx] > self.max_distance:
+                    break
+                entry = self._entries[idx]
+                if (
+                    entry["chunk_ids"] == key
+                    and entry["history_key"] == history_key
+                    and now - entry["created_at"] <= self.ttl
+                ):
+                    self.hits += 1
+                    return entry["answer"]
+
+            self.misses += 1
+            return None
+
+    def store(
+        self,
+        vector: np.ndarray,
+        chunk_ids: Iterable[str],
+        answer: str,
+        version: int,
+        history_key: str = "",
+    ) -> None:
+        entry = {
+            "chunk_ids": frozenset(chunk_ids),
+            "history_key": history_key,
+            "answer": answer,
+            "created_at": time.monotonic(),
+        }
+        with self._lock:
+            if version != self.version or self.maxsize <= 0:
+                return
+            if self._vectors is None or self._vectors.shape[1] != len(vector):
+                # allocated once; a different embedding size starts over
+                self._vectors = np.zeros((self.maxsize, len(vector)), np.float32)
+                self._entries = []
+                self._next = 0
+
+            # overwrite the oldest slot once full
+            self._vectors[self._next] = vector
+            if len(self._entries) < self.maxsize:
+                self._entries.append(entry)
+            else:
+                self._entries[self._next] = entry
+            self._next = (self._next + 1) % self.maxsize
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._entries = []
+            self._next = 0
+            self.invalidations += 1
+            self.version += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "invalidations": self.invalidations,
+            }
+
+
+def history_key(messages: List[Dict[str, str]]) -> str:
+    """Digest of the turns a reply was generated after; empty for a new session."""
+    if not messages:
+        return ""
+    payload = json.dumps([[m["role"], m["content"]] for m in messages], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def to_unit_vector(vector) -> np.ndarray:
+    arr = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(arr)
+    return arr / norm if norm else arr
+
+
+answer_cache = SemanticAnswerCache(
+    maxsize=SEMANTIC_CACHE_SIZE,
+    ttl=SEMANTIC_CACHE_TTL,
+    max_distance=SEMANTIC_CACHE_MAX_DISTANCE,
+)
+register_cache("semantic_answer", answer_cache)
+
+def invalidate_answer_cache() -> None:
+    answer_cache.invalidate()
@@ -1,5 +1,5 @@
 import os
-from typing import List, Dict
+from typing import AsyncIterator, List, Dict
 
 from openai import AsyncOpenAI
 from app.core.settings import settings
@@ -16,3 +16,19 @@ async def generate_reply(messages: List[Dict[str, str]]) -> str:
         temperature=0.7,
     )
     return response.choices[0].message.content
+
+
+async def stream_reply(messages: List[Dict[str, str]]) -> AsyncIterator[str]:
+    client = get_openai_client()
+    stream = await client.chat.completions.create(
+        model=os.environ.get("OPENAI_MODEL", "gpt-4o-mini"),
+        messages=messages,
+        temperature=0.7,
+        stream=True,
+    )
+    async for event in stream:
+        if not event.choices:
+            continue
+        token = event.choices[0].delta.content
+        if token:
+            yield token
@@ -0,0 +1,92 @@
+import asyncio
+import threading
+from typing import Dict, List
+
+import httpx
+
+from app.core.cache import StatsCache
+from app.core.settings import (
+    EMBEDDING_BACKEND,
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_LOCAL_MODEL,
+    EMBEDDING_MODEL,
+    EMBEDDING_QUERY_CACHE_SIZE,
+    EMBEDDING_TIMEOUT,
+    OLLAMA_URL,
+)
+
+EMBEDDING_BACKENDS = {"ollama", "sentence-transformers"}
+
+_http_client: httpx.AsyncClient | None = None
+_local_model = None
+_local_model_lock = threading.Lock()
+_query_cache = StatsCache("query_embedding", maxsize=EMBEDDING_QUERY_CACHE_SIZE)
+_query_inflight: Dict[str, asyncio.Task] = {}
+
+
+def get_embedding_client() -> httpx.AsyncClient:
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(timeout=EMBEDDING_TIMEOUT)
+    return _http_client
+
+async def close_embedding_client() -> None:
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+async def embed_texts(texts: List[str], batch_size: int = EMBEDDING_BATCH_SIZE) -> List[List[float]]:
+    """Embeds texts in batches of `batch_size` (one request / model call per batch); keeps input order."""
+    if EMBEDDING_BACKEND not in EMBEDDING_BACKENDS:
+        raise ValueError(f"Unknown embedding backend: {EMBEDDING_BACKEND}")
+
+    vectors: List[List[float]] = []
+    for start in range(0, len(texts), max(1, batch_size)):
+        batch = texts[start:start + max(1, batch_size)]
+        if EMBEDDING_BACKEND == "ollama":
+            vectors.extend(await embed_ollama(batch))
+        else:
+            vectors.extend(await asyncio.to_thread(embed_local, batch))
+    return vectors
+
+async def embed_ollama(texts: List[str]) -> List[List[float]]:
+    res = await get_embedding_client().post(
+        f"{OLLAMA_URL}/api/embed",
+        json={"model": EMBEDDING_MODEL, "input": texts},
+    )
+    res.raise_for_status()
+    return res.json()["embeddings"]
+
+def embed_local(texts: List[str]) -> List[List[float]]:
+    global _local_model
+    with _local_model_lock:
+        if _local_model is None:
+            try:
+                from sentence_transformers import SentenceTransformer
+            except ImportError as ex:
+                raise RuntimeError(
+                    "EMBEDDING_BACKEND=sentence-transformers needs the sentence-transformers package"
+                ) from ex
+            _local_model = SentenceTransformer(EMBEDDING_LOCAL_MODEL, device="cpu")
+    return _local_model.encode(texts, batch_size=len(texts), normalize_embeddings=True).tolist()
+
+
+async def embed_query(text: str) -> List[float]:
+    cached = _query_cache.get(text)
+    if cached is not None:
+        return cached
+
+    # concurrent sessions asking the same thing share one embed call
+    task = _query_inflight.get(text)
+    if task is None:
+        task = asyncio.create_task(_load_query_embedding(text))
+        _query_inflight[text] = task
+        task.add_done_callback(lambda _: _query_inflight.pop(text, None))
+    return await asyncio.shield(task)
+
+async def _load_query_embedding(text: str) -> List[float]:
+    vector = (await embed_texts([text]))[0]
+    _query_cache.set(text, vector)
+    return vector
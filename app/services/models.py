@@ -1,9 +1,36 @@
+from datetime import datetime
+from uuid import UUID
+
 from pydantic import BaseModel
 
+# collection for chunks ingested without one
+DEFAULT_COLLECTION = "default"
+
 class IngestResponse(BaseModel):
     chunks_created: int
     status: str
 
+class IngestJobResponse(BaseModel):
+    job_id: UUID
+    status: str
+
+class IngestJobStatus(BaseModel):
+    job_id: UUID
+    kind: str
+    filename: str | None = None
+    collection: str = DEFAULT_COLLECTION
+    status: str
+    stage: str
+    pages_parsed: int = 0
+    chunks_enriched: int = 0
+    chunks_stored: int = 0
+    pages_skipped: int = 0
+    chunks_skipped: int = 0
+    result: str | None = None
+    error: str | None = None
+    created_at: datetime
+    updated_at: datetime
+
 class ContextChunk(BaseModel):
     source_id: str
     source_type: str
@@ -11,3 +38,12 @@ class ContextChunk(BaseModel):
     page_number: int = 0
     keywords: list[str] = []
     typical_questions: list[str] = []
+    collection: str = DEFAULT_COLLECTION
+
+# empty lists do not filter; `sources` are uploaded filenames, resolved to
+# the chunk IDs in `source_ids` before the search backend sees them
+class SearchFilters(BaseModel):
+    sources: list[str] = []
+    source_types: list[str] = []
+    collections: list[str] = []
+    source_ids: list[str] | None = None
@@ -0,0 +1,122 @@
+from typing import Any, Dict, List
+
+from app.core.settings import (
+    CONTEXT_TOKEN_BUDGET,
+    PROMPT_CONTEXT_SHARE,
+    PROMPT_HISTORY_SHARE,
+    PROMPT_SUMMARY_TOKENS,
+    PROMPT_SYSTEM_SHARE,
+    PROMPT_TOKEN_BUDGET,
+)
+from app.core.tokens import count_tokens
+
+# per-message framing overhead in chat completion requests
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+class PromptBudget:
+    def __init__(
+        self,
+        total: int = PROMPT_TOKEN_BUDGET,
+        system_share: float = PROMPT_SYSTEM_SHARE,
+        context_share: float = PROMPT_CONTEXT_SHARE,
+        history_share: float = PROMPT_HISTORY_SHARE,
+        summary_tokens: int = PROMPT_SUMMARY_TOKENS,
+    ):
+        self.total = total
+        self.system_tokens = int(total * system_share)
+        # never hand the context more than the context builder's own cap
+        self.context_tokens = min(int(total * context_share), CONTEXT_TOKEN_BUDGET)
+        self.history_tokens = int(total * history_share)
+        self.summary_tokens = summary_tokens
+
+
+def message_tokens(message: Dict[str, str]) -> int:
+    return count_tokens(message.get("content", "")) + MESSAGE_OVERHEAD_TOKENS
+
+def summarize_dropped(dropped: List[Dict[str, str]], token_budget: int) -> Dict[str, str] | None:
+    """
+    Cheap extractive note of what the dropped turns were about, built from
+    the user's earlier questions so no extra LLM call is needed.
+    """
+    if token_budget <= 0:
+        return None
+    questions = [m["content"].strip().replace("\n", " ") for m in dropped if m["role"] == "user"]
+    if not questions:
+        return None
+
+    header = "Earlier in this conversation the user asked about:"
+    lines: List[str] = []
+    used = count_tokens(header) + MESSAGE_OVERHEAD_TOKENS
+    for question in reversed(questions):  # most recent first
+        line = f"- {question[:200]}"
+        cost = count_tokens(line)
+        if used + cost > token_budget:
+            break
+        lines.append(line)
+        used += cost
+    if not lines:
+        return None
+    return {"role": "system", "content": "\n".join([header, *lines])}
+
+def fit_history(
+    history: List[Dict[str, str]],
+    token_budget: int,
+    summary_tokens: int = 0,
+) -> tuple[List[Dict[str, str]], List[Dict[str, str]]]:
+    """
+    Keeps the most recent turns that fit `token_budget`, always including
+    the latest message. Once anything has to be dropped, `summary_tokens`
+    are reserved for the summary note. Returns (kept, dropped).
+    """
+    if not history:
+        return [], []
+
+    costs = [message_tokens(m) for m in history]
+    if sum(costs) <= token_budget:
+        return list(history), []
+
+    budget = max(0, token_budget - summary_tokens)
+    start = len(history) - 1
+    used = costs[start]
+    while start > 0 and used + costs[start - 1] <= budget:
+        start -= 1
+        used += costs[start]
+    return history[start:], history[:start]
+
+def fit_prompt(
+    system_message: Dict[str, str],
+    context_message: Dict[str, str],
+    history: List[Dict[str, str]],
+    budget: PromptBudget,
+) -> tuple[List[Dict[str, str]], Dict[str, Any]]:
+    """
+    Assembles system prompt + context message + as much recent history as
+    the budget allows. History gets its own share plus whatever the system
+    and context messages left unused. Returns (messages, token metrics).
+    """
+    system_used = message_tokens(system_message)
+    context_used = message_tokens(context_message)
+    history_budget = max(budget.history_tokens, budget.total - system_used - context_used)
+
+    kept, dropped = fit_history(history, history_budget, budget.summary_tokens)
+    summary = summarize_dropped(dropped, budget.summary_tokens) if dropped else None
+
+    messages = [system_message, context_message]
+    if summary:
+        messages.append(summary)
+    messages.extend(kept)
+
+    history_used = sum(message_tokens(m) for m in kept)
+    summary_used = message_tokens(summary) if summary else 0
+    metrics = {
+        "budget": budget.total,
+        "system": system_used,
+        "context": context_used,
+        "history": history_used,
+        "summary": summary_used,
+        "total": system_used + context_used + history_used + summary_used,
+        "historyKept": len(kept),
+        "historyDropped": len(dropped),
+    }
+    return messages, metrics
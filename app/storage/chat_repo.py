@@ -1,30 +1,120 @@
+from collections import deque
+from datetime import datetime
 from typing import List, Dict
+from uuid import UUID
+
+from app.core.cache import StatsCache
+from app.core.settings import CHAT_HISTORY_CACHE_SESSIONS, CHAT_HISTORY_WINDOW, MESSAGE_WRITE_BEHIND
 from app.storage.db_helper import get_db
+from app.storage.message_sink import message_sink
+
+# session_id -> deque of the latest CHAT_HISTORY_WINDOW messages
+_history_cache = StatsCache("session_history", maxsize=CHAT_HISTORY_CACHE_SESSIONS)
 
 
 async def save_message(session_id: str, role: str, content: str) -> None:
-    async with get_db() as conn:
-        await conn.execute(
-            """
-            INSERT INTO chat_messages (session_id, role, content)
-            VALUES ($1, $2, $3)
-            """,
-            session_id,
-            role,
-            content,
-        )
+    queued = MESSAGE_WRITE_BEHIND and message_sink.running and message_sink.add(session_id, role, content)
+    if not queued:
+        # also when the sink is full (Postgres down or slow): writing through
+        # pushes back on the caller instead of growing the buffer
+        async with get_db() as conn:
+            await conn.execute(
+                """
+                INSERT INTO chat_messages (session_id, role, content)
+                VALUES ($1, $2, $3)
+                """,
+                session_id,
+                role,
+                content,
+            )
 
-async def get_session_messages(session_id: str, limit: int = 50) -> List[Dict]:
+    buffer = _history_cache.peek(session_id)
+    if buffer is not None:
+        buffer.append({"role": role, "content": content})
+
+async def get_session_messages(session_id: str, limit: int = CHAT_HISTORY_WINDOW) -> List[Dict]:
+    """Latest `limit` messages of a session, oldest first."""
+    buffer = _history_cache.get(session_id)
+    if buffer is not None and limit <= buffer.maxlen:
+        return list(buffer)[-limit:]
+
+    window = max(limit, CHAT_HISTORY_WINDOW)
+    # snapshot before querying: a batch flushed mid-query is then either in
+    # the rows or in the snapshot, never in neither
+    pending = message_sink.pending_for(session_id)
     async with get_db() as conn:
         rows = await conn.fetch(
             """
-            SELECT role, content
+            SELECT id, role, content, created_at
             FROM chat_messages
             WHERE session_id = $1
-            ORDER BY created_at ASC
+            ORDER BY created_at DESC, id DESC
             LIMIT $2
             """,
             session_id,
-            limit,
+            window,
         )
-    return [{"role": r["role"], "content": r["content"]} for r in rows]
+    # messages saved while the query ran are still queued; dedupe by id
+    by_id = {m["id"]: m for m in [*pending, *message_sink.pending_for(session_id)]}
+    by_id.update((r["id"], r) for r in rows)
+    merged = sorted(by_id.values(), key=lambda m: (m["created_at"], m["id"]))
+    messages = [{"role": m["role"], "content": m["content"]} for m in merged]
+    _history_cache.set(session_id, deque(messages, maxlen=window))
+    return messages[-limit:]
+
+async def get_session_messages_page(
+    session_id: str,
+    before: str | None = None,
+    limit: int = CHAT_HISTORY_WINDOW,
+) -> tuple[List[Dict], str | None]:
+    """
+    Keyset pagination backwards through a session. `before` is the cursor
+    returned by the previous page; returns (messages oldest first, cursor
+    for the next older page or None).
+    """
+    async with get_db() as conn:
+        if before is None:
+            rows = await conn.fetch(
+                """
+                SELECT id, role, content, created_at
+                FROM chat_messages
+                WHERE session_id = $1
+                ORDER BY created_at DESC, id DESC
+                LIMIT $2
+                """,
+                session_id,
+                limit,
+            )
+        else:
+            created_at, message_id = decode_cursor(before)
+            rows = await conn.fetch(
+                """
+                SELECT id, role, content, created_at
+                FROM chat_messages
+                WHERE session_id = $1
+                  AND (created_at, id) < ($2, $3)
+                ORDER BY created_at DESC, id DESC
+                LIMIT $4
+                """,
+                session_id,
+                created_at,
+                message_id,
+                limit,
+            )
+
+    messages = [
+        {"role": r["role"], "content": r["content"], "createdAt": r["created_at"].isoformat()}
+        for r in reversed(rows)
+    ]
+    cursor = encode_cursor(rows[-1]["created_at"], rows[-1]["id"]) if len(rows) == limit else None
+    return messages, cursor
+
+def encode_cursor(created_at: datetime, message_id: UUID) -> str:
+    return f"{created_at.isoformat()}|{message_id}"
+
+def decode_cursor(cursor: str) -> tuple[datetime, UUID]:
+    try:
+        created_at, message_id = cursor.split("|", 1)
+        return datetime.fromisoformat(created_at), UUID(message_id)
+    except ValueError as ex:
+        raise ValueError(f"Invalid cursor: {cursor}") from ex
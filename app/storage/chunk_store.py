@@ -0,0 +1,53 @@
+import asyncio
+from typing import Iterable, List
+
+from app.services.answer_cache import invalidate_answer_cache
+from app.services.embeddings import embed_texts
+from app.services.models import ContextChunk
+from app.storage.db_helper import delete_context_chunks, insert_context_chunks
+from app.storage.search_backend import get_search_backend
+
+
+async def save_chunks(incoming_chunks: Iterable[ContextChunk]) -> int:
+    create_chunks = list(incoming_chunks)
+    if not create_chunks:
+        return 0
+
+    backend = get_search_backend()
+    vectors = await embed_texts([embedding_text(chunk) for chunk in create_chunks])
+    if backend.stores_chunk_rows:
+        await backend.save(create_chunks, vectors)
+    else:
+        index_result, rows_result = await asyncio.gather(
+            backend.save(create_chunks, vectors),
+            insert_context_chunks(create_chunks),
+            return_exceptions=True,
+        )
+        if isinstance(index_result, BaseException):
+            # a chunk row means "already indexed" to re-ingest, so rows whose
+            # index write failed are removed again
+            if not isinstance(rows_result, BaseException):
+                await delete_context_chunks([chunk.source_id for chunk in create_chunks])
+            raise index_result
+        if isinstance(rows_result, BaseException):
+            # indexed without a row is safe: re-ingest writes the chunk again
+            raise rows_result
+    invalidate_answer_cache()
+    return len(create_chunks)
+
+async def delete_chunks(source_ids: List[str]) -> int:
+    if not source_ids:
+        return 0
+
+    backend = get_search_backend()
+    if not backend.stores_chunk_rows:
+        # rows go first: a chunk left in the index without its row is
+        # re-ingested and overwritten, never skipped
+        await delete_context_chunks(source_ids)
+    await backend.delete(source_ids)
+    invalidate_answer_cache()
+    return len(source_ids)
+
+def embedding_text(chunk: ContextChunk) -> str:
+    # same fields the Weaviate vectorizer used to embed
+    return "\n".join([chunk.content, *chunk.keywords, *chunk.typical_questions])
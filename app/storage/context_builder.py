@@ -0,0 +1,114 @@
+import re
+from typing import List
+
+from app.core.settings import CONTEXT_TOKEN_BUDGET
+from app.core.tokens import count_tokens
+
+# overlaps this short are treated as coincidence, not chunk overlap
+MIN_OVERLAP = 50
+
+
+def get_chunk_content(chunk) -> str:
+    if isinstance(chunk, dict):
+        return chunk.get("content", "")
+    return getattr(chunk, "content", "")
+
+def normalize_text(text: str) -> str:
+    text = text.replace("\u2019", "'").replace("\u2014", "-")
+    text = re.sub(r"[ \t]+", " ", text)
+    text = re.sub(r"\n{3,}", "\n\n", text)
+    return text.strip()
+
+def overlap_length(base: str, addition: str, min_overlap: int = MIN_OVERLAP) -> int:
+    """
+    Length of the longest suffix of `base` that is also a prefix of
+    `addition` (0 if it is not longer than `min_overlap`). Instead of
+    testing every length, it searches the tail of `base` for the first
+    `min_overlap + 1` characters of `addition` with str.find and verifies
+    each hit, so the cost is linear in the chunk size for real text.
+    """
+    anchor_len = min_overlap + 1
+    if len(addition) < anchor_len or len(base) < anchor_len:
+        return 0
+
+    anchor = addition[:anchor_len]
+    tail_start = max(0, len(base) - len(addition))
+    pos = base.find(anchor, tail_start)
+    while pos != -1:
+        # the earliest verified hit is the longest overlap
+        if addition.startswith(base[pos:]):
+            return len(base) - pos
+        pos = base.find(anchor, pos + 1)
+    return 0
+
+def merge_texts(base: str, addition: str) -> str:
+    if not base:
+        return addition
+    overlap = overlap_length(base, addition)
+    if overlap:
+        return base + addition[overlap:]
+    return base + "\n\n" + addition
+
+def split_heading(text: str) -> tuple[str, str]:
+    first, sep, rest = text.partition("\n")
+    return (first, rest) if sep else ("", text)
+
+def build_context_string(chunks: list, token_budget: int = CONTEXT_TOKEN_BUDGET) -> str:
+    """
+    Joins chunk contents in rank order, dropping exact duplicates and the
+    part of each chunk that overlaps the previous one. Only the previous
+    chunk is compared, and pieces are joined once at the end, so the cost is
+    linear in the total context size. Chunks that would push the context
+    past `token_budget` are skipped.
+    """
+    parts: List[str] = []
+    seen: set[int] = set()
+    previous = ""
+    used = 0
+
+    for chunk in chunks:
+        content = normalize_text(get_chunk_content(chunk))
+        if not content:
+            continue
+        fingerprint = hash(content)
+        if fingerprint in seen:
+            continue
+
+        piece = content
+        if previous:
+            # chunks from one section repeat its heading; match on the bodies
+            prev_heading, prev_body = split_heading(previous)
+            heading, body = split_heading(content)
+            if heading and heading == prev_heading:
+                overlap = overlap_length(prev_body, body)
+                if overlap:
+                    piece = body[overlap:]
+            else:
+                overlap = overlap_length(previous, content)
+                if overlap:
+                    piece = content[overlap:]
+            if not overlap:
+                piece = "\n\n" + content
+
+        cost = count_tokens(piece)
+        if token_budget and used + cost > token_budget:
+            continue
+
+        parts.append(piece)
+        seen.add(fingerprint)
+        previous = content
+        used += cost
+
+    return "".join(parts).strip()
+
+def build_context_with_metadata(chunks: list) -> str:
+    keywords = sorted({
+        kw for c in chunks for kw in (c.keywords if hasattr(c, "keywords") else c.get("keywords", []))
+    })
+    body = build_context_string(chunks)
+    return f"""SOURCE: document
+KEYWORDS: {", ".join(keywords)}
+
+CONTENT:
+{body}
+"""
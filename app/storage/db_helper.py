@@ -1,19 +1,37 @@
 import asyncpg
 from contextlib import asynccontextmanager
 from typing import List
+from app.core.settings import PGVECTOR_EF_SEARCH, VECTOR_BACKEND
 from app.services.models import ContextChunk
 
 
 DATABASE_URL = "postgres://postgres:postgres@db:5432/postgres"
 _pool: asyncpg.Pool | None = None
 
+CHUNK_COLUMNS = [
+    "source_id",
+    "source_type",
+    "content",
+    "page_number",
+    "keywords",
+    "typical_questions",
+    "collection",
+]
+
 async def init_db():
     global _pool
     if _pool is None:
+        server_settings = {}
+        if VECTOR_BACKEND == "pgvector":
+            # applied at connect time, so ANN queries need no extra SET round trip
+            server_settings["hnsw.ef_search"] = str(PGVECTOR_EF_SEARCH)
+            # filtered ANN queries keep scanning until LIMIT rows match (pgvector 0.8+)
+            server_settings["hnsw.iterative_scan"] = "strict_order"
         _pool = await asyncpg.create_pool(
             DATABASE_URL,
             min_size=1,
             max_size=10,
+            server_settings=server_settings,
         )
 
 @asynccontextmanager
@@ -24,29 +42,68 @@ async def get_db():
     async with _pool.acquire() as conn:
         yield conn
 
-async def insert_context_chunks(chunks: List[ContextChunk]):
+async def insert_context_chunks(chunks: List[ContextChunk], upsert: bool = True):
+    """
+    Bulk-loads chunks with COPY. With `upsert` (the default, safe for
+    re-ingest) rows are COPY'd into a per-connection staging table and merged
+    into context_chunks in one statement; otherwise they are COPY'd straight in.
+    """
+    if not chunks:
+        return
+
+    records = [
+        (
+            chunk.source_id,
+            chunk.source_type,
+            chunk.content,
+            chunk.page_number,
+            list(chunk.keywords),
+            list(chunk.typical_questions),
+            chunk.collection,
+        )
+        for chunk in chunks
+    ]
+    columns = ", ".join(CHUNK_COLUMNS)
+    updates = ", ".join(f"{c} = EXCLUDED.{c}" for c in CHUNK_COLUMNS if c != "source_id")
+
     async with get_db() as conn:
-        await conn.executemany(
-            """
-            INSERT INTO context_chunks (
-                source_id,
-                source_type,
-                content,
-                page_number,
-                keywords,
-                typical_questions
+        if not upsert:
+            await conn.copy_records_to_table("context_chunks", records=records, columns=CHUNK_COLUMNS)
+            return
+
+        async with conn.transaction():
+            await conn.execute(
+                """
+                CREATE TEMP TABLE IF NOT EXISTS context_chunks_staging
+                (LIKE context_chunks INCLUDING DEFAULTS)
+                ON COMMIT DELETE ROWS
+                """
+            )
+            await conn.copy_records_to_table("context_chunks_staging", records=records, columns=CHUNK_COLUMNS)
+            await conn.execute(
+                f"""
+                INSERT INTO context_chunks ({columns})
+                SELECT DISTINCT ON (source_id) {columns}
+                FROM context_chunks_staging
+                ON CONFLICT (source_id) DO UPDATE SET {updates}
+                """
             )
-            VALUES ($1, $2, $3, $4, $5, $6)
-            """,
-            [
-                (
-                    chunk.source_id,
-                    chunk.source_type,
-                    chunk.content,
-                    chunk.page_number,
-                    ", ".join(chunk.keywords),
-                    "\n- ".join(chunk.typical_questions),
-                )
-                for chunk in chunks
-            ],
+
+async def existing_chunk_ids(source_ids: List[str]) -> set[str]:
+    if not source_ids:
+        return set()
+    async with get_db() as conn:
+        rows = await conn.fetch(
+            "SELECT source_id FROM context_chunks WHERE source_id = ANY($1::text[])",
+            source_ids,
+        )
+    return {r["source_id"] for r in rows}
+
+async def delete_context_chunks(source_ids: List[str]) -> None:
+    if not source_ids:
+        return
+    async with get_db() as conn:
+        await conn.execute(
+            "DELETE FROM context_chunks WHERE source_id = ANY($1::text[])",
+            source_ids,
         )
@@ -0,0 +1,58 @@
+from typing import Dict, List, Tuple
+
+from app.storage.db_helper import get_db
+
+Enrichment = Tuple[List[str], List[str]]
+
+
+async def get_enrichments(cache_keys: List[str]) -> Dict[str, Enrichment]:
+    """Fetches cached results and marks them as recently used in one statement."""
+    if not cache_keys:
+        return {}
+    async with get_db() as conn:
+        rows = await conn.fetch(
+            """
+            UPDATE enrichment_cache
+            SET last_used = now()
+            WHERE cache_key = ANY($1::text[])
+            RETURNING cache_key, keywords, questions
+            """,
+            cache_keys,
+        )
+    return {r["cache_key"]: (list(r["keywords"]), list(r["questions"])) for r in rows}
+
+async def save_enrichments(entries: Dict[str, Enrichment]) -> None:
+    if not entries:
+        return
+    async with get_db() as conn:
+        await conn.executemany(
+            """
+            INSERT INTO enrichment_cache (cache_key, keywords, questions)
+            VALUES ($1, $2, $3)
+            ON CONFLICT (cache_key)
+            DO UPDATE SET keywords = EXCLUDED.keywords, questions = EXCLUDED.questions, last_used = now()
+            """,
+            [(key, list(keywords), list(questions)) for key, (keywords, questions) in entries.items()],
+        )
+
+async def evict_enrichments(max_rows: int, batch_size: int) -> int:
+    """
+    Deletes up to `batch_size` of the least recently used rows beyond
+    `max_rows`, oldest first. Rows with the same `last_used` are ordered by
+    key, so exactly the excess goes; concurrent passes skip each other's rows.
+    """
+    async with get_db() as conn:
+        result = await conn.execute(
+            """
+            DELETE FROM enrichment_cache
+            WHERE cache_key IN (
+              SELECT cache_key FROM enrichment_cache
+              ORDER BY last_used, cache_key
+              LIMIT LEAST($2, GREATEST(0, (SELECT count(*) FROM enrichment_cache) - $1))
+              FOR UPDATE SKIP LOCKED
+            )
+            """,
+            max_rows,
+            batch_size,
+        )
+    return int(result.split()[-1])
@@ -0,0 +1,53 @@
+from app.storage.db_helper import get_db
+
+
+async def get_expansion(query_key: str, max_age_sec: float) -> str | None:
+    async with get_db() as conn:
+        return await conn.fetchval(
+            """
+            SELECT expanded
+            FROM query_expansions
+            WHERE query_key = $1
+              AND created_at > now() - make_interval(secs => $2)
+            """,
+            query_key,
+            max_age_sec,
+        )
+
+async def save_expansion(query_key: str, expanded: str) -> None:
+    async with get_db() as conn:
+        await conn.execute(
+            """
+            INSERT INTO query_expansions (query_key, expanded)
+            VALUES ($1, $2)
+            ON CONFLICT (query_key)
+            DO UPDATE SET expanded = EXCLUDED.expanded, created_at = now()
+            """,
+            query_key,
+            expanded,
+        )
+
+async def evict_expansions(max_age_sec: float, max_rows: int, batch_size: int) -> int:
+    """
+    Deletes up to `batch_size` rows that are older than `max_age_sec` or
+    beyond `max_rows`, oldest first (ties broken on the key).
+    """
+    async with get_db() as conn:
+        result = await conn.execute(
+            """
+            DELETE FROM query_expansions
+            WHERE query_key IN (
+              SELECT query_key FROM query_expansions
+              ORDER BY created_at, query_key
+              LIMIT LEAST($3, GREATEST(
+                (SELECT count(*) FROM query_expansions WHERE created_at <= now() - make_interval(secs => $1)),
+                (SELECT count(*) FROM query_expansions) - $2
+              ))
+              FOR UPDATE SKIP LOCKED
+            )
+            """,
+            max_age_sec,
+            max_rows,
+            batch_size,
+        )
+    return int(result.split()[-1])
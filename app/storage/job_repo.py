@@ -0,0 +1,138 @@
+from typing import Dict, List
+from uuid import UUID
+
+from app.services.models import DEFAULT_COLLECTION
+from app.storage.db_helper import get_db
+
+JOB_FIELDS = {
+    "status",
+    "stage",
+    "pages_parsed",
+    "chunks_enriched",
+    "chunks_stored",
+    "pages_skipped",
+    "chunks_skipped",
+    "result",
+    "error",
+}
+JOB_COUNTERS = {"pages_parsed", "chunks_enriched", "chunks_stored", "pages_skipped", "chunks_skipped"}
+
+
+async def create_job(
+    job_id: UUID,
+    kind: str,
+    filename: str | None,
+    file_path: str,
+    collection: str = DEFAULT_COLLECTION,
+    document_id: str | None = None,
+) -> None:
+    async with get_db() as conn:
+        await conn.execute(
+            """
+            INSERT INTO ingest_jobs (id, kind, filename, file_path, collection, document_id)
+            VALUES ($1, $2, $3, $4, $5, $6)
+            """,
+            job_id,
+            kind,
+            filename,
+            file_path,
+            collection,
+            document_id,
+        )
+
+async def update_job(job_id: UUID, **fields) -> None:
+    unknown = set(fields) - JOB_FIELDS
+    if unknown:
+        raise ValueError(f"Unknown job fields: {sorted(unknown)}")
+    if not fields:
+        return
+
+    names = list(fields)
+    assignments = ", ".join(f"{name} = ${idx + 2}" for idx, name in enumerate(names))
+    async with get_db() as conn:
+        await conn.execute(
+            f"UPDATE ingest_jobs SET {assignments}, updated_at = now() WHERE id = $1",
+            job_id,
+            *[fields[name] for name in names],
+        )
+
+async def increment_job(job_id: UUID, **deltas: int) -> None:
+    unknown = set(deltas) - JOB_COUNTERS
+    if unknown:
+        raise ValueError(f"Unknown job counters: {sorted(unknown)}")
+    if not deltas:
+        return
+
+    names = list(deltas)
+    assignments = ", ".join(f"{name} = {name} + ${idx + 2}" for idx, name in enumerate(names))
+    async with get_db() as conn:
+        await conn.execute(
+            f"UPDATE ingest_jobs SET {assignments}, updated_at = now() WHERE id = $1",
+            job_id,
+            *[deltas[name] for name in names],
+        )
+
+async def get_job(job_id: UUID) -> Dict | None:
+    async with get_db() as conn:
+        row = await conn.fetchrow("SELECT * FROM ingest_jobs WHERE id = $1", job_id)
+    return dict(row) if row else None
+
+async def claim_jobs(
+    worker_id: str,
+    lease: float,
+    job_id: UUID | None = None,
+    min_queued_age: float = 0,
+) -> List[Dict]:
+    """
+    Atomically marks claimable jobs as running under `worker_id` and returns
+    them, oldest first. A job is claimable when it has been queued for at
+    least `min_queued_age` seconds, or is running under a claim that was not
+    renewed within `lease` seconds. Concurrent claimers skip each other's
+    locked rows, so each job goes to one process. `job_id` restricts the
+    claim to that job, which also succeeds if `worker_id` already holds it.
+    """
+    async with get_db() as conn:
+        rows = await conn.fetch(
+            """
+            UPDATE ingest_jobs
+            SET status = 'running', claimed_by = $1, claimed_at = now(), updated_at = now()
+            WHERE id IN (
+              SELECT id FROM ingest_jobs
+              WHERE ($3::uuid IS NULL OR id = $3)
+                AND (
+                  (status = 'queued' AND updated_at <= now() - $4 * interval '1 second')
+                  OR (status = 'running' AND (
+                    ($3::uuid IS NOT NULL AND claimed_by = $1)
+                    OR COALESCE(claimed_at, updated_at) < now() - $2 * interval '1 second'
+                  ))
+                )
+              ORDER BY created_at
+              FOR UPDATE SKIP LOCKED
+            )
+            RETURNING id, kind, filename, file_path, collection, document_id, created_at
+            """,
+            worker_id,
+            lease,
+            job_id,
+            min_queued_age,
+        )
+    return sorted((dict(r) for r in rows), key=lambda job: job["created_at"])
+
+async def renew_claims(worker_id: str) -> None:
+    async with get_db() as conn:
+        await conn.execute(
+            "UPDATE ingest_jobs SET claimed_at = now() WHERE claimed_by = $1 AND status = 'running'",
+            worker_id,
+        )
+
+async def release_claims(worker_id: str) -> None:
+    """Puts jobs interrupted by a shutdown back in the queue for the next process."""
+    async with get_db() as conn:
+        await conn.execute(
+            """
+            UPDATE ingest_jobs
+            SET status = 'queued', claimed_by = NULL, claimed_at = NULL, updated_at = now()
+            WHERE claimed_by = $1 AND status = 'running'
+            """,
+            worker_id,
+        )
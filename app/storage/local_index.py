@@ -0,0 +1,580 @@
+import asyncio
+import json
+import os
+import pickle
+import shutil
+import threading
+from pathlib import Path
+from typing import Dict, List
+from uuid import uuid4
+
+import numpy as np
+
+from app.core.settings import (
+    LOCAL_COMPACT_MIN_ROWS,
+    LOCAL_COMPACT_RATIO,
+    LOCAL_HNSW_EF,
+    LOCAL_INDEX_DIR,
+    LOCAL_VECTOR_INDEX,
+)
+from app.core.text import FIELD_WEIGHTS, tokenize
+from app.services.models import DEFAULT_COLLECTION, ContextChunk, SearchFilters
+from app.storage.search_backend import SearchBackend
+
+try:
+    import hnswlib
+except ImportError:  # optional; exact search is used without it
+    hnswlib = None
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+
+def term_weights(record: Dict) -> Dict[str, float]:
+    """Field-weighted term frequencies of one chunk record."""
+    tfs: Dict[str, float] = {}
+    for field, weight in FIELD_WEIGHTS:
+        value = record.get(field) or ""
+        for term in tokenize(" ".join(value) if isinstance(value, list) else value):
+            tfs[term] = tfs.get(term, 0.0) + weight
+    return tfs
+
+
+def chunk_record(chunk: ContextChunk) -> Dict:
+    return {
+        "id": chunk.source_id,
+        "content": chunk.content,
+        "keywords": list(chunk.keywords),
+        "source_type": chunk.source_type,
+        "page_number": chunk.page_number,
+        "typical_questions": list(chunk.typical_questions),
+        "collection": chunk.collection,
+    }
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indexes of the k highest scores, best first."""
+    if k >= len(scores):
+        return np.argsort(-scores, kind="stable")
+    part = np.argpartition(-scores, k - 1)[:k]
+    return part[np.argsort(-scores[part], kind="stable")]
+
+
+def unit_rows(vectors) -> np.ndarray:
+    vectors = np.asarray(vectors, np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1.0, norms)
+
+
+def reserve(array: np.ndarray, size: int) -> np.ndarray:
+    """`array` with room for `size` rows; grown to double capacity when full."""
+    if len(array) >= size:
+        return array
+    grown = np.zeros((max(size, 2 * len(array)), *array.shape[1:]), array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+def new_hnsw(dim: int, capacity: int, ef: int):
+    hnsw = hnswlib.Index(space="cosine", dim=dim)
+    hnsw.init_index(max_elements=max(1, capacity), ef_construction=200, M=16)
+    hnsw.set_ef(ef)
+    return hnsw
+
+
+def activate_generation(path: Path, gen: Path) -> None:
+    """Points CURRENT at `gen`, then drops older generations."""
+    tmp = path / "CURRENT.tmp"
+    tmp.write_text(gen.name, encoding="utf-8")
+    os.replace(tmp, path / "CURRENT")
+    for old in path.glob("gen-*"):
+        if old != gen:
+            # may still be mapped by readers of the previous generation
+            shutil.rmtree(old, ignore_errors=True)
+
+
+class LocalIndex:
+    """
+    The local index: one compacted generation on disk (chunk records in row
+    order, unit-length float32 vectors and BM25 postings in CSR form,
+    `terms[t] = (start, end)` slicing `post_docs` / `post_tfs`), memory-mapped,
+    plus every write made since. Writes go to the generation's log and are
+    applied in memory: added rows take new row numbers, and removed or
+    replaced rows are only flagged in `deleted` until compaction writes a
+    new generation without them.
+    """
+
+    def __init__(
+        self,
+        records: List[Dict],
+        vectors: np.ndarray,
+        terms: Dict[str, List[int]],
+        post_docs: np.ndarray,
+        post_tfs: np.ndarray,
+        doc_len: np.ndarray,
+        hnsw=None,
+        use_hnsw: bool = False,
+        ef: int = LOCAL_HNSW_EF,
+    ):
+        self.records = list(records)
+        self.vectors = vectors
+        self.terms = terms
+        self.post_docs = post_docs
+        self.post_tfs = post_tfs
+        self.hnsw = hnsw
+        self.use_hnsw = use_hnsw
+        self.ef = ef
+        self.gen: Path | None = None
+        self._hnsw_lock = threading.Lock()
+
+        # rows below base_rows come from the generation files, the rest were
+        # added since; `size` only moves once a row is fully written
+        self.base_rows = self.size = len(self.records)
+        self.dim = vectors.shape[1] if self.base_rows else 0
+        self.extra = np.zeros((0, self.dim), np.float32)
+        # postings of the added rows: term -> [rows, tfs, count], arrays grown in place
+        self.extra_terms: Dict[str, list] = {}
+        self.doc_len = np.array(doc_len, np.float32)
+        self.deleted = np.zeros(self.size, bool)
+        self.deleted_rows = 0
+        self.live_len = float(self.doc_len.sum())
+        self.row_of = {record["id"]: row for row, record in enumerate(self.records)}
+        # per-row columns for filter masks
+        self.ids = np.asarray([record["id"] for record in self.records], dtype=object)
+        self.source_types = np.asarray([record["source_type"] for record in self.records], dtype=object)
+        self.collections = np.asarray(
+            [record.get("collection") or DEFAULT_COLLECTION for record in self.records], dtype=object
+        )
+
+    @classmethod
+    def empty(cls, use_hnsw: bool = False, ef: int = LOCAL_HNSW_EF) -> "LocalIndex":
+        return cls(
+            [],
+            np.zeros((0, 0), np.float32),
+            {},
+            np.zeros(0, np.int32),
+            np.zeros(0, np.float32),
+            np.zeros(0, np.float32),
+            use_hnsw=use_hnsw,
+            ef=ef,
+        )
+
+    @classmethod
+    def build(
+        cls,
+        records: List[Dict],
+        vectors: np.ndarray,
+        use_hnsw: bool = False,
+        ef: int = LOCAL_HNSW_EF,
+        hnsw=None,
+    ) -> "LocalIndex":
+        """New generation over `records`; `hnsw` is reused when it already holds exactly these rows."""
+        postings: Dict[str, List[tuple[int, float]]] = {}
+        doc_len = np.zeros(len(records), np.float32)
+        for row, record in enumerate(records):
+            tfs = term_weights(record)
+            doc_len[row] = sum(tfs.values())
+            for term, tf in tfs.items():
+                postings.setdefault(term, []).append((row, tf))
+
+        terms: Dict[str, List[int]] = {}
+        docs: List[int] = []
+        tf_values: List[float] = []
+        for term, entries in postings.items():
+            terms[term] = [len(docs), len(docs) + len(entries)]
+            docs.extend(row for row, _ in entries)
+            tf_values.extend(tf for _, tf in entries)
+
+        if not use_hnsw:
+            hnsw = None
+        elif hnsw is None and len(records):
+            hnsw = new_hnsw(vectors.shape[1], len(records), ef)
+            hnsw.add_items(vectors, np.arange(len(records)))
+
+        return cls(
+            records,
+            vectors,
+            terms,
+            np.asarray(docs, np.int32),
+            np.asarray(tf_values, np.float32),
+            doc_len,
+            hnsw,
+            use_hnsw,
+            ef,
+        )
+
+    @classmethod
+    def load(cls, path: Path, use_hnsw: bool = False, ef: int = LOCAL_HNSW_EF) -> "LocalIndex":
+        current = path / "CURRENT"
+        if not current.exists():
+            # writes need a generation to log to
+            activate_generation(path, cls.empty().write_generation(path))
+        return cls.open_generation(path / current.read_text(encoding="utf-8").strip(), use_hnsw, ef)
+
+    @classmethod
+    def open_generation(cls, gen: Path, use_hnsw: bool = False, ef: int = LOCAL_HNSW_EF) -> "LocalIndex":
+        """Maps a generation's files and replays the writes logged since."""
+        with open(gen / "chunks.jsonl", encoding="utf-8") as f:
+            records = [json.loads(line) for line in f if line.strip()]
+        # numpy cannot memory-map zero-sized arrays
+        mmap = "r" if records else None
+        vectors = np.load(gen / "vectors.npy", mmap_mode=mmap)
+        terms = json.loads((gen / "terms.json").read_text(encoding="utf-8"))
+
+        hnsw = None
+        if use_hnsw and records and (gen / "hnsw.bin").exists():
+            hnsw = hnswlib.Index(space="cosine", dim=vectors.shape[1])
+            hnsw.load_index(str(gen / "hnsw.bin"), max_elements=len(records))
+            hnsw.set_ef(ef)
+        elif use_hnsw and records:
+            hnsw = new_hnsw(vectors.shape[1], len(records), ef)
+            hnsw.add_items(np.asarray(vectors), np.arange(len(records)))
+
+        index = cls(
+            records,
+            vectors,
+            terms,
+            np.load(gen / "post_docs.npy", mmap_mode=mmap),
+            np.load(gen / "post_tfs.npy", mmap_mode=mmap),
+            np.load(gen / "doc_len.npy", mmap_mode=mmap),
+            hnsw,
+            use_hnsw,
+            ef,
+        )
+        index.replay(gen)
+        index.gen = gen
+        return index
+
+    def write_generation(self, path: Path) -> Path:
+        """Writes this index's rows as a new generation directory (not yet CURRENT)."""
+        path.mkdir(parents=True, exist_ok=True)
+        gen = path / f"gen-{uuid4().hex[:12]}"
+        gen.mkdir()
+        with open(gen / "chunks.jsonl", "w", encoding="utf-8") as f:
+            for record in self.records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        np.save(gen / "vectors.npy", self.vectors)
+        np.save(gen / "post_docs.npy", self.post_docs)
+        np.save(gen / "post_tfs.npy", self.post_tfs)
+        np.save(gen / "doc_len.npy", self.doc_len)
+        (gen / "terms.json").write_text(json.dumps(self.terms), encoding="utf-8")
+        if self.hnsw is not None:
+            self.hnsw.save_index(str(gen / "hnsw.bin"))
+        return gen
+
+    def replay(self, gen: Path) -> None:
+        log = gen / "log.jsonl"
+        if not log.exists():
+            return
+        data = log.read_bytes()
+        end = data.rfind(b"\n") + 1
+        if end < len(data):
+            # torn last line from a crash mid-write; later appends must not join it
+            with open(log, "r+b") as f:
+                f.truncate(end)
+        vectors_path = gen / "log_vectors.f32"
+        vectors = np.fromfile(vectors_path, np.float32) if vectors_path.exists() else np.zeros(0, np.float32)
+        for line in data[:end].decode("utf-8").splitlines():
+            op = json.loads(line)
+            if op["op"] == "delete":
+                self.remove(op["ids"], log=False)
+                continue
+            start = op["offset"] // 4
+            count = len(op["records"]) * op["dim"]
+            self.append(op["records"], vectors[start:start + count].reshape(-1, op["dim"]), log=False)
+
+    def _log(self, op: Dict, vectors: np.ndarray | None = None) -> None:
+        # vectors first, at a recorded offset, so a torn write never shifts later ones
+        if vectors is not None:
+            with open(self.gen / "log_vectors.f32", "ab") as f:
+                op["offset"] = f.tell()
+                f.write(np.ascontiguousarray(vectors, np.float32).tobytes())
+        with open(self.gen / "log.jsonl", "a", encoding="utf-8") as f:
+            f.write(json.dumps(op, ensure_ascii=False) + "\n")
+
+    @property
+    def live_rows(self) -> int:
+        return len(self.row_of)
+
+    @property
+    def pending_rows(self) -> int:
+        """Rows added or deleted since the generation was compacted."""
+        return self.size - self.base_rows + self.deleted_rows
+
+    def append(self, records: List[Dict], vectors: np.ndarray, log: bool = True) -> None:
+        """Adds rows with unit-length `vectors`, replacing live rows with the same id."""
+        if not records:
+            return
+        if log and self.gen is not None:
+            self._log({"op": "add", "records": records, "dim": int(vectors.shape[1])}, vectors)
+        self.remove([record["id"] for record in records], log=False)
+
+        if not self.dim:
+            self.dim = vectors.shape[1]
+            self.extra = np.zeros((0, self.dim), np.float32)
+        start, end = self.size, self.size + len(records)
+        self.extra = reserve(self.extra, end - self.base_rows)
+        self.extra[start - self.base_rows:end - self.base_rows] = vectors
+        self.doc_len = reserve(self.doc_len, end)
+        self.deleted = reserve(self.deleted, end)
+        self.ids = reserve(self.ids, end)
+        self.source_types = reserve(self.source_types, end)
+        self.collections = reserve(self.collections, end)
+        for row, record in enumerate(records, start):
+            tfs = term_weights(record)
+            self.doc_len[row] = sum(tfs.values())
+            self.live_len += float(self.doc_len[row])
+            for term, tf in tfs.items():
+                entry = self.extra_terms.get(term)
+                if entry is None:
+                    entry = self.extra_terms[term] = [np.zeros(4, np.int32), np.zeros(4, np.float32), 0]
+                count = entry[2]
+                entry[0], entry[1] = reserve(entry[0], count + 1), reserve(entry[1], count + 1)
+                entry[0][count], entry[1][count] = row, tf
+                entry[2] = count + 1
+            self.ids[row] = record["id"]
+            self.source_types[row] = record["source_type"]
+            self.collections[row] = record.get("collection") or DEFAULT_COLLECTION
+            self.row_of[record["id"]] = row
+        self.records.extend(records)
+
+        if self.use_hnsw:
+            with self._hnsw_lock:
+                if self.hnsw is None:
+                    self.hnsw = new_hnsw(self.dim, end, self.ef)
+                elif end > self.hnsw.get_max_elements():
+                    self.hnsw.resize_index(max(end, 2 * self.hnsw.get_max_elements()))
+                self.hnsw.add_items(vectors, np.arange(start, end))
+        self.size = end
+
+    def remove(self, source_ids: List[str], log: bool = True) -> None:
+        present = [source_id for source_id in dict.fromkeys(source_ids) if source_id in self.row_of]
+        if not present:
+            return
+        if log and self.gen is not None:
+            self._log({"op": "delete", "ids": present})
+        for source_id in present:
+            row = self.row_of.pop(source_id)
+            self.deleted[row] = True
+            self.deleted_rows += 1
+            self.live_len -= float(self.doc_len[row])
+            if self.hnsw is not None:
+                with self._hnsw_lock:
+                    self.hnsw.mark_deleted(row)
+
+    def snapshot(self) -> tuple[List[Dict], np.ndarray, object]:
+        """
+        Records and vectors of the live rows, for compaction, plus a copy of
+        the HNSW graph when no row was deleted (its labels are then still
+        the row numbers), so compaction need not rebuild it.
+        """
+        rows = np.flatnonzero(~self.deleted[:self.size])
+        hnsw = None
+        if self.hnsw is not None and not self.deleted_rows:
+            with self._hnsw_lock:
+                hnsw = pickle.loads(pickle.dumps(self.hnsw))
+        return [self.records[row] for row in rows], self.row_vectors(rows), hnsw
+
+    def row_vectors(self, rows: np.ndarray) -> np.ndarray:
+        """Vectors of ascending `rows`, from the generation files and the rows added since."""
+        split = int(np.searchsorted(rows, self.base_rows))
+        base = np.asarray(self.vectors[rows[:split]], np.float32).reshape(-1, self.dim)
+        return np.concatenate([base, self.extra[rows[split:] - self.base_rows]])
+
+    def postings(self, term: str, n: int) -> tuple[np.ndarray, np.ndarray]:
+        """Rows below `n` containing `term`, with their weighted term frequencies."""
+        span = self.terms.get(term)
+        docs = self.post_docs[span[0]:span[1]] if span else np.zeros(0, np.int32)
+        tfs = self.post_tfs[span[0]:span[1]] if span else np.zeros(0, np.float32)
+        extra = self.extra_terms.get(term)
+        if extra is not None:
+            extra_docs, extra_tfs, count = extra
+            # rows are appended in order, so those not yet visible are a suffix
+            count = int(np.searchsorted(extra_docs[:count], n))
+            docs = np.concatenate([docs, extra_docs[:count]])
+            tfs = np.concatenate([tfs, extra_tfs[:count]])
+        return docs, tfs
+
+    def filter_mask(self, filters: SearchFilters | None, n: int) -> np.ndarray | None:
+        """Boolean mask over the first `n` rows for `filters`; None when nothing is restricted."""
+        if filters is None:
+            return None
+        mask = None
+        for values, column in (
+            (filters.source_types or None, self.source_types),
+            (filters.collections or None, self.collections),
+            (filters.source_ids, self.ids),
+        ):
+            if values is not None:
+                matched = np.isin(column[:n], list(values))
+                mask = matched if mask is None else mask & matched
+        return mask
+
+    def keyword_search(self, query: str, limit: int, filters: SearchFilters | None = None) -> List[Dict]:
+        n, live_rows = self.size, self.live_rows
+        if live_rows == 0 or limit <= 0:
+            return []
+        live = ~self.deleted[:n]
+        mask = self.filter_mask(filters, n)
+        if mask is not None:
+            live &= mask
+        avg_len = self.live_len / live_rows or 1.0
+
+        scores = np.zeros(n, np.float32)
+        for term in set(tokenize(query)):
+            docs, tfs = self.postings(term, n)
+            if not len(docs):
+                continue
+            df = np.count_nonzero(~self.deleted[docs])
+            idf = np.log(1.0 + (live_rows - df + 0.5) / (df + 0.5))
+            len_norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_len[docs] / avg_len)
+            scores[docs] += idf * tfs * (BM25_K1 + 1) / (tfs + len_norm)
+        scores[~live] = 0
+
+        rows = [row for row in top_k(scores, limit) if scores[row] > 0]
+        return [{**self.records[row], "score": float(scores[row])} for row in rows]
+
+    def vector_search(self, vector: List[float], limit: int, filters: SearchFilters | None = None) -> List[Dict]:
+        n, live_rows = self.size, self.live_rows
+        if live_rows == 0 or limit <= 0:
+            return []
+
+        query = np.asarray(vector, np.float32)
+        query /= np.linalg.norm(query) or 1.0
+        mask = self.filter_mask(filters, n)
+        if mask is not None:
+            # exact scan over the matching rows only; HNSW cannot prefilter
+            rows = np.flatnonzero(mask & ~self.deleted[:n])
+            distances = 1.0 - self.row_vectors(rows) @ query
+            best = top_k(-distances, min(limit, len(rows)))
+            return [{**self.records[rows[i]], "distance": float(distances[i])} for i in best]
+
+        k = min(limit, live_rows)
+        if self.hnsw is not None:
+            try:
+                with self._hnsw_lock:
+                    labels, distances = self.hnsw.knn_query(query, k=k)
+                return [
+                    {**self.records[row], "distance": distance}
+                    for row, distance in zip(labels[0].tolist(), distances[0].tolist())
+                ]
+            except RuntimeError:
+                # too few reachable live elements; fall back to the exact scan
+                pass
+
+        similarity = self.extra[:n - self.base_rows] @ query
+        if self.base_rows:
+            similarity = np.concatenate([self.vectors @ query, similarity])
+        distances = 1.0 - similarity
+        distances[self.deleted[:n]] = np.inf
+        return [{**self.records[row], "distance": float(distances[row])} for row in top_k(-distances, k)]
+
+
+class LocalBackend(SearchBackend):
+    """
+    In-process index for single-node deployments and CI: no Weaviate
+    needed. The compacted arrays are memory-mapped from `path` on start, so
+    searches are a matrix-vector product (or an HNSW lookup) and a few
+    postings slices. A write costs time proportional to its batch; once
+    the rows added or deleted since the last compaction pass
+    `compact_ratio` of the compacted ones, a background task writes a new
+    generation.
+    """
+
+    def __init__(
+        self,
+        path: str | Path = LOCAL_INDEX_DIR,
+        vector_index: str = LOCAL_VECTOR_INDEX,
+        ef: int = LOCAL_HNSW_EF,
+        compact_ratio: float = LOCAL_COMPACT_RATIO,
+        compact_min_rows: int = LOCAL_COMPACT_MIN_ROWS,
+    ):
+        self.path = Path(path)
+        self.use_hnsw = vector_index == "hnsw" and hnswlib is not None
+        if vector_index == "hnsw" and hnswlib is None:
+            print("[WARN] LOCAL_VECTOR_INDEX=hnsw but hnswlib is not installed - using exact search")
+        self.ef = ef
+        self.compact_ratio = compact_ratio
+        self.compact_min_rows = compact_min_rows
+        self._index = LocalIndex.empty()
+        self._write_lock = threading.Lock()
+        self._compaction: asyncio.Task | None = None
+        # writes made while a compaction runs, re-applied to its result
+        self._replay: List[tuple] | None = None
+
+    async def start(self) -> bool:
+        self._index = await asyncio.to_thread(LocalIndex.load, self.path, self.use_hnsw, self.ef)
+        self._maybe_compact()
+        return self._index.live_rows == 0
+
+    async def close(self) -> None:
+        if self._compaction is not None:
+            await asyncio.gather(self._compaction, return_exceptions=True)
+        self._index = LocalIndex.empty()
+
+    async def save(self, chunks: List[ContextChunk], vectors: List[List[float]]) -> None:
+        await asyncio.to_thread(self._write, chunks, vectors, [])
+        self._maybe_compact()
+
+    async def delete(self, source_ids: List[str]) -> None:
+        await asyncio.to_thread(self._write, [], [], source_ids)
+        self._maybe_compact()
+
+    async def keyword_search(self, query: str, limit: int, filters: SearchFilters | None = None) -> List[Dict]:
+        return self._index.keyword_search(query, limit, filters)
+
+    async def vector_search(self, vector: List[float], limit: int, filters: SearchFilters | None = None) -> List[Dict]:
+        return self._index.vector_search(vector, limit, filters)
+
+    def _write(self, chunks: List[ContextChunk], vectors: List[List[float]], delete_ids: List[str]) -> None:
+        # last write wins for a source_id repeated within the batch
+        incoming: Dict[str, tuple[Dict, List[float]]] = {
+            chunk.source_id: (chunk_record(chunk), vector) for chunk, vector in zip(chunks, vectors)
+        }
+        records = [record for record, _ in incoming.values()]
+        added = unit_rows([vector for _, vector in incoming.values()]) if incoming else None
+
+        with self._write_lock:
+            apply_write(self._index, records, added, delete_ids)
+            if self._replay is not None:
+                self._replay.append((records, added, delete_ids))
+
+    def _maybe_compact(self) -> None:
+        index = self._index
+        threshold = max(self.compact_min_rows, self.compact_ratio * index.base_rows)
+        if self._compaction is None and index.pending_rows >= threshold:
+            self._compaction = asyncio.create_task(self._compact())
+
+    async def _compact(self) -> None:
+        try:
+            await asyncio.to_thread(self._compact_generation)
+        except Exception as ex:
+            print("[WARN] Local index compaction failed:", repr(ex))
+        finally:
+            self._compaction = None
+
+    def _compact_generation(self) -> None:
+        with self._write_lock:
+            records, vectors, hnsw = self._index.snapshot()
+            self._replay = []
+        gen = None
+        try:
+            # the slow part runs without the lock; writes keep going to the old generation
+            gen = LocalIndex.build(records, vectors, self.use_hnsw, self.ef, hnsw).write_generation(self.path)
+            with self._write_lock:
+                index = LocalIndex.open_generation(gen, self.use_hnsw, self.ef)
+                for write in self._replay:
+                    apply_write(index, *write)
+                activate_generation(self.path, gen)
+                self._index = index
+                gen = None
+        finally:
+            with self._write_lock:
+                self._replay = None
+            if gen is not None:
+                shutil.rmtree(gen, ignore_errors=True)
+
+
+def apply_write(index: LocalIndex, records: List[Dict], vectors: np.ndarray | None, delete_ids: List[str]) -> None:
+    index.remove(delete_ids)
+    index.append(records, vectors)
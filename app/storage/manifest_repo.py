@@ -0,0 +1,105 @@
+from typing import Dict, List
+
+from app.services.models import DEFAULT_COLLECTION
+from app.storage.db_helper import get_db
+
+ManifestPages = Dict[int, tuple[str, List[str]]]
+
+
+async def get_manifest(source_type: str, file_key: str) -> tuple[str, ManifestPages] | None:
+    async with get_db() as conn:
+        file_hash = await conn.fetchval(
+            "SELECT file_hash FROM ingest_manifests WHERE source_type = $1 AND file_key = $2",
+            source_type,
+            file_key,
+        )
+        if file_hash is None:
+            return None
+        rows = await conn.fetch(
+            """
+            SELECT page_number, page_hash, chunk_ids
+            FROM ingest_manifest_pages
+            WHERE source_type = $1 AND file_key = $2
+            """,
+            source_type,
+            file_key,
+        )
+    return file_hash, {r["page_number"]: (r["page_hash"], list(r["chunk_ids"])) for r in rows}
+
+async def save_manifest(
+    source_type: str,
+    file_key: str,
+    file_hash: str,
+    pages: ManifestPages,
+    collection: str = DEFAULT_COLLECTION,
+    filename: str | None = None,
+) -> None:
+    async with get_db() as conn:
+        async with conn.transaction():
+            await conn.execute(
+                """
+                INSERT INTO ingest_manifests (source_type, file_key, file_hash, collection, filename)
+                VALUES ($1, $2, $3, $4, $5)
+                ON CONFLICT (source_type, file_key)
+                DO UPDATE SET file_hash = EXCLUDED.file_hash, filename = EXCLUDED.filename, updated_at = now()
+                """,
+                source_type,
+                file_key,
+                file_hash,
+                collection,
+                filename,
+            )
+            await conn.execute(
+                "DELETE FROM ingest_manifest_pages WHERE source_type = $1 AND file_key = $2",
+                source_type,
+                file_key,
+            )
+            await conn.copy_records_to_table(
+                "ingest_manifest_pages",
+                records=[
+                    (source_type, file_key, page_number, page_hash, chunk_ids)
+                    for page_number, (page_hash, chunk_ids) in pages.items()
+                ],
+                columns=["source_type", "file_key", "page_number", "page_hash", "chunk_ids"],
+            )
+
+async def unreferenced_chunk_ids(chunk_ids: List[str]) -> List[str]:
+    """Of `chunk_ids`, those no page of any manifest still points at."""
+    if not chunk_ids:
+        return []
+    async with get_db() as conn:
+        rows = await conn.fetch(
+            """
+            SELECT id
+            FROM unnest($1::text[]) AS id
+            WHERE NOT EXISTS (
+              SELECT 1 FROM ingest_manifest_pages p WHERE p.chunk_ids @> ARRAY[id]
+            )
+            """,
+            chunk_ids,
+        )
+    return [r["id"] for r in rows]
+
+async def source_chunk_ids(filenames: List[str]) -> List[str]:
+    """Chunk IDs the latest ingest of the named files produced."""
+    if not filenames:
+        return []
+    async with get_db() as conn:
+        rows = await conn.fetch(
+            """
+            SELECT DISTINCT unnest(p.chunk_ids) AS id
+            FROM ingest_manifests m
+            JOIN ingest_manifest_pages p USING (source_type, file_key)
+            WHERE m.filename = ANY($1::text[])
+            """,
+            filenames,
+        )
+    return [r["id"] for r in rows]
+
+async def reset_chunk_state() -> None:
+    """
+    Forgets every stored chunk and manifest so re-uploads are not skipped
+    as unchanged. Only run on an empty index with CHUNK_STATE_RESET=true.
+    """
+    async with get_db() as conn:
+        await conn.execute("TRUNCATE context_chunks, ingest_manifest_pages, ingest_manifests")
@@ -0,0 +1,148 @@
+import asyncio
+import asyncpg
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+from uuid import uuid4
+
+from app.core.settings import MESSAGE_BUFFER_MAX, MESSAGE_FLUSH_INTERVAL, MESSAGE_FLUSH_SIZE
+from app.storage.db_helper import get_db
+
+COLUMNS = ["id", "session_id", "role", "content", "created_at"]
+
+# errors caused by the rows themselves (bad encoding, constraint violations):
+# retrying the same batch can never succeed, unlike connection failures
+PERMANENT_ERRORS = (asyncpg.DataError, asyncpg.IntegrityConstraintViolationError, ValueError, TypeError)
+
+
+class MessageSink:
+    """
+    Write-behind buffer for chat messages. add() returns immediately; a
+    background task COPYs everything queued into chat_messages every
+    `flush_interval` seconds, or sooner once `flush_size` rows are waiting.
+    Rows that are queued or mid-flush stay visible through pending_for(),
+    so readers see their own writes before they reach Postgres. A batch that
+    fails on a connection error is retried whole; one rejected for its data
+    is retried row by row and the bad rows are dropped. At most `max_buffer`
+    rows are queued; add() refuses more.
+    """
+
+    def __init__(self, flush_interval: float, flush_size: int, max_buffer: int = MESSAGE_BUFFER_MAX):
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self.max_buffer = max_buffer
+        self._buffer: List[tuple] = []
+        self._inflight: List[tuple] = []
+        self._wake = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+        self._closing = False
+        self._last_ts = datetime.min.replace(tzinfo=timezone.utc)
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._closing = False
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        # let the loop finish its current flush rather than cancelling mid-COPY
+        if self._task is not None:
+            self._closing = True
+            self._wake.set()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+        if self._buffer:
+            print(f"[WARN] {len(self._buffer)} chat messages could not be flushed at shutdown")
+
+    def add(self, session_id: str, role: str, content: str) -> bool:
+        """Queues a message; False (nothing queued) when the buffer is full."""
+        if len(self._buffer) >= self.max_buffer:
+            return False
+
+        # client-side timestamps keep per-session order stable across batches
+        now = datetime.now(timezone.utc)
+        if now <= self._last_ts:
+            now = self._last_ts + timedelta(microseconds=1)
+        self._last_ts = now
+
+        self._buffer.append((uuid4(), session_id, role, content, now))
+        if len(self._buffer) >= self.flush_size:
+            self._wake.set()
+        return True
+
+    def pending_for(self, session_id: str) -> List[Dict]:
+        return [
+            {"id": r[0], "role": r[2], "content": r[3], "created_at": r[4]}
+            for r in self._inflight + self._buffer
+            if r[1] == session_id
+        ]
+
+    async def flush(self) -> int:
+        async with self._flush_lock:
+            if not self._buffer:
+                return 0
+            self._inflight, self._buffer = self._buffer, []
+            try:
+                await write_messages(self._inflight)
+                flushed = len(self._inflight)
+            except PERMANENT_ERRORS as ex:
+                print("Chat message flush rejected, retrying row by row:", ex)
+                flushed, retry = await self._write_rows(self._inflight)
+                self._buffer = retry + self._buffer
+            except Exception as ex:
+                # keep them queued ahead of newer messages and retry next tick
+                print("Chat message flush failed:", ex)
+                self._buffer = self._inflight + self._buffer
+                flushed = 0
+            self._inflight = []
+            return flushed
+
+    async def _write_rows(self, records: List[tuple]) -> tuple[int, List[tuple]]:
+        """Writes rows one at a time; returns (rows written, rows to retry)."""
+        written = 0
+        for idx, record in enumerate(records):
+            try:
+                await write_messages([record])
+                written += 1
+            except PERMANENT_ERRORS as ex:
+                print(f"[WARN] Dropping chat message {record[0]} of session {record[1]}:", ex)
+            except Exception as ex:
+                print("Chat message flush failed:", ex)
+                return written, records[idx:]
+        return written, []
+
+    async def _run(self) -> None:
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+
+async def write_messages(records: List[tuple]) -> None:
+    async with get_db() as conn:
+        try:
+            await conn.copy_records_to_table("chat_messages", records=records, columns=COLUMNS)
+        except asyncpg.UniqueViolationError:
+            # part of this batch already landed (e.g. a retried flush); fall
+            # back to an idempotent insert
+            await conn.executemany(
+                """
+                INSERT INTO chat_messages (id, session_id, role, content, created_at)
+                VALUES ($1, $2, $3, $4, $5)
+                ON CONFLICT (id) DO NOTHING
+                """,
+                records,
+            )
+
+
+message_sink = MessageSink(
+    flush_interval=MESSAGE_FLUSH_INTERVAL,
+    flush_size=MESSAGE_FLUSH_SIZE,
+)
@@ -0,0 +1,354 @@
+import asyncio
+from typing import Dict, List
+
+import asyncpg
+
+from app.core.settings import (
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_DIM,
+    PGVECTOR_MIN_TEXT_RANK,
+    PGVECTOR_TEXT_CONFIG,
+    RETRIEVAL_BM25_WEIGHT,
+    RETRIEVAL_CANDIDATES,
+    RETRIEVAL_MAX_DISTANCE,
+    RETRIEVAL_RRF_K,
+    RETRIEVAL_VECTOR_WEIGHT,
+)
+from app.services.embeddings import embed_texts
+from app.services.models import DEFAULT_COLLECTION, ContextChunk, SearchFilters
+from app.storage.chunk_store import embedding_text
+from app.storage.db_helper import delete_context_chunks, get_db
+from app.storage.search_backend import SearchBackend
+
+CHUNK_FIELDS = "source_id, source_type, content, page_number, keywords, typical_questions, collection"
+
+# keywords weigh double, like keywords^2 in the Weaviate BM25 query;
+# ts_rank weights are ordered {D, C, B, A}
+TEXT_RANK_WEIGHTS = "{0, 0, 0.5, 1}"
+
+# weighted document vector over a context_chunks row (or staging row)
+SEARCH_TSV = (
+    "setweight(to_tsvector($1::regconfig, array_to_string(keywords, ' ')), 'A')"
+    " || setweight(to_tsvector($1::regconfig, array_to_string(typical_questions, ' ') || ' ' || content), 'B')"
+)
+
+# any-term match: plainto_tsquery ANDs the lexemes, BM25 does not
+TSQUERY = "replace(plainto_tsquery($1::regconfig, $2)::text, '&', '|')::tsquery"
+
+
+def to_vector_literal(vector: List[float]) -> str:
+    # pgvector's text input format; avoids needing a binary codec for COPY/params
+    return "[" + ",".join(map(str, vector)) + "]"
+
+
+def filter_sql(filters: SearchFilters | None, params: list) -> str:
+    """
+    AND-ed conditions for `filters`, with their values appended to `params`.
+    Only active filters are emitted so the planner can use the
+    (collection, source_type) and primary key indexes.
+    """
+    conditions = []
+    if filters is not None:
+        for column, values in (
+            ("source_type", filters.source_types or None),
+            ("collection", filters.collections or None),
+            ("source_id", filters.source_ids),
+        ):
+            if values is not None:
+                params.append(list(values))
+                conditions.append(f"{column} = ANY(${len(params)}::text[])")
+    return " AND ".join(conditions) or "TRUE"
+
+
+def to_chunk(row) -> Dict:
+    return {
+        "id": row["source_id"],
+        "content": row["content"],
+        "keywords": list(row["keywords"] or []),
+        "source_type": row["source_type"],
+        "page_number": row["page_number"] or 0,
+        "typical_questions": list(row["typical_questions"] or []),
+        "collection": row["collection"] or DEFAULT_COLLECTION,
+    }
+
+
+class PgVectorBackend(SearchBackend):
+    """
+    Chunks, their embeddings and a weighted tsvector all live in
+    context_chunks: an HNSW index serves vector search, a GIN index serves
+    full-text search, and hybrid_search fuses both in one SQL statement.
+    The embedding column and indexes are added on start if missing, and
+    rows stored without an embedding (e.g. written by another backend) are
+    embedded in the background.
+    """
+
+    min_keyword_score = PGVECTOR_MIN_TEXT_RANK
+    stores_chunk_rows = True
+    supports_hybrid = True
+
+    def __init__(self, dim: int = EMBEDDING_DIM, text_config: str = PGVECTOR_TEXT_CONFIG):
+        self.dim = dim
+        self.text_config = text_config
+        self._backfill: asyncio.Task | None = None
+
+    async def start(self) -> bool:
+        async with get_db() as conn:
+            try:
+                await conn.execute("CREATE EXTENSION IF NOT EXISTS vector")
+            except asyncpg.PostgresError as ex:
+                raise RuntimeError(
+                    "VECTOR_BACKEND=pgvector needs the pgvector extension installed on the "
+                    f"Postgres server (e.g. the pgvector/pgvector:pg17 image): {ex}"
+                ) from ex
+            await conn.execute(f"ALTER TABLE context_chunks ADD COLUMN IF NOT EXISTS embedding vector({int(self.dim)})")
+            await conn.execute("ALTER TABLE context_chunks ADD COLUMN IF NOT EXISTS search_tsv tsvector")
+            await conn.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_context_chunks_embedding
+                ON context_chunks USING hnsw (embedding vector_cosine_ops)
+                """
+            )
+            await conn.execute(
+                """
+                CREATE INDEX IF NOT EXISTS idx_context_chunks_search
+                ON context_chunks USING GIN (search_tsv)
+                """
+            )
+
+            column_type = await conn.fetchval(
+                """
+                SELECT format_type(atttypid, atttypmod)
+                FROM pg_attribute
+                WHERE attrelid = 'context_chunks'::regclass AND attname = 'embedding'
+                """
+            )
+            if column_type != f"vector({self.dim})":
+                print(f"[WARN] context_chunks.embedding is {column_type}, EMBEDDING_DIM is {self.dim}")
+
+            empty = not await conn.fetchval("SELECT EXISTS (SELECT 1 FROM context_chunks)")
+            missing = await conn.fetchval(
+                "SELECT EXISTS (SELECT 1 FROM context_chunks WHERE embedding IS NULL)"
+            )
+        if missing:
+            self._backfill = asyncio.create_task(self._run_backfill())
+        return empty
+
+    async def close(self) -> None:
+        if self._backfill is not None:
+            self._backfill.cancel()
+            await asyncio.gather(self._backfill, return_exceptions=True)
+            self._backfill = None
+
+    async def _run_backfill(self) -> None:
+        try:
+            filled = await self.backfill_embeddings()
+        except Exception as ex:
+            print("[WARN] pgvector embedding backfill failed:", repr(ex))
+            return
+        print(f"[INFO] pgvector backfilled {filled} chunk embeddings")
+
+    async def backfill_embeddings(self, batch_size: int = EMBEDDING_BATCH_SIZE) -> int:
+        """
+        Embeds rows that have no embedding yet, `batch_size` at a time in
+        source_id order, and fills in their tsvector. Returns the number of
+        rows updated.
+        """
+        filled, after = 0, ""
+        while True:
+            async with get_db() as conn:
+                rows = await conn.fetch(
+                    f"""
+                    SELECT {CHUNK_FIELDS}
+                    FROM context_chunks
+                    WHERE embedding IS NULL AND source_id > $1
+                    ORDER BY source_id
+                    LIMIT $2
+                    """,
+                    after,
+                    max(1, batch_size),
+                )
+            if not rows:
+                return filled
+
+            chunks = [ContextChunk(source_id=chunk.pop("id"), **chunk) for chunk in map(to_chunk, rows)]
+            vectors = await embed_texts([embedding_text(chunk) for chunk in chunks])
+            async with get_db() as conn:
+                # rows saved meanwhile already carry an embedding and are left alone
+                await conn.executemany(
+                    f"""
+                    UPDATE context_chunks
+                    SET embedding = $3::vector, search_tsv = {SEARCH_TSV}
+                    WHERE source_id = $2 AND embedding IS NULL
+                    """,
+                    [
+                        (self.text_config, chunk.source_id, to_vector_literal(vector))
+                        for chunk, vector in zip(chunks, vectors)
+                    ],
+                )
+            filled += len(chunks)
+            after = rows[-1]["source_id"]
+
+    async def save(self, chunks: List[ContextChunk], vectors: List[List[float]]) -> None:
+        """Upserts rows with embedding and tsvector: COPY into a staging table, then one merge."""
+        if not chunks:
+            return
+
+        records = [
+            (
+                chunk.source_id,
+                chunk.source_type,
+                chunk.content,
+                chunk.page_number,
+                list(chunk.keywords),
+                list(chunk.typical_questions),
+                chunk.collection,
+                to_vector_literal(vector),
+            )
+            for chunk, vector in zip(chunks, vectors)
+        ]
+        async with get_db() as conn:
+            async with conn.transaction():
+                await conn.execute(
+                    """
+                    CREATE TEMP TABLE IF NOT EXISTS context_vectors_staging (
+                      source_id TEXT,
+                      source_type TEXT,
+                      content TEXT,
+                      page_number INTEGER,
+                      keywords TEXT[],
+                      typical_questions TEXT[],
+                      collection TEXT,
+                      embedding TEXT
+                    ) ON COMMIT DELETE ROWS
+                    """
+                )
+                await conn.copy_records_to_table(
+                    "context_vectors_staging",
+                    records=records,
+                    columns=[*CHUNK_FIELDS.split(", "), "embedding"],
+                )
+                await conn.execute(
+                    f"""
+                    INSERT INTO context_chunks ({CHUNK_FIELDS}, embedding, search_tsv)
+                    SELECT DISTINCT ON (source_id)
+                      {CHUNK_FIELDS},
+                      embedding::vector,
+                      {SEARCH_TSV}
+                    FROM context_vectors_staging
+                    ON CONFLICT (source_id) DO UPDATE SET
+                      source_type = EXCLUDED.source_type,
+                      content = EXCLUDED.content,
+                      page_number = EXCLUDED.page_number,
+                      keywords = EXCLUDED.keywords,
+                      typical_questions = EXCLUDED.typical_questions,
+                      collection = EXCLUDED.collection,
+                      embedding = EXCLUDED.embedding,
+                      search_tsv = EXCLUDED.search_tsv
+                    """,
+                    self.text_config,
+                )
+
+    async def delete(self, source_ids: List[str]) -> None:
+        await delete_context_chunks(source_ids)
+
+    async def keyword_search(self, query: str, limit: int, filters: SearchFilters | None = None) -> List[Dict]:
+        params = [self.text_config, query, limit]
+        where = filter_sql(filters, params)
+        async with get_db() as conn:
+            rows = await conn.fetch(
+                f"""
+                SELECT {CHUNK_FIELDS}, ts_rank('{TEXT_RANK_WEIGHTS}', search_tsv, q.query) AS score
+                FROM context_chunks, (SELECT {TSQUERY} AS query) q
+                WHERE search_tsv @@ q.query AND {where}
+                ORDER BY score DESC
+                LIMIT $3
+                """,
+                *params,
+            )
+        return [{**to_chunk(row), "score": row["score"]} for row in rows]
+
+    async def vector_search(self, vector: List[float], limit: int, filters: SearchFilters | None = None) -> List[Dict]:
+        params = [to_vector_literal(vector), limit]
+        where = filter_sql(filters, params)
+        async with get_db() as conn:
+            rows = await conn.fetch(
+                f"""
+                SELECT {CHUNK_FIELDS}, embedding <=> $1::vector AS distance
+                FROM context_chunks
+                WHERE embedding IS NOT NULL AND {where}
+                ORDER BY embedding <=> $1::vector
+                LIMIT $2
+                """,
+                *params,
+            )
+        return [{**to_chunk(row), "distance": row["distance"]} for row in rows]
+
+    async def hybrid_search(
+        self,
+        query: str,
+        vector: List[float],
+        limit: int,
+        filters: SearchFilters | None = None,
+    ) -> List[Dict]:
+        """
+        One round trip: the HNSW and full-text candidate lists are each cut
+        to RETRIEVAL_CANDIDATES, thresholded, ranked and fused with the same
+        weighted reciprocal-rank formula retrieval uses for other backends.
+        """
+        params = [
+            self.text_config,
+            query,
+            to_vector_literal(vector),
+            RETRIEVAL_CANDIDATES,
+            RETRIEVAL_MAX_DISTANCE,
+            self.min_keyword_score,
+            RETRIEVAL_BM25_WEIGHT,
+            RETRIEVAL_VECTOR_WEIGHT,
+            RETRIEVAL_RRF_K,
+            limit,
+        ]
+        where = filter_sql(filters, params)
+        async with get_db() as conn:
+            rows = await conn.fetch(
+                f"""
+                WITH q AS (SELECT {TSQUERY} AS query),
+                semantic AS (
+                  SELECT source_id, row_number() OVER (ORDER BY distance) AS rank
+                  FROM (
+                    SELECT source_id, embedding <=> $3::vector AS distance
+                    FROM context_chunks
+                    WHERE embedding IS NOT NULL AND {where}
+                    ORDER BY embedding <=> $3::vector
+                    LIMIT $4
+                  ) nearest
+                  WHERE distance <= $5
+                ),
+                lexical AS (
+                  SELECT source_id, row_number() OVER (ORDER BY score DESC) AS rank
+                  FROM (
+                    SELECT source_id, ts_rank('{TEXT_RANK_WEIGHTS}', search_tsv, q.query) AS score
+                    FROM context_chunks, q
+                    WHERE search_tsv @@ q.query AND {where}
+                    ORDER BY score DESC
+                    LIMIT $4
+                  ) matched
+                  WHERE score >= $6
+                ),
+                fused AS (
+                  SELECT source_id, sum(rrf) AS rrf_score
+                  FROM (
+                    SELECT source_id, $7::float8 / ($9::int + rank) AS rrf FROM lexical
+                    UNION ALL
+                    SELECT source_id, $8::float8 / ($9::int + rank) AS rrf FROM semantic
+                  ) scored
+                  GROUP BY source_id
+                )
+                SELECT {", ".join(f"c.{field}" for field in CHUNK_FIELDS.split(", "))}, f.rrf_score
+                FROM fused f
+                JOIN context_chunks c USING (source_id)
+                ORDER BY f.rrf_score DESC
+                LIMIT $10
+                """,
+                *params,
+            )
+        return [{**to_chunk(row), "rrf_score": row["rrf_score"]} for row in rows]
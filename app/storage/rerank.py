@@ -0,0 +1,145 @@
+import asyncio
+import threading
+import time
+from typing import Dict, List
+
+import numpy as np
+
+from app.core.settings import (
+    RERANK_BATCH_SIZE,
+    RERANK_BUDGET_MS,
+    RERANK_LEXICAL_WEIGHT,
+    RERANK_MODE,
+    RERANK_MODEL,
+)
+from app.core.text import FIELD_WEIGHTS, tokenize
+
+RERANK_MODES = {"off", "lexical", "cross-encoder"}
+# saturation of repeated query terms, like BM25's k1
+OVERLAP_K = 1.2
+
+_model = None
+_model_lock = threading.Lock()
+_model_loading: asyncio.Task | None = None
+
+
+def lexical_scores(query: str, hits: List[Dict]) -> np.ndarray:
+    """
+    Query-term overlap per hit in [0, 1]: saturated term counts (fields
+    weighted as in the BM25 index) weighted by each term's IDF within the
+    candidate set, so terms that every candidate shares count for little.
+    """
+    terms = list(dict.fromkeys(tokenize(query)))
+    if not terms or not hits:
+        return np.zeros(len(hits), np.float32)
+
+    column = {term: col for col, term in enumerate(terms)}
+    tf = np.zeros((len(hits), len(terms)), np.float32)
+    for row, hit in enumerate(hits):
+        for field, weight in FIELD_WEIGHTS:
+            value = hit.get(field) or ""
+            for token in tokenize(" ".join(value) if isinstance(value, list) else value):
+                col = column.get(token)
+                if col is not None:
+                    tf[row, col] += weight
+
+    df = np.count_nonzero(tf, axis=0)
+    idf = np.log1p((len(hits) - df + 0.5) / (df + 0.5))
+    return (tf / (tf + OVERLAP_K)) @ idf / (idf.sum() or 1.0)
+
+
+def check_rerank_mode() -> None:
+    """Validates RERANK_MODE once at startup."""
+    if RERANK_MODE not in RERANK_MODES:
+        raise ValueError(f"Unknown rerank mode: {RERANK_MODE}")
+
+
+def fused_scores(hits: List[Dict]) -> np.ndarray:
+    """Fusion score per hit scaled to [0, 1]; rank-based when hits carry no rrf_score."""
+    scores = np.asarray(
+        [hit.get("rrf_score") or 1.0 / (rank + 1) for rank, hit in enumerate(hits)],
+        np.float32,
+    )
+    return scores / (scores.max() or 1.0)
+
+
+def blended_lexical_scores(query: str, hits: List[Dict], weight: float = RERANK_LEXICAL_WEIGHT) -> np.ndarray:
+    """
+    Lexical overlap blended into the fused ranking rather than replacing
+    it: a hit found by vector search alone shares few query terms but keeps
+    the weight of its fusion score.
+    """
+    return (1.0 - weight) * fused_scores(hits) + weight * lexical_scores(query, hits)
+
+
+def load_cross_encoder():
+    global _model
+    with _model_lock:
+        if _model is None:
+            try:
+                from sentence_transformers import CrossEncoder
+            except ImportError as ex:
+                raise RuntimeError("RERANK_MODE=cross-encoder needs the sentence-transformers package") from ex
+            _model = CrossEncoder(RERANK_MODEL, device="cpu")
+    return _model
+
+def cross_encoder_ready() -> bool:
+    """Starts loading the model in the background on first use; requests skip reranking until it is ready."""
+    global _model_loading
+    if _model is not None:
+        return True
+    if _model_loading is None:
+        _model_loading = asyncio.create_task(asyncio.to_thread(load_cross_encoder))
+        _model_loading.add_done_callback(_log_load_failure)
+    return False
+
+def _log_load_failure(task: asyncio.Task) -> None:
+    if not task.cancelled() and task.exception() is not None:
+        print("Rerank model failed to load, reranking stays off:", task.exception())
+
+def cross_encoder_scores(query: str, hits: List[Dict], deadline: float) -> np.ndarray | None:
+    """Scores (query, content) pairs in batches; None once `deadline` passes between batches."""
+    pairs = [(query, hit.get("content", "")) for hit in hits]
+    scores: List[float] = []
+    for start in range(0, len(pairs), RERANK_BATCH_SIZE):
+        if time.perf_counter() > deadline:
+            return None
+        batch = pairs[start:start + RERANK_BATCH_SIZE]
+        scores.extend(_model.predict(batch, batch_size=len(batch), show_progress_bar=False))
+    return np.asarray(scores, np.float32)
+
+
+async def rerank(query: str, hits: List[Dict], limit: int, budget_ms: float = RERANK_BUDGET_MS) -> List[Dict]:
+    """
+    Reorders fused hits by relevance to `query` and keeps `limit`, with
+    `rerank_score` set. If scoring fails or does not finish within
+    `budget_ms`, the stage is skipped and the fused order is kept.
+    """
+    if RERANK_MODE == "off" or len(hits) <= 1:
+        return hits[:limit]
+
+    started = time.perf_counter()
+    deadline = started + budget_ms / 1000
+    scores = None
+    try:
+        if RERANK_MODE == "lexical":
+            scores = blended_lexical_scores(query, hits)
+        elif cross_encoder_ready():
+            # the worker thread also stops between batches once the deadline passes
+            scores = await asyncio.wait_for(
+                asyncio.to_thread(cross_encoder_scores, query, hits, deadline),
+                timeout=budget_ms / 1000,
+            )
+    except asyncio.TimeoutError:
+        pass
+    except Exception as ex:
+        print("Rerank failed, keeping fused order:", ex)
+
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if scores is None:
+        print(f"RERANK skipped after {elapsed_ms:.1f} ms")
+        return hits[:limit]
+
+    order = np.argsort(-scores, kind="stable")[:limit]
+    print(f"RERANK {RERANK_MODE} candidates={len(hits)} kept={len(order)} ms={elapsed_ms:.1f}")
+    return [{**hits[row], "rerank_score": float(scores[row])} for row in order]
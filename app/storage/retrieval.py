@@ -0,0 +1,125 @@
+import asyncio
+from typing import Dict, List
+
+from app.core.settings import (
+    RETRIEVAL_BM25_WEIGHT,
+    RETRIEVAL_CANDIDATES,
+    RETRIEVAL_EXPAND_WEAK_QUERIES,
+    RETRIEVAL_LIMIT,
+    RETRIEVAL_MAX_DISTANCE,
+    RETRIEVAL_RRF_K,
+    RETRIEVAL_VECTOR_WEIGHT,
+    RERANK_CANDIDATES,
+    RERANK_MODE,
+)
+from app.services.embeddings import embed_query
+from app.services.models import SearchFilters
+from app.storage.context_builder import build_context_string
+from app.storage.manifest_repo import source_chunk_ids
+from app.storage.rerank import rerank
+from app.storage.search_backend import get_search_backend
+from app.storage.weaviate import expand_query, is_weak_query
+
+def reciprocal_rank_fusion(ranked_lists: List[tuple[List[Dict], float]], k: int = 60) -> List[Dict]:
+    """
+    Merges ranked result lists: each hit scores weight / (k + rank) per list
+    it appears in, and hits are returned best-first with `rrf_score` set.
+    """
+    fused: Dict[str, Dict] = {}
+    scores: Dict[str, float] = {}
+    for hits, weight in ranked_lists:
+        for rank, hit in enumerate(hits, start=1):
+            fused.setdefault(hit["id"], hit)
+            scores[hit["id"]] = scores.get(hit["id"], 0.0) + weight / (k + rank)
+
+    ordered = sorted(fused, key=lambda chunk_id: scores[chunk_id], reverse=True)
+    return [{**fused[chunk_id], "rrf_score": scores[chunk_id]} for chunk_id in ordered]
+
+async def query_vector(query: str) -> List[float] | None:
+    try:
+        return await embed_query(query)
+    except Exception as ex:
+        # keyword search still answers when the embedder is down
+        print("Query embedding failed, skipping vector search:", ex)
+        return None
+
+async def resolve_filters(filters: SearchFilters | None) -> SearchFilters | None:
+    """Turns `sources` (filenames) into chunk IDs; None when nothing is restricted."""
+    if filters is None:
+        return None
+    if not filters.sources:
+        if filters.source_types or filters.collections or filters.source_ids is not None:
+            return filters
+        return None
+
+    ids = await source_chunk_ids(filters.sources)
+    if filters.source_ids is not None:
+        allowed = set(filters.source_ids)
+        ids = [chunk_id for chunk_id in ids if chunk_id in allowed]
+    return filters.model_copy(update={"sources": [], "source_ids": ids})
+
+async def retrieve(
+    query: str,
+    limit: int = RETRIEVAL_LIMIT,
+    filters: SearchFilters | None = None,
+    vector: List[float] | None = None,
+) -> List[Dict]:
+    """Hybrid search for `query`; pass `vector` when the caller already embedded it."""
+    filters = await resolve_filters(filters)
+    if filters is not None and filters.source_ids == []:
+        print("RETRIEVAL no chunks match the source filter")
+        return []
+
+    keyword_query = query
+    if RETRIEVAL_EXPAND_WEAK_QUERIES and is_weak_query(query):
+        keyword_query = await expand_query(query)
+        print("EXPANDED QUERY ", keyword_query)
+
+    # the rerank stage picks `limit` hits from a longer fused list
+    candidates = limit if RERANK_MODE == "off" else max(limit, RERANK_CANDIDATES)
+
+    backend = get_search_backend()
+    if backend.supports_hybrid:
+        if vector is None:
+            vector = await query_vector(query)
+        if vector is not None:
+            fused = await backend.hybrid_search(keyword_query, vector, candidates, filters)
+            print(f"RETRIEVAL hybrid fused={len(fused)}")
+            return await rerank(query, fused, limit)
+
+    async def semantic_search():
+        if backend.supports_hybrid:
+            # only reached when the query could not be embedded
+            return []
+        query_embedding = vector if vector is not None else await query_vector(query)
+        if query_embedding is None:
+            return []
+        return await backend.vector_search(query_embedding, RETRIEVAL_CANDIDATES, filters)
+
+    bm25_results, semantic_results = await asyncio.gather(
+        backend.keyword_search(keyword_query, RETRIEVAL_CANDIDATES, filters),
+        semantic_search(),
+    )
+
+    bm25_hits = [
+        hit for hit in bm25_results
+        if hit["score"] is not None and hit["score"] >= backend.min_keyword_score
+    ]
+    semantic_hits = [
+        hit for hit in semantic_results
+        if hit["distance"] is not None and hit["distance"] <= RETRIEVAL_MAX_DISTANCE
+    ]
+
+    fused = reciprocal_rank_fusion(
+        [(bm25_hits, RETRIEVAL_BM25_WEIGHT), (semantic_hits, RETRIEVAL_VECTOR_WEIGHT)],
+        k=RETRIEVAL_RRF_K,
+    )
+    print(f"RETRIEVAL bm25={len(bm25_hits)} semantic={len(semantic_hits)} fused={len(fused)}")
+    return await rerank(query, fused[:candidates], limit)
+
+async def get_context(query: str, filters: SearchFilters | None = None) -> str:
+    chunks = await retrieve(query, filters=filters)
+    if not chunks:
+        return ""
+
+    return build_context_string(chunks)
@@ -0,0 +1,88 @@
+from typing import Dict, List
+
+from app.core.settings import RETRIEVAL_MIN_BM25_SCORE, VECTOR_BACKEND
+from app.services.models import ContextChunk, SearchFilters
+
+SEARCH_BACKENDS = {"weaviate", "pgvector", "local"}
+
+
+class SearchBackend:
+    """
+    Where chunks are indexed and searched. Search hits are chunk dicts
+    (id, content, keywords, source_type, page_number, typical_questions)
+    carrying `score` (BM25, higher is better) or `distance` (cosine, lower
+    is better). Searches only return chunks matching `filters` when given.
+    """
+
+    # keyword hits scoring below this are dropped before fusion
+    min_keyword_score: float = RETRIEVAL_MIN_BM25_SCORE
+    # the backend writes the context_chunks rows itself (no separate insert)
+    stores_chunk_rows: bool = False
+    # hybrid_search fuses keyword and vector hits in one call
+    supports_hybrid: bool = False
+
+    async def start(self) -> bool:
+        """Opens the index; True when it starts out empty."""
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        raise NotImplementedError
+
+    async def save(self, chunks: List[ContextChunk], vectors: List[List[float]]) -> None:
+        """Upserts chunks by source_id with their precomputed vectors."""
+        raise NotImplementedError
+
+    async def delete(self, source_ids: List[str]) -> None:
+        raise NotImplementedError
+
+    async def keyword_search(self, query: str, limit: int, filters: SearchFilters | None = None) -> List[Dict]:
+        raise NotImplementedError
+
+    async def vector_search(self, vector: List[float], limit: int, filters: SearchFilters | None = None) -> List[Dict]:
+        raise NotImplementedError
+
+    async def hybrid_search(
+        self,
+        query: str,
+        vector: List[float],
+        limit: int,
+        filters: SearchFilters | None = None,
+    ) -> List[Dict]:
+        """Keyword + vector hits fused by RRF, best first, with `rrf_score` set."""
+        raise NotImplementedError
+
+
+_backend: SearchBackend | None = None
+
+def create_search_backend(name: str = VECTOR_BACKEND) -> SearchBackend:
+    if name not in SEARCH_BACKENDS:
+        raise ValueError(f"Unknown vector backend: {name}")
+    if name == "local":
+        from app.storage.local_index import LocalBackend
+        return LocalBackend()
+    if name == "pgvector":
+        from app.storage.pgvector_backend import PgVectorBackend
+        return PgVectorBackend()
+    from app.storage.weaviate_backend import WeaviateBackend
+    return WeaviateBackend()
+
+async def init_search_backend() -> bool:
+    """Starts the configured backend; True when its index starts out empty."""
+    global _backend
+    if _backend is not None:
+        return False
+    backend = create_search_backend()
+    empty = await backend.start()
+    _backend = backend
+    return empty
+
+async def close_search_backend() -> None:
+    global _backend
+    if _backend is not None:
+        await _backend.close()
+        _backend = None
+
+def get_search_backend() -> SearchBackend:
+    if _backend is None:
+        raise RuntimeError("Search backend not initialized")
+    return _backend
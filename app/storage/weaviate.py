@@ -1,38 +1,68 @@
+import asyncio
 import re
-from typing import Dict, Iterable, List
+from typing import Dict, List
 import weaviate
-from weaviate.classes.query import MetadataQuery
-from app.core.settings import weaviate_client
-from app.services.models import ContextChunk
-from app.storage.db_helper import insert_context_chunks
+from weaviate.classes.query import Filter, MetadataQuery
+from app.core.cache import StatsCache
+from app.core.settings import (
+    EXPANSION_CACHE_EVICT_BATCH,
+    EXPANSION_CACHE_EVICT_EVERY,
+    EXPANSION_CACHE_MAX_ROWS,
+    EXPANSION_CACHE_PERSIST,
+    EXPANSION_CACHE_SIZE,
+    EXPANSION_CACHE_TTL,
+)
+from app.storage.weaviate_pool import get_weaviate
+from app.services.models import ContextChunk, SearchFilters
+from app.storage.expansion_repo import evict_expansions, get_expansion, save_expansion
+from app.storage.weaviate_schema import CONTEXT_COLLECTION, VECTOR_NAME, ensure_context_collection
 import httpx
 from typing import Optional
 
-# CONTEXT INSERTS
+_expansion_cache = StatsCache("query_expansion", maxsize=EXPANSION_CACHE_SIZE, ttl=EXPANSION_CACHE_TTL)
+_expansion_inflight: Dict[str, asyncio.Task] = {}
+# Postgres expansion writes since the last eviction pass
+_expansion_writes = 0
 
-async def save_chunks(incoming_chunks: Iterable[ContextChunk]) -> int:
-    create_chunks = list(incoming_chunks)
-    if not create_chunks:
-        return 0
+# CONTEXT INSERTS
 
-    # Weaviate insert
-    with weaviate_client() as client:
-        collection = client.collections.use("Context")
+def insert_weaviate_chunks(
+    chunks: List[ContextChunk],
+    vectors: List[List[float]],
+    collection_name: str = CONTEXT_COLLECTION,
+    vector_name: str | None = VECTOR_NAME,
+) -> None:
+    with get_weaviate() as client:
+        collection = client.collections.use(collection_name)
         with collection.batch.fixed_size(batch_size=200) as batch:
-            for chunk in create_chunks:
+            for chunk, vector in zip(chunks, vectors):
                 batch.add_object(
                     uuid=chunk.source_id,
+                    vector={vector_name: vector} if vector_name else vector,
                     properties={
                         "source_type": chunk.source_type,
                         "content": chunk.content,
                         "page_number": chunk.page_number,
                         "keywords": chunk.keywords,
                         "typical_questions": chunk.typical_questions,
+                        "collection": chunk.collection,
                     },
                 )
-    # Postgres insert
-    await insert_context_chunks(create_chunks)
-    return len(create_chunks)
+        failed = collection.batch.failed_objects
+        if failed:
+            raise RuntimeError(f"{len(failed)} of {len(chunks)} chunks failed to index: {failed[0].message}")
+
+def delete_weaviate_chunks(
+    source_ids: List[str],
+    collection_name: str = CONTEXT_COLLECTION,
+    batch_size: int = 1000,
+) -> None:
+    with get_weaviate() as client:
+        collection = client.collections.use(collection_name)
+        for start in range(0, len(source_ids), batch_size):
+            collection.data.delete_many(
+                where=Filter.by_id().contains_any(source_ids[start:start + batch_size])
+            )
 
 # HELPERS
 
@@ -40,47 +70,6 @@ def is_weak_query(query: str) -> bool:
     tokens = query.strip().split()
     return len(tokens) < 4 or len(query) < 30
 
-def get_chunk_content(chunk) -> str:
-    if isinstance(chunk, dict):
-        return chunk.get("content", "")
-    return getattr(chunk, "content", "")
-
-def normalize_text(text: str) -> str:
-    text = text.replace("\u2019", "'").replace("\u2014", "-")
-    text = re.sub(r"[ \t]+", " ", text)
-    text = re.sub(r"\n{3,}", "\n\n", text)
-    return text.strip()
-
-def merge_texts(base: str, addition: str) -> str:
-    if not base:
-        return addition
-    max_overlap = min(len(base), len(addition))
-    for i in range(max_overlap, 50, -1):
-        if base.endswith(addition[:i]):
-            return base + addition[i:]
-    return base + "\n\n" + addition
-
-def build_context_string(chunks: list) -> str:
-    context = ""
-    for chunk in chunks:
-        content = normalize_text(get_chunk_content(chunk))
-        if not content:
-            continue
-        context = merge_texts(context, content)
-    return context.strip()
-
-def build_context_with_metadata(chunks: list) -> str:
-    keywords = sorted({
-        kw for c in chunks for kw in (c.keywords if hasattr(c, "keywords") else c.get("keywords", []))
-    })
-    body = build_context_string(chunks)
-    return f"""SOURCE: document
-KEYWORDS: {", ".join(keywords)}
-
-CONTENT:
-{body}
-"""
-
 # LLM HELPERS
 
 # async def generate_ollama(
@@ -154,7 +143,7 @@ async def generate_ollama(
     data = res.json()
     return (data["choices"][0]["message"]["content"] or "").strip()
 
-async def expand_query(query: str) -> str:
+async def generate_query_expansion(query: str) -> str:
     prompt = f"""
 You are rewriting a user search query to slightly strengthen it for semantic search.
 
@@ -179,105 +168,115 @@ Rewritten query:
     )
     return expanded.strip() or query
 
+def normalize_query(query: str) -> str:
+    query = re.sub(r"[^\w\s]", " ", query.lower())
+    return re.sub(r"\s+", " ", query).strip()
 
-# CONTEXT RETRIEVAL
-
-async def get_context(query: str) -> str:
-    weak = is_weak_query(query)
-    print("IS WEAK QUERY: ", weak)
-
-    chunks: List[Dict] = []
-
-    if weak:
-        query = await expand_query(query)
-        print('EXPANDED QUERY ', query)
-        
-        # Keyword / hybrid path
-        result = keyword_search(query, limit=8)
-
-        for obj in result.objects:
-            print("CHUNK META", obj.metadata)
-            props = obj.properties or {}
-            print("CHUNK KEYWORDS", props.get("keywords", []))
-
-            if obj.metadata.score and obj.metadata.score >= 0.4:
-                chunks.append({
-                    "content": props.get("content", ""),
-                    "keywords": props.get("keywords", []),
-                    "source_type": props.get("source_type", "document"),
-                    "page_number": props.get("page_number", 0),
-                    "typical_questions": props.get("typical_questions", []),
-                })
-
-    else:
-        # Semantic path
-        semantic_chunks = get_context_semantic_quick(query, limit=5)
-
-        for obj in semantic_chunks.objects:
-            print("CHUNK META", obj.metadata)
-            props = obj.properties or {}
-            print("CHUNK KEYWORDS", props.get("keywords", []))
-
-            if obj.metadata.distance and obj.metadata.distance <= 0.45:
-                chunks.append({
-                    "content": props.get("content", ""),
-                    "keywords": props.get("keywords", []),
-                    "source_type": props.get("source_type", "document"),
-                    "page_number": props.get("page_number", 0),
-                    "typical_questions": props.get("typical_questions", []),
-                })
-
-    if not chunks:
-        return ""
-
-    return build_context_string(chunks)
-
-def keyword_search(query: str, limit: int = 5):
-    with weaviate_client() as client:
-        collection = client.collections.use("Context")
+async def expand_query(query: str) -> str:
+    key = normalize_query(query)
+    if not key:
+        return query
+
+    cached = _expansion_cache.get(key)
+    if cached is not None:
+        return cached
+
+    # concurrent sessions asking the same thing share one LLM call
+    task = _expansion_inflight.get(key)
+    if task is None:
+        task = asyncio.create_task(_load_expansion(key, query))
+        _expansion_inflight[key] = task
+        task.add_done_callback(lambda _: _expansion_inflight.pop(key, None))
+    return await asyncio.shield(task)
+
+async def _load_expansion(key: str, query: str) -> str:
+    if EXPANSION_CACHE_PERSIST:
+        try:
+            persisted = await get_expansion(key, EXPANSION_CACHE_TTL)
+        except Exception as ex:
+            print("Expansion cache read failed:", ex)
+            persisted = None
+        if persisted:
+            _expansion_cache.set(key, persisted)
+            return persisted
+
+    expanded = await generate_query_expansion(query)
+    _expansion_cache.set(key, expanded)
+
+    if EXPANSION_CACHE_PERSIST:
+        try:
+            await save_expansion(key, expanded)
+        except Exception as ex:
+            print("Expansion cache write failed:", ex)
+        else:
+            await _maybe_evict_expansions()
+    return expanded
+
+async def _maybe_evict_expansions() -> None:
+    global _expansion_writes
+    _expansion_writes += 1
+    if _expansion_writes < max(1, EXPANSION_CACHE_EVICT_EVERY):
+        return
+    _expansion_writes = 0
+    try:
+        await evict_expansions(EXPANSION_CACHE_TTL, EXPANSION_CACHE_MAX_ROWS, EXPANSION_CACHE_EVICT_BATCH)
+    except Exception as ex:
+        print("Expansion cache eviction failed:", ex)
+
+
+# SEARCH
+
+def search_filter(filters: SearchFilters | None):
+    """Weaviate where-filter for `filters`, or None when nothing is restricted."""
+    if filters is None:
+        return None
+    clauses = []
+    if filters.source_types:
+        clauses.append(Filter.by_property("source_type").contains_any(filters.source_types))
+    if filters.collections:
+        clauses.append(Filter.by_property("collection").contains_any(filters.collections))
+    if filters.source_ids is not None:
+        clauses.append(Filter.by_id().contains_any(filters.source_ids))
+    if not clauses:
+        return None
+    return clauses[0] if len(clauses) == 1 else Filter.all_of(clauses)
+
+def keyword_search(
+    query: str,
+    limit: int = 5,
+    collection_name: str = CONTEXT_COLLECTION,
+    filters: SearchFilters | None = None,
+):
+    with get_weaviate() as client:
+        collection = client.collections.use(collection_name)
         response = collection.query.bm25(
             query=query,
             limit=limit,
             query_properties=["keywords^2", "typical_questions", "content"],
+            filters=search_filter(filters),
             return_metadata=MetadataQuery(score=True),
         )
         return response
 
-def get_context_semantic_quick(query: str, limit: int = 5):
-    with weaviate_client() as client:
-        collection = client.collections.use("Context")
-        response = collection.query.near_text(
-            query=query,
+def vector_search(
+    vector: List[float],
+    limit: int = 5,
+    collection_name: str = CONTEXT_COLLECTION,
+    vector_name: str | None = VECTOR_NAME,
+    filters: SearchFilters | None = None,
+):
+    with get_weaviate() as client:
+        collection = client.collections.use(collection_name)
+        response = collection.query.near_vector(
+            near_vector=vector,
+            target_vector=vector_name,
             limit=limit,
+            filters=search_filter(filters),
             return_metadata=MetadataQuery(distance=True)
         )
         return response
 
 
-import weaviate
-from weaviate.classes.config import Property, DataType, Configure
-
-def init_weaviate(client: weaviate.WeaviateClient) -> None:
-    existing = {c.name for c in client.collections.list_all().values()}
-
-    if "Context" in existing:
-        client.collections.delete("Context")
-        existing = {c.name for c in client.collections.list_all().values()}
-
-    if "Context" in existing:
-        return
-
-    client.collections.create(
-        name="Context",
-        properties=[
-            Property(name="source_type", data_type=DataType.TEXT),
-            Property(name="content", data_type=DataType.TEXT),
-            Property(name="page_number", data_type=DataType.INT),
-            Property(name="keywords", data_type=DataType.TEXT_ARRAY),
-            Property(name="typical_questions", data_type=DataType.TEXT_ARRAY),
-        ],
-        vectorizer_config=Configure.Vectorizer.text2vec_ollama(
-            api_endpoint="http://ollama:11434",
-            model="nomic-embed-text",
-        ),
-    )
+def init_weaviate(client: weaviate.WeaviateClient, collection_name: str = CONTEXT_COLLECTION, rebuild: bool = False) -> bool:
+    """Creates or migrates the collection (drops it first only with `rebuild`); True when it starts out empty."""
+    return ensure_context_collection(client, rebuild=rebuild, name=collection_name)
@@ -0,0 +1,60 @@
+from typing import Dict, List
+
+from app.core.settings import WEAVIATE_REBUILD
+from app.services.models import DEFAULT_COLLECTION, ContextChunk, SearchFilters
+from app.storage.search_backend import SearchBackend
+from app.storage.weaviate import (
+    delete_weaviate_chunks,
+    init_weaviate,
+    insert_weaviate_chunks,
+    keyword_search,
+    vector_search,
+)
+from app.storage.weaviate_pool import close_weaviate_pool, get_weaviate, init_weaviate_pool, run_weaviate
+from app.storage.weaviate_schema import CONTEXT_COLLECTION, VECTOR_NAME, collection_vector_name
+
+
+def to_chunk(obj) -> Dict:
+    props = obj.properties or {}
+    return {
+        "id": str(obj.uuid),
+        "content": props.get("content", ""),
+        "keywords": props.get("keywords", []),
+        "source_type": props.get("source_type", "document"),
+        "page_number": props.get("page_number", 0),
+        "typical_questions": props.get("typical_questions", []),
+        "collection": props.get("collection") or DEFAULT_COLLECTION,
+    }
+
+
+class WeaviateBackend(SearchBackend):
+    """Chunks in a Weaviate collection, called through the pooled clients."""
+
+    def __init__(self, collection_name: str = CONTEXT_COLLECTION, rebuild: bool = WEAVIATE_REBUILD):
+        self.collection_name = collection_name
+        self.rebuild = rebuild
+        self.vector_name: str | None = VECTOR_NAME
+
+    async def start(self) -> bool:
+        init_weaviate_pool()
+        with get_weaviate() as client:
+            empty = init_weaviate(client, self.collection_name, rebuild=self.rebuild)
+            self.vector_name = collection_vector_name(client, self.collection_name)
+        return empty
+
+    async def close(self) -> None:
+        close_weaviate_pool()
+
+    async def save(self, chunks: List[ContextChunk], vectors: List[List[float]]) -> None:
+        await run_weaviate(insert_weaviate_chunks, chunks, vectors, self.collection_name, self.vector_name)
+
+    async def delete(self, source_ids: List[str]) -> None:
+        await run_weaviate(delete_weaviate_chunks, source_ids, self.collection_name)
+
+    async def keyword_search(self, query: str, limit: int, filters: SearchFilters | None = None) -> List[Dict]:
+        result = await run_weaviate(keyword_search, query, limit, self.collection_name, filters)
+        return [{**to_chunk(obj), "score": obj.metadata.score} for obj in result.objects]
+
+    async def vector_search(self, vector: List[float], limit: int, filters: SearchFilters | None = None) -> List[Dict]:
+        result = await run_weaviate(vector_search, vector, limit, self.collection_name, self.vector_name, filters)
+        return [{**to_chunk(obj), "distance": obj.metadata.distance} for obj in result.objects]
@@ -0,0 +1,163 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from queue import Empty, LifoQueue
+
+import weaviate
+
+from app.core.settings import (
+    WEAVIATE_HEALTHCHECK_INTERVAL,
+    WEAVIATE_POOL_SIZE,
+    WEAVIATE_POOL_TIMEOUT,
+    weaviate_client,
+)
+
+
+class WeaviateClientManager:
+    """
+    Keeps up to `size` connected clients warm and hands them out one caller
+    at a time. Idle clients are health-checked before reuse and replaced if
+    the connection has gone away.
+    """
+
+    def __init__(self, size: int, acquire_timeout: float, healthcheck_interval: float):
+        self.size = size
+        self.acquire_timeout = acquire_timeout
+        self.healthcheck_interval = healthcheck_interval
+        self._idle: LifoQueue = LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._last_checked: dict[int, float] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def start(self) -> None:
+        for _ in range(self.size):
+            self._idle.put(self._connect())
+
+    def close(self) -> None:
+        self._closed = True
+        while True:
+            try:
+                client = self._idle.get_nowait()
+            except Empty:
+                break
+            self._close_client(client)
+
+    @contextmanager
+    def client(self):
+        if self._closed:
+            raise RuntimeError("Weaviate pool is closed")
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            raise TimeoutError("Timed out waiting for a Weaviate connection")
+
+        client: weaviate.WeaviateClient | None = None
+        try:
+            client = self._checkout()
+            yield client
+        except Exception:
+            # force a health check before this client is handed out again
+            if client is not None:
+                with self._lock:
+                    self._last_checked[id(client)] = 0.0
+            raise
+        finally:
+            if client is not None:
+                if self._closed:
+                    self._close_client(client)
+                else:
+                    self._idle.put(client)
+            self._slots.release()
+
+    def _checkout(self) -> weaviate.WeaviateClient:
+        try:
+            client = self._idle.get_nowait()
+        except Empty:
+            return self._connect()
+
+        if self._is_healthy(client):
+            return client
+
+        print("[WARN] Weaviate connection unhealthy - reconnecting ...")
+        self._close_client(client)
+        return self._connect()
+
+    def _is_healthy(self, client: weaviate.WeaviateClient) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            last = self._last_checked.get(id(client), 0.0)
+        if now - last < self.healthcheck_interval:
+            return True
+        try:
+            healthy = client.is_connected() and client.is_ready()
+        except Exception:
+            healthy = False
+        if healthy:
+            with self._lock:
+                self._last_checked[id(client)] = now
+        return healthy
+
+    def _connect(self) -> weaviate.WeaviateClient:
+        client = weaviate_client()
+        with self._lock:
+            self._last_checked[id(client)] = time.monotonic()
+        return client
+
+    def _close_client(self, client: weaviate.WeaviateClient) -> None:
+        with self._lock:
+            self._last_checked.pop(id(client), None)
+        try:
+            client.close()
+        except Exception as ex:
+            print("Weaviate close failed:", ex)
+
+
+_manager: WeaviateClientManager | None = None
+# One worker per pooled client, so a queued call never waits on the pool
+# while holding a thread.
+_executor: ThreadPoolExecutor | None = None
+
+def init_weaviate_pool() -> WeaviateClientManager:
+    global _manager, _executor
+    if _manager is None:
+        _manager = WeaviateClientManager(
+            size=WEAVIATE_POOL_SIZE,
+            acquire_timeout=WEAVIATE_POOL_TIMEOUT,
+            healthcheck_interval=WEAVIATE_HEALTHCHECK_INTERVAL,
+        )
+        _manager.start()
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=WEAVIATE_POOL_SIZE,
+            thread_name_prefix="weaviate",
+        )
+    return _manager
+
+def close_weaviate_pool() -> None:
+    global _manager, _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+    if _manager is not None:
+        _manager.close()
+        _manager = None
+
+async def run_weaviate(fn, *args, **kwargs):
+    """
+    Runs a blocking Weaviate call on the bounded executor so the event loop
+    keeps serving other sessions while it waits on the network.
+    """
+    if _executor is None:
+        raise RuntimeError("Weaviate pool not initialized")
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_executor, partial(fn, *args, **kwargs))
+
+@contextmanager
+def get_weaviate():
+    if _manager is None:
+        raise RuntimeError("Weaviate pool not initialized")
+
+    with _manager.client() as client:
+        yield client
@@ -0,0 +1,166 @@
+import re
+from typing import List
+
+import weaviate
+from weaviate.classes.config import Configure, DataType, Property, Tokenization
+
+from app.core.settings import EMBEDDING_BACKEND, EMBEDDING_MODEL, OLLAMA_URL
+from app.services.models import DEFAULT_COLLECTION
+
+CONTEXT_COLLECTION = "Context"
+VECTOR_NAME = "default"
+
+# Bump when context_properties() changes. Added properties are migrated in
+# place on startup; anything else (renames, type or vectorizer changes)
+# needs an explicit rebuild with WEAVIATE_REBUILD=true.
+SCHEMA_VERSION = 2
+_VERSION_TAG = re.compile(r"schema v(\d+)")
+
+# values written to existing objects when a property is added in place
+PROPERTY_BACKFILL = {"collection": DEFAULT_COLLECTION}
+
+
+def context_properties() -> List[Property]:
+    return [
+        Property(name="source_type", data_type=DataType.TEXT),
+        Property(name="content", data_type=DataType.TEXT),
+        Property(name="page_number", data_type=DataType.INT),
+        Property(name="keywords", data_type=DataType.TEXT_ARRAY),
+        Property(name="typical_questions", data_type=DataType.TEXT_ARRAY),
+        # filter-only: exact-match tokens, not part of BM25 or the vectorizer input
+        Property(
+            name="collection",
+            data_type=DataType.TEXT,
+            tokenization=Tokenization.FIELD,
+            index_searchable=False,
+            skip_vectorization=True,
+        ),
+    ]
+
+
+def schema_description(version: int = SCHEMA_VERSION) -> str:
+    return f"Ingested context chunks (schema v{version})"
+
+
+def schema_version(description: str | None) -> int:
+    """Version recorded in the collection description; 0 for collections created before versioning."""
+    match = _VERSION_TAG.search(description or "")
+    return int(match.group(1)) if match else 0
+
+
+def collection_vector_name(client: weaviate.WeaviateClient, name: str = CONTEXT_COLLECTION) -> str | None:
+    """Named vector to write and query; None for collections created with the legacy single-vectorizer config."""
+    config = client.collections.use(name).config.get()
+    return next(iter(config.vector_config), None) if config.vector_config else None
+
+
+def context_vector_config():
+    # vectors are supplied by the app; with Ollama the collection keeps a
+    # matching vectorizer so objects written without a vector still embed
+    if EMBEDDING_BACKEND == "ollama":
+        return Configure.Vectors.text2vec_ollama(
+            name=VECTOR_NAME,
+            api_endpoint=OLLAMA_URL,
+            model=EMBEDDING_MODEL,
+        )
+    return Configure.Vectors.self_provided(name=VECTOR_NAME)
+
+
+def create_context_collection(client: weaviate.WeaviateClient, name: str = CONTEXT_COLLECTION) -> None:
+    client.collections.create(
+        name=name,
+        description=schema_description(),
+        properties=context_properties(),
+        vector_config=context_vector_config(),
+        generative_config=Configure.Generative.ollama(
+            api_endpoint=OLLAMA_URL,
+            model="llama3.2",
+        ),
+    )
+
+
+def migrate_context_collection(client: weaviate.WeaviateClient, name: str = CONTEXT_COLLECTION) -> int:
+    """
+    Brings an existing collection up to SCHEMA_VERSION without touching its
+    objects: missing properties are added and the version is recorded in
+    the description. Returns the version found before migrating.
+    """
+    collection = client.collections.use(name)
+    config = collection.config.get()
+    found = schema_version(config.description)
+    if found > SCHEMA_VERSION:
+        print(f"[WARN] {name} is at schema v{found}, newer than this app (v{SCHEMA_VERSION})")
+        return found
+
+    existing = {prop.name: prop.data_type for prop in config.properties}
+    for prop in context_properties():
+        if prop.name not in existing:
+            print(f"Adding property {name}.{prop.name}")
+            collection.config.add_property(prop)
+            if prop.name in PROPERTY_BACKFILL:
+                filled = backfill_property(
+                    collection,
+                    prop.name,
+                    PROPERTY_BACKFILL[prop.name],
+                    collection_vector_name(client, name),
+                )
+                print(f"Set {name}.{prop.name} on {filled} existing objects")
+        elif existing[prop.name] != prop.dataType:
+            print(
+                f"[WARN] {name}.{prop.name} is {existing[prop.name].value}, "
+                f"expected {prop.dataType.value}; set WEAVIATE_REBUILD=true to rebuild"
+            )
+
+    if found != SCHEMA_VERSION:
+        collection.config.update(description=schema_description())
+        print(f"Migrated {name} schema v{found} -> v{SCHEMA_VERSION}")
+    return found
+
+
+def backfill_property(collection, prop_name: str, value, vector_name: str | None = VECTOR_NAME, batch_size: int = 200) -> int:
+    """
+    Writes `value` to objects that lack the property. Objects are re-imported
+    through the batch API with their own UUID, properties and vector, so the
+    backfill costs one request per `batch_size` objects instead of one each.
+    """
+    filled = 0
+    with collection.batch.fixed_size(batch_size=batch_size) as batch:
+        for obj in collection.iterator(include_vector=True):
+            props = obj.properties or {}
+            if props.get(prop_name) is not None:
+                continue
+            vector = (obj.vector or {}).get(vector_name or "default")
+            batch.add_object(
+                uuid=obj.uuid,
+                properties={**props, prop_name: value},
+                vector={vector_name: vector} if vector_name and vector is not None else vector,
+            )
+            filled += 1
+    failed = collection.batch.failed_objects
+    if failed:
+        raise RuntimeError(f"{len(failed)} of {filled} objects failed to backfill {prop_name}: {failed[0].message}")
+    return filled
+
+
+def ensure_context_collection(
+    client: weaviate.WeaviateClient,
+    rebuild: bool = False,
+    name: str = CONTEXT_COLLECTION,
+) -> bool:
+    """
+    Creates the Context collection if it is missing, migrates it in place
+    otherwise, and only drops it when `rebuild` is set. Returns True when
+    the collection was (re)created empty.
+    """
+    exists = client.collections.exists(name)
+    if exists and rebuild:
+        print(f"Rebuilding {name} collection (all vectors are dropped)")
+        client.collections.delete(name)
+        exists = False
+
+    if not exists:
+        create_context_collection(client, name)
+        return True
+
+    migrate_context_collection(client, name)
+    return False
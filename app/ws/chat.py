@@ -1,7 +1,14 @@
-from typing import Any
+import json
+from typing import Any, Awaitable, Callable
 
-from app.storage.weaviate import get_context
-from app.services.chatgpt import generate_reply
+from app.core.settings import SEMANTIC_CACHE_ENABLED
+from app.core.tokens import count_tokens
+from app.storage.retrieval import query_vector, retrieve
+from app.storage.context_builder import build_context_string
+from app.services.answer_cache import answer_cache, history_key, to_unit_vector
+from app.services.chatgpt import generate_reply, stream_reply
+from app.services.models import SearchFilters
+from app.services.prompt_budget import PromptBudget, fit_prompt
 from app.storage.chat_repo import get_session_messages, save_message
 
 
@@ -23,11 +30,33 @@ Rules:
 
 
 
-async def handle_chat_message(session_id: str, textIn: str) -> dict[str, Any]:
+def parse_chat_message(raw: str) -> tuple[str, SearchFilters | None]:
+    """
+    A chat message is plain text, or JSON {"text": ..., "filters": {...}}
+    to narrow retrieval. Raises ValueError for malformed filters.
+    """
+    if not raw.lstrip().startswith("{"):
+        return raw, None
+    try:
+        data = json.loads(raw)
+    except ValueError:
+        return raw, None
+    if not isinstance(data, dict) or not isinstance(data.get("text"), str):
+        return raw, None
+
+    filters = data.get("filters")
+    return data["text"], SearchFilters.model_validate(filters) if filters else None
+
+
+async def handle_chat_message(
+    session_id: str,
+    textIn: str,
+    on_delta: Callable[[str], Awaitable[None]] | None = None,
+    filters: SearchFilters | None = None,
+) -> dict[str, Any]:
     await save_message(session_id, "user", textIn)
 
     history = await get_session_messages(session_id)    
-    conversation = [{"role": "system", "content": BASE_SYSTEM_PROMPT}] + history
     
     query = [textIn]    
     if len(history) >= 2:
@@ -40,34 +69,69 @@ async def handle_chat_message(session_id: str, textIn: str) -> dict[str, Any]:
 
     print('textIn ', textIn)
     print('query ', query_string)
-    context = await get_context(query_string)
+    # one embedding of the retrieval query serves both vector search and the answer cache
+    cache_version = answer_cache.version
+    vector = await query_vector(query_string)
+    chunks = await retrieve(query_string, filters=filters, vector=vector)
+    cache_vector = to_unit_vector(vector) if SEMANTIC_CACHE_ENABLED and vector is not None else None
+    # the reply depends on every earlier turn in the prompt, not just this message
+    cache_history = history_key(history[:-1])
+    budget = PromptBudget()
+    context = build_context_string(chunks, token_budget=budget.context_tokens) if chunks else ""
+    chunk_ids = [c["id"] for c in chunks]
     print("\n\nCONTEXT:", context)
 
     if context:
-        conversation.insert(
-            1,
-                {
-                    "role": "system",
-                    "content": f"""
+        context_message = {
+            "role": "system",
+            "content": f"""
                 Use the following information to answer the user's question.
 
                 {context}
 
                 """,
-                },
-        )
+        }
     else:
-        conversation.insert(
-            1,
-            {
-                "role": "system",
-                "content": """
+        context_message = {
+            "role": "system",
+            "content": """
     No relevant context was found! Do not respond to the user's question. Only keep the conversation flowing by asking the user more questions in order to get to a context hit.
 
     """,
-            },
-        )
-    bot_reply = await generate_reply(conversation)
+        }
+
+    conversation, token_metrics = fit_prompt(
+        {"role": "system", "content": BASE_SYSTEM_PROMPT},
+        context_message,
+        history,
+        budget,
+    )
+    print("PROMPT TOKENS", token_metrics)
+
+    cached_reply = None
+    if cache_vector is not None and chunk_ids:
+        cached_reply = answer_cache.lookup(cache_vector, chunk_ids, cache_history)
+
+    if cached_reply is not None:
+        print("SEMANTIC CACHE HIT")
+        bot_reply = cached_reply
+        if on_delta is not None:
+            await on_delta(bot_reply)
+    elif on_delta is None:
+        bot_reply = await generate_reply(conversation)
+    else:
+        # forward tokens as they arrive, persist the assembled reply below
+        parts: list[str] = []
+        async for token in stream_reply(conversation):
+            parts.append(token)
+            await on_delta(token)
+        bot_reply = "".join(parts)
+
+    # only grounded replies are reusable; small talk depends on the session
+    if cached_reply is None and cache_vector is not None and chunk_ids and bot_reply:
+        answer_cache.store(cache_vector, chunk_ids, bot_reply, cache_version, cache_history)
+
+    token_metrics["reply"] = count_tokens(bot_reply)
 
     await save_message(session_id, "assistant", bot_reply)
 
@@ -76,4 +140,5 @@ async def handle_chat_message(session_id: str, textIn: str) -> dict[str, Any]:
         "userMessage": textIn,
         "botReply": bot_reply,
         "previousMessages": history + [{"role": "assistant", "content": bot_reply}],
+        "tokens": token_metrics,
     }
@@ -1,28 +1,36 @@
 """
 This script will DELETE ALL CONTEXT DATA
-- Weaviate vectors
+- Weaviate vectors (or the local index with VECTOR_BACKEND=local; with
+  VECTOR_BACKEND=pgvector they live in context_chunks)
 - Postgres chat + chunk tables
 
+The enrichment_cache table is kept, so reloading the same documents does
+not call the LLM again.
+
 Run manually only.
 """
 
 import asyncio
+import shutil
 import weaviate
-from weaviate.classes.config import Configure, Property, DataType
 import asyncpg
 import os
 
+from app.core.settings import LOCAL_INDEX_DIR, VECTOR_BACKEND
+from app.storage.weaviate_schema import CONTEXT_COLLECTION, create_context_collection
+
 POSTGRES_DSN = os.getenv(
     "DATABASE_URL",
     "postgresql://postgres:postgres@db:5432/postgres",
 )
 
-WEAVIATE_OLLAMA_ENDPOINT = "http://ollama:11434"
-WEAVIATE_COLLECTION = "Context"
+WEAVIATE_COLLECTION = CONTEXT_COLLECTION
 
 POSTGRES_TABLES = [
     "context_chunks",
     "chat_messages",
+    "ingest_manifest_pages",
+    "ingest_manifests",
 ]
 
 # POSTGRES WIPE
@@ -51,33 +59,24 @@ def wipe_weaviate():
         except Exception:
             print(" - Collection did not exist")
 
-        client.collections.create(
-            name="Context",
-            properties=[
-                Property(name="source_type", data_type=DataType.TEXT),
-                Property(name="content", data_type=DataType.TEXT),
-                Property(name="page_number", data_type=DataType.INT),
-                Property(name="keywords", data_type=DataType.TEXT_ARRAY),
-                Property(name="typical_questions", data_type=DataType.TEXT_ARRAY),
-            ],
-            vector_config=Configure.Vectors.text2vec_ollama(
-                api_endpoint="http://ollama:11434",
-                model="nomic-embed-text",
-            ),
-            generative_config=Configure.Generative.ollama(
-                api_endpoint="http://ollama:11434",
-                model="llama3.2",
-            ),
-        )
-
+        create_context_collection(client)
 
     print(">> Weaviate reset")
 
 
+def wipe_local_index():
+    print(f"Wiping local index at {LOCAL_INDEX_DIR}...")
+    shutil.rmtree(LOCAL_INDEX_DIR, ignore_errors=True)
+    print(">> Local index wiped")
+
+
 
 async def main():
     print("\nTHIS WILL DELETE ALL DATA\n")
-    wipe_weaviate()
+    if VECTOR_BACKEND == "local":
+        wipe_local_index()
+    elif VECTOR_BACKEND == "weaviate":
+        wipe_weaviate()
     await wipe_postgres()
     print("\nFULL WIPE COMPLETE\n")
 
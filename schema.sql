@@ -9,12 +9,130 @@ CREATE TABLE IF NOT EXISTS chat_messages (
 CREATE INDEX IF NOT EXISTS idx_chat_session
 ON chat_messages (session_id, created_at);
 
+-- latest-N and keyset pagination scan this backwards
+CREATE INDEX IF NOT EXISTS idx_chat_session_recent
+ON chat_messages (session_id, created_at DESC, id DESC);
+
 CREATE TABLE IF NOT EXISTS context_chunks (
   source_id TEXT PRIMARY KEY,
   source_type TEXT NOT NULL,
   content TEXT NOT NULL,
   page_number INTEGER,
-  keywords TEXT NOT NULL,
-  typical_questions TEXT NOT NULL,
+  keywords TEXT[] NOT NULL DEFAULT '{}',
+  typical_questions TEXT[] NOT NULL DEFAULT '{}',
   created_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
 );
+
+-- keywords / typical_questions used to be joined strings
+DO $$
+BEGIN
+  IF (
+    SELECT data_type FROM information_schema.columns
+    WHERE table_name = 'context_chunks' AND column_name = 'keywords'
+  ) = 'text' THEN
+    ALTER TABLE context_chunks
+      ALTER COLUMN keywords DROP DEFAULT,
+      ALTER COLUMN typical_questions DROP DEFAULT;
+    ALTER TABLE context_chunks
+      ALTER COLUMN keywords TYPE TEXT[]
+        USING COALESCE(string_to_array(NULLIF(keywords, ''), ', '), '{}'),
+      ALTER COLUMN typical_questions TYPE TEXT[]
+        USING COALESCE(string_to_array(NULLIF(typical_questions, ''), E'\n- '), '{}');
+    ALTER TABLE context_chunks
+      ALTER COLUMN keywords SET DEFAULT '{}',
+      ALTER COLUMN typical_questions SET DEFAULT '{}';
+  END IF;
+END $$;
+
+-- document set / tenant a chunk belongs to, for filtered retrieval
+ALTER TABLE context_chunks ADD COLUMN IF NOT EXISTS collection TEXT NOT NULL DEFAULT 'default';
+
+CREATE INDEX IF NOT EXISTS idx_context_chunks_filter
+ON context_chunks (collection, source_type);
+
+-- source_type-only filters (pgvector and Postgres searches without a collection)
+CREATE INDEX IF NOT EXISTS idx_context_chunks_source_type
+ON context_chunks (source_type);
+
+CREATE TABLE IF NOT EXISTS query_expansions (
+  query_key TEXT PRIMARY KEY,
+  expanded TEXT NOT NULL,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- eviction walks the oldest rows in (created_at, query_key) order
+CREATE INDEX IF NOT EXISTS idx_query_expansions_age
+ON query_expansions (created_at, query_key);
+
+CREATE TABLE IF NOT EXISTS ingest_jobs (
+  id UUID PRIMARY KEY,
+  kind TEXT NOT NULL,
+  filename TEXT,
+  file_path TEXT NOT NULL,
+  status TEXT NOT NULL DEFAULT 'queued' CHECK (status IN ('queued', 'running', 'completed', 'failed')),
+  stage TEXT NOT NULL DEFAULT 'queued',
+  pages_parsed INTEGER NOT NULL DEFAULT 0,
+  chunks_enriched INTEGER NOT NULL DEFAULT 0,
+  chunks_stored INTEGER NOT NULL DEFAULT 0,
+  result TEXT,
+  error TEXT,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+CREATE INDEX IF NOT EXISTS idx_ingest_jobs_status
+ON ingest_jobs (status, created_at);
+
+ALTER TABLE ingest_jobs ADD COLUMN IF NOT EXISTS pages_skipped INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE ingest_jobs ADD COLUMN IF NOT EXISTS chunks_skipped INTEGER NOT NULL DEFAULT 0;
+ALTER TABLE ingest_jobs ADD COLUMN IF NOT EXISTS collection TEXT NOT NULL DEFAULT 'default';
+ALTER TABLE ingest_jobs ADD COLUMN IF NOT EXISTS document_id TEXT;
+-- process holding the job and when it last renewed its claim
+ALTER TABLE ingest_jobs ADD COLUMN IF NOT EXISTS claimed_by TEXT;
+ALTER TABLE ingest_jobs ADD COLUMN IF NOT EXISTS claimed_at TIMESTAMPTZ;
+
+-- what each uploaded file produced last time, for incremental re-ingest
+CREATE TABLE IF NOT EXISTS ingest_manifests (
+  source_type TEXT NOT NULL,
+  file_key TEXT NOT NULL,
+  file_hash TEXT NOT NULL,
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  PRIMARY KEY (source_type, file_key)
+);
+
+CREATE TABLE IF NOT EXISTS ingest_manifest_pages (
+  source_type TEXT NOT NULL,
+  file_key TEXT NOT NULL,
+  page_number INTEGER NOT NULL,
+  page_hash TEXT NOT NULL,
+  chunk_ids TEXT[] NOT NULL DEFAULT '{}',
+  PRIMARY KEY (source_type, file_key, page_number),
+  FOREIGN KEY (source_type, file_key) REFERENCES ingest_manifests ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS idx_manifest_pages_chunks
+ON ingest_manifest_pages USING GIN (chunk_ids);
+
+-- file_key is the client's document_id, or the file hash without one, prefixed
+-- with the collection outside the default one; filename is kept as uploaded so
+-- retrieval can filter by source file
+ALTER TABLE ingest_manifests ADD COLUMN IF NOT EXISTS collection TEXT NOT NULL DEFAULT 'default';
+ALTER TABLE ingest_manifests ADD COLUMN IF NOT EXISTS filename TEXT;
+UPDATE ingest_manifests SET filename = file_key WHERE filename IS NULL;
+
+CREATE INDEX IF NOT EXISTS idx_ingest_manifests_filename
+ON ingest_manifests (filename);
+
+-- keyword/question enrichment results, reused across re-ingests and reloads
+CREATE TABLE IF NOT EXISTS enrichment_cache (
+  cache_key TEXT PRIMARY KEY,
+  keywords TEXT[] NOT NULL DEFAULT '{}',
+  questions TEXT[] NOT NULL DEFAULT '{}',
+  created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  last_used TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+-- eviction walks the oldest rows in (last_used, cache_key) order
+DROP INDEX IF EXISTS idx_enrichment_cache_last_used;
+CREATE INDEX IF NOT EXISTS idx_enrichment_cache_lru
+ON enrichment_cache (last_used, cache_key);
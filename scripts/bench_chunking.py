@@ -0,0 +1,91 @@
+"""
+Chunker benchmark: throughput, chunk count and boundary quality for each
+strategy in app.ingestion.chunking on a large corpus. "fixed" is the
+original 1200/200 character window chunker. Exits non-zero if any chunk is
+over its strategy's size budget.
+
+    PYTHONPATH=. python scripts/bench_chunking.py                 # synthetic ~20 MB corpus
+    PYTHONPATH=. python scripts/bench_chunking.py docs/*.txt      # your own text files
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+from app.core.tokens import count_tokens
+from app.ingestion.chunking import chunk_text, len_size
+from app.ingestion.config import CHUNK_MAX_CHARS, CHUNK_MAX_TOKENS
+
+WORDS = (
+    "the a customer plan pricing refund policy account support hours weekend "
+    "delivery order invoice contract renewal premium standard service team "
+    "request response warranty device setup install configure payment monthly"
+).split()
+
+
+def synthetic_corpus(target_mb: float, seed: int = 7) -> list[str]:
+    rng = random.Random(seed)
+    docs, size = [], 0
+    while size < target_mb * 1_000_000:
+        paragraphs = []
+        for _ in range(rng.randint(3, 12)):
+            sentences = [
+                " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 30))).capitalize() + rng.choice(".!?")
+                for _ in range(rng.randint(2, 8))
+            ]
+            paragraphs.append(" ".join(sentences))
+        doc = "\n\n".join(paragraphs)
+        docs.append(doc)
+        size += len(doc)
+    return docs
+
+
+def bench(docs: list[str], strategy: str) -> dict:
+    started = time.perf_counter()
+    chunks = [c for doc in docs for c in chunk_text(doc, strategy=strategy, heading="Section")]
+    elapsed = time.perf_counter() - started
+
+    total_chars = sum(len(d) for d in docs)
+    cut = sum(1 for c in chunks if c.rstrip()[-1:] not in {".", "!", "?", '"', "'", ")"})
+    tokens = [count_tokens(c) for c in chunks[:2000]]
+    size, budget = (len_size, CHUNK_MAX_CHARS) if strategy in {"fixed", "sentence"} else (count_tokens, CHUNK_MAX_TOKENS)
+    over = sum(1 for c in chunks if size(c) > budget)
+    return {
+        "strategy": strategy,
+        "chunks": len(chunks),
+        "mb_s": total_chars / 1_000_000 / elapsed,
+        "avg_tokens": sum(tokens) / len(tokens) if tokens else 0,
+        "max_tokens": max(tokens) if tokens else 0,
+        "cut_pct": 100 * cut / len(chunks) if chunks else 0,
+        "over_budget": over,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("files", nargs="*", type=Path)
+    parser.add_argument("--mb", type=float, default=20.0, help="synthetic corpus size")
+    args = parser.parse_args()
+
+    docs = [f.read_text(encoding="utf-8", errors="ignore") for f in args.files] or synthetic_corpus(args.mb)
+    print(f"corpus: {len(docs)} docs, {sum(len(d) for d in docs) / 1_000_000:.1f} MB")
+    print(
+        f"{'strategy':>9} {'chunks':>8} {'MB/s':>7} {'avg tok':>8} {'max tok':>8} "
+        f"{'mid-sentence %':>15} {'over budget':>12}"
+    )
+    over_budget = 0
+    for strategy in ("fixed", "sentence", "token", "heading"):
+        r = bench(docs, strategy)
+        over_budget += r["over_budget"]
+        print(
+            f"{r['strategy']:>9} {r['chunks']:>8} {r['mb_s']:>7.1f} {r['avg_tokens']:>8.0f} "
+            f"{r['max_tokens']:>8} {r['cut_pct']:>14.1f}% {r['over_budget']:>12}"
+        )
+    if over_budget:
+        sys.exit(f"{over_budget} chunks over their size budget")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Context assembly micro-benchmark: the previous quadratic merge (every
+overlap length tested against an ever-growing string) versus
+app.storage.context_builder, for increasing retrieval limits.
+
+    PYTHONPATH=. python scripts/bench_context.py
+"""
+
+import random
+import re
+import timeit
+
+from app.ingestion.chunking import chunk_fixed
+from app.storage.context_builder import build_context_string, normalize_text
+
+WORDS = "policy refund hours weekend pricing premium plan support account order delivery".split()
+
+
+def legacy_merge_texts(base: str, addition: str) -> str:
+    if not base:
+        return addition
+    max_overlap = min(len(base), len(addition))
+    for i in range(max_overlap, 50, -1):
+        if base.endswith(addition[:i]):
+            return base + addition[i:]
+    return base + "\n\n" + addition
+
+
+def legacy_build_context_string(chunks: list) -> str:
+    context = ""
+    for chunk in chunks:
+        content = normalize_text(chunk.get("content", ""))
+        if not content:
+            continue
+        context = legacy_merge_texts(context, content)
+    return context.strip()
+
+
+def make_chunks(count: int, seed: int = 3) -> list[dict]:
+    rng = random.Random(seed)
+    text = " ".join(
+        " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 20))).capitalize() + "."
+        for _ in range(count * 30)
+    )
+    text = re.sub(r"\s+", " ", text)
+    # overlapping 1200/200 windows, half of them contiguous, half shuffled
+    windows = chunk_fixed(text)[:count]
+    half = len(windows) // 2
+    tail = windows[half:]
+    rng.shuffle(tail)
+    return [{"content": w} for w in windows[:half] + tail]
+
+
+def main():
+    print(f"{'chunks':>7} {'legacy ms':>10} {'new ms':>8} {'speedup':>8} {'same output':>12}")
+    for count in (5, 10, 25, 50, 100):
+        chunks = make_chunks(count)
+        runs = max(3, 200 // count)
+        legacy = min(timeit.repeat(lambda: legacy_build_context_string(chunks), number=runs, repeat=3)) / runs
+        new = min(timeit.repeat(lambda: build_context_string(chunks, token_budget=0), number=runs, repeat=3)) / runs
+        same = legacy_build_context_string(chunks) == build_context_string(chunks, token_budget=0)
+        print(f"{count:>7} {legacy * 1000:>10.3f} {new * 1000:>8.3f} {legacy / new:>7.1f}x {str(same):>12}")
+
+
+if __name__ == "__main__":
+    main()
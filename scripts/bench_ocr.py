@@ -0,0 +1,57 @@
+"""
+Scanned-PDF OCR benchmark: serial in-process OCR (the old parse_pdf path)
+versus parallel OCR on the process pool.
+
+    PYTHONPATH=. python scripts/bench_ocr.py path/to/scanned.pdf --pages 20
+"""
+
+import argparse
+import asyncio
+import os
+import time
+from pathlib import Path
+
+from pypdf import PdfReader
+
+from app.ingestion.ocr_executor import close_ocr_executor, init_ocr_executor, run_ocr
+from app.ingestion.ocr_helper import infer_ocr
+
+
+def bench_serial(file_path: Path, pages: list[int]) -> tuple[float, int]:
+    started = time.perf_counter()
+    chars = sum(len(infer_ocr(file_path, page_num=p) or "") for p in pages)
+    return time.perf_counter() - started, chars
+
+
+async def bench_pool(file_path: Path, pages: list[int]) -> tuple[float, int]:
+    init_ocr_executor()
+    # warm the workers so process start-up is not billed to the run
+    await asyncio.gather(*(run_ocr(os.getpid) for _ in range(os.cpu_count() or 1)))
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(run_ocr(infer_ocr, file_path, page_num=p) for p in pages))
+    elapsed = time.perf_counter() - started
+    close_ocr_executor()
+    return elapsed, sum(len(r or "") for r in results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pdf", type=Path)
+    parser.add_argument("--pages", type=int, default=0, help="limit to the first N pages (0 = all)")
+    args = parser.parse_args()
+
+    total = len(PdfReader(str(args.pdf)).pages)
+    pages = list(range(1, (min(args.pages, total) if args.pages else total) + 1))
+
+    serial_s, serial_chars = bench_serial(args.pdf, pages)
+    pool_s, pool_chars = asyncio.run(bench_pool(args.pdf, pages))
+
+    print(f"pages: {len(pages)}   workers: {os.cpu_count()}")
+    print(f"serial   {serial_s:8.2f}s  {len(pages) / serial_s:6.2f} pages/s  chars={serial_chars}")
+    print(f"pool     {pool_s:8.2f}s  {len(pages) / pool_s:6.2f} pages/s  chars={pool_chars}")
+    print(f"speedup  {serial_s / pool_s:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Retrieval backend benchmark: bulk insert time and BM25 / vector search
+latency on a synthetic corpus with random vectors, so no embedder is
+needed. The weaviate backend writes to a throwaway collection that is
+dropped afterwards; the local backend uses a temporary directory. The
+pgvector backend writes to context_chunks (--dim must match EMBEDDING_DIM)
+and deletes the bench rows afterwards; it also times hybrid_search.
+
+    PYTHONPATH=. python scripts/bench_retrieval.py --backend local
+    PYTHONPATH=. python scripts/bench_retrieval.py --backend local --vector-index hnsw
+    PYTHONPATH=. python scripts/bench_retrieval.py --backend weaviate --chunks 20000
+    PYTHONPATH=. python scripts/bench_retrieval.py --backend pgvector
+"""
+
+import argparse
+import asyncio
+import random
+import statistics
+import tempfile
+import time
+
+import numpy as np
+
+from app.services.models import ContextChunk
+from app.storage.search_backend import SEARCH_BACKENDS, SearchBackend
+
+WORDS = (
+    "the a customer plan pricing refund policy account support hours weekend "
+    "delivery order invoice contract renewal premium standard service team "
+    "request response warranty device setup install configure payment monthly"
+).split()
+BENCH_COLLECTION = "BenchContext"
+
+
+def make_corpus(count: int, dim: int, seed: int = 11) -> tuple[list[ContextChunk], np.ndarray]:
+    rng = random.Random(seed)
+    chunks = [
+        ContextChunk(
+            source_id=f"00000000-0000-4000-8000-{idx:012d}",
+            source_type="document",
+            content=" ".join(rng.choice(WORDS) for _ in range(rng.randint(60, 200))),
+            page_number=idx // 10,
+            keywords=rng.sample(WORDS, 4),
+            typical_questions=[" ".join(rng.choice(WORDS) for _ in range(8)) + "?"],
+        )
+        for idx in range(count)
+    ]
+    vectors = np.random.default_rng(seed).normal(size=(count, dim)).astype(np.float32)
+    return chunks, vectors
+
+
+def make_backend(name: str, vector_index: str, path: str) -> SearchBackend:
+    if name == "local":
+        from app.storage.local_index import LocalBackend
+        return LocalBackend(path, vector_index=vector_index)
+    if name == "pgvector":
+        from app.storage.pgvector_backend import PgVectorBackend
+        return PgVectorBackend()
+    from app.storage.weaviate_backend import WeaviateBackend
+    return WeaviateBackend(collection_name=BENCH_COLLECTION, rebuild=True)
+
+
+async def timed(fn, runs: list) -> None:
+    started = time.perf_counter()
+    await fn()
+    runs.append((time.perf_counter() - started) * 1000)
+
+
+def summary(label: str, runs: list) -> str:
+    runs = sorted(runs)
+    p95 = runs[min(len(runs) - 1, int(len(runs) * 0.95))]
+    return f"{label:>8} p50 {statistics.median(runs):8.3f} ms   p95 {p95:8.3f} ms   {1000 * len(runs) / sum(runs):9.0f} q/s"
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=sorted(SEARCH_BACKENDS), default="local")
+    parser.add_argument("--vector-index", choices=["exact", "hnsw"], default="exact", help="local backend only")
+    parser.add_argument("--chunks", type=int, default=5000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--batch", type=int, default=200, help="chunks per save call, like INGEST_FLUSH_SIZE")
+    args = parser.parse_args()
+
+    chunks, vectors = make_corpus(args.chunks, args.dim)
+    rng = random.Random(5)
+    queries = [" ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 8))) for _ in range(args.queries)]
+    query_vectors = np.random.default_rng(5).normal(size=(args.queries, args.dim)).astype(np.float32)
+
+    if args.backend == "pgvector":
+        from app.storage.db_helper import init_db
+        await init_db()
+
+    with tempfile.TemporaryDirectory() as path:
+        backend = make_backend(args.backend, args.vector_index, path)
+        await backend.start()
+        try:
+            started = time.perf_counter()
+            for start in range(0, len(chunks), args.batch):
+                end = start + args.batch
+                await backend.save(chunks[start:end], vectors[start:end].tolist())
+            load_s = time.perf_counter() - started
+            print(f"backend: {args.backend}   chunks: {len(chunks)}   dim: {args.dim}")
+            print(f"{'insert':>8} {load_s:8.2f} s        {len(chunks) / load_s:9.0f} chunks/s")
+
+            bm25_runs: list = []
+            vector_runs: list = []
+            hybrid_runs: list = []
+            for query, vector in zip(queries, query_vectors):
+                await timed(lambda: backend.keyword_search(query, args.limit), bm25_runs)
+                await timed(lambda: backend.vector_search(vector.tolist(), args.limit), vector_runs)
+                if backend.supports_hybrid:
+                    await timed(lambda: backend.hybrid_search(query, vector.tolist(), args.limit), hybrid_runs)
+            print(summary("bm25", bm25_runs))
+            print(summary("vector", vector_runs))
+            if hybrid_runs:
+                print(summary("hybrid", hybrid_runs))
+        finally:
+            if args.backend == "pgvector":
+                await backend.delete([chunk.source_id for chunk in chunks])
+            if args.backend == "weaviate":
+                from app.storage.weaviate_pool import get_weaviate
+                with get_weaviate() as client:
+                    client.collections.delete(BENCH_COLLECTION)
+            await backend.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
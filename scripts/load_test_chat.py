@@ -0,0 +1,92 @@
+"""
+Concurrent WebSocket chat load test.
+
+Opens N sessions against a running server, sends a fixed number of messages
+from each, and reports turn throughput per concurrency level. Throughput
+should grow with the number of sessions while retrieval stays off the event
+loop; a flat line means something is blocking it again.
+
+    python scripts/load_test_chat.py --base-url http://localhost:8000 --levels 1 2 4 8 16
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import httpx
+import websockets
+
+DEFAULT_QUESTIONS = [
+    "What are your opening hours on weekends?",
+    "How much does the premium plan cost per month?",
+    "Can I cancel my subscription at any time?",
+    "pricing?",
+]
+
+
+async def new_session(http: httpx.AsyncClient) -> str:
+    res = await http.get("/set-session")
+    res.raise_for_status()
+    return res.json()["session_id"]
+
+
+async def run_session(ws_url: str, messages: int, questions: list[str]) -> list[float]:
+    latencies = []
+    async with websockets.connect(ws_url, max_size=None) as ws:
+        for i in range(messages):
+            started = time.perf_counter()
+            await ws.send(questions[i % len(questions)])
+            while True:
+                frame = json.loads(await ws.recv())
+                if frame.get("type") == "message":
+                    break
+            latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+async def run_level(base_url: str, sessions: int, messages: int, questions: list[str]) -> dict:
+    ws_base = base_url.replace("https://", "wss://").replace("http://", "ws://")
+    async with httpx.AsyncClient(base_url=base_url, timeout=30) as http:
+        session_ids = [await new_session(http) for _ in range(sessions)]
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*[
+        run_session(f"{ws_base}/ws/chat/{sid}", messages, questions)
+        for sid in session_ids
+    ])
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(l for session in results for l in session)
+    return {
+        "sessions": sessions,
+        "turns": len(latencies),
+        "elapsed": elapsed,
+        "throughput": len(latencies) / elapsed if elapsed else 0.0,
+        "p50": statistics.median(latencies),
+        "p95": latencies[int(len(latencies) * 0.95) - 1] if latencies else 0.0,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--levels", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--messages", type=int, default=5, help="messages per session")
+    args = parser.parse_args()
+
+    print(f"{'sessions':>8} {'turns':>6} {'elapsed s':>10} {'turns/s':>8} {'p50 s':>7} {'p95 s':>7} {'scaling':>8}")
+    baseline = None
+    for level in args.levels:
+        r = await run_level(args.base_url, level, args.messages, DEFAULT_QUESTIONS)
+        baseline = baseline or r["throughput"]
+        scaling = r["throughput"] / baseline if baseline else 0.0
+        print(
+            f"{r['sessions']:>8} {r['turns']:>6} {r['elapsed']:>10.2f} {r['throughput']:>8.2f} "
+            f"{r['p50']:>7.2f} {r['p95']:>7.2f} {scaling:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())